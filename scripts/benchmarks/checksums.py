@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Compares serial and threaded checksum throughput on a synthetic distfile.
+
+Run with `poetry run python scripts/benchmarks/checksums.py [SIZE_IN_MB]` (default 1024).
+"""
+
+import io
+import sys
+import time
+
+from seaport._clipboard.portfile.checksum_engine import CHUNK_SIZE, hash_stream
+
+
+class SyntheticStream(io.RawIOBase):
+    """Repeats the same chunk of bytes, so the distfile never has to be in memory."""
+
+    def __init__(self, size: int) -> None:
+        self.remaining = size
+        self.chunk = bytes(range(256)) * (CHUNK_SIZE // 256)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: "bytearray") -> int:  # type: ignore[override]
+        read = min(len(buffer), self.remaining, len(self.chunk))
+        buffer[:read] = self.chunk[:read]
+        self.remaining -= read
+        return read
+
+
+def main() -> None:
+    size = int(sys.argv[1] if len(sys.argv) > 1 else 1024) * 1024 * 1024
+
+    for algorithms in (
+        ["rmd160", "sha256", "size"],
+        ["md5", "sha1", "rmd160", "sha256"],
+    ):
+        for threaded in (False, True):
+            start = time.perf_counter()
+            hash_stream(
+                io.BufferedReader(SyntheticStream(size), CHUNK_SIZE),
+                algorithms,
+                threaded=threaded,
+            )
+            elapsed = time.perf_counter() - start
+            print(
+                f"{'threaded' if threaded else 'serial':>8} {'+'.join(algorithms):<28} "
+                f"{size / elapsed / 1024 / 1024:8.1f} MB/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
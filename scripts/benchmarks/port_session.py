@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Compares the latency of port commands run in a session and in their own process.
+
+Run with `poetry run python scripts/benchmarks/port_session.py [PORT ...]` (default
+py-base91 and gping). MacPorts needs to be installed.
+"""
+
+import os
+import shutil
+import sys
+import time
+
+from seaport._port_session import close_sessions, port_output
+
+#: The port commands run for each port, as clip would.
+COMMANDS = (["info", "--index", "--version"], ["distfiles"], ["file"])
+
+
+def main() -> None:
+    port = shutil.which("port")
+    if port is None:
+        sys.exit("port isn't installed")
+    names = sys.argv[1:] or ["py-base91", "gping"]
+
+    for mode in ("1", "0"):
+        os.environ["SEAPORT_PORT_SESSION"] = mode
+        timings = []
+        for name in names:
+            for command in COMMANDS:
+                start = time.perf_counter()
+                port_output([port, *command, name], check=False)
+                timings.append(time.perf_counter() - start)
+        close_sessions()
+        print(
+            f"{'session' if mode == '1' else 'one-shot':>8}: {len(timings)} commands, "
+            f"first {timings[0] * 1000:.0f} ms, "
+            f"mean {sum(timings) / len(timings) * 1000:.0f} ms, "
+            f"mean after first {sum(timings[1:]) / (len(timings) - 1) * 1000:.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Functions for locating seaport's cache in the user's cache directory."""
+
+import os
+import sys
+
+from beartype import beartype
+
+
+@beartype
+def cache_dir() -> str:
+    """Determines where seaport stores its cache, creating it if necessary.
+
+    ``SEAPORT_CACHE_DIR`` takes precedence, followed by ``XDG_CACHE_HOME`` and then
+    the platform's default cache directory.
+
+    Examples:
+        >>> import os
+        >>> from seaport._cache import cache_dir
+        >>> os.environ["SEAPORT_CACHE_DIR"] = "/tmp/seaport-cache"
+        >>> cache_dir()
+        '/tmp/seaport-cache'
+        >>> del os.environ["SEAPORT_CACHE_DIR"]
+
+    Returns:
+        str: The path of the cache directory
+    """
+    directory = os.environ.get("SEAPORT_CACHE_DIR")
+    if not directory:
+        default = "~/Library/Caches" if sys.platform == "darwin" else "~/.cache"
+        directory = os.path.join(
+            os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(default), "seaport"
+        )
+    os.makedirs(directory, exist_ok=True)
+    return directory
@@ -30,20 +30,25 @@
 
 """Functions related to the click commands."""
 
-from typing import Any, TypeVar
+import importlib
+from typing import Any, Optional, TypeVar
 
 import click
 from beartype import beartype
-from beartype.typing import Callable, List
+from beartype.typing import Callable, Dict, List, Tuple
 
 from seaport._clipboard.checks import user_path
-from seaport._clipboard.format import format_subprocess
+from seaport._port_session import port_output
+from seaport._portindex import complete, port_names
 
 
 @beartype
 def get_names(ctx: Any, param: click.Argument, incomplete: str) -> List[str]:
     """Shell autocompletion for port names.
 
+    The names are read from a sorted list built from the PortIndex and saved in the
+    user's cache directory. ``port search`` is only used if neither are available.
+
     Examples:
         >>> from seaport._click_functions import get_names
         >>> from click.core import Argument
@@ -59,7 +64,12 @@ def get_names(ctx: Any, param: click.Argument, incomplete: str) -> List[str]:
     Returns:
         List[Union[str, Tuple[str, str]]]: The portname and the description
     """
-    results = format_subprocess(
+    # Prefer the saved list of port names over searching with the port command
+    names = port_names()
+    if names is not None:
+        return complete(names, incomplete)
+
+    results = port_output(
         [
             f"{user_path(True)}/port",
             "search",
@@ -74,6 +84,68 @@ def get_names(ctx: Any, param: click.Argument, incomplete: str) -> List[str]:
     return [repr(k).split("\\")[0][1:] for k in results]
 
 
+class LazyGroup(click.Group):
+    """A click group that only imports its subcommands once they're used.
+
+    This keeps ``seaport --version`` and shell completion from importing (and running)
+    everything the subcommands need.
+
+    See https://click.palletsprojects.com/en/8.1.x/complex/#lazily-loading-subcommands
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        lazy_subcommands: Optional[Dict[str, str]] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Sets the subcommands to lazily import.
+
+        Args:
+            lazy_subcommands: Maps each subcommand name to its import path e.g.
+                ``{"clip": "seaport._clipboard.clipboard:clip"}``
+        """
+        super().__init__(*args, **kwargs)
+        self.lazy_subcommands = {} if lazy_subcommands is None else lazy_subcommands
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        """Lists both the eagerly and lazily loaded subcommands."""
+        return sorted(super().list_commands(ctx) + list(self.lazy_subcommands))
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        """Imports the subcommand if it's lazily loaded."""
+        if cmd_name not in self.lazy_subcommands:
+            return super().get_command(ctx, cmd_name)
+        module, _, name = self.lazy_subcommands[cmd_name].partition(":")
+        command = getattr(importlib.import_module(module), name)
+        if not isinstance(command, click.Command):
+            raise ValueError(f"{self.lazy_subcommands[cmd_name]} isn't a click command")
+        return command
+
+
+class LazyHelpOption(click.Option):
+    """A click option whose help text is only determined when it's shown.
+
+    This is for help text that has to look at the user's system (e.g. the path of
+    gh), so that it isn't determined every time seaport is imported.
+    """
+
+    def __init__(self, *args: Any, help_callback: Callable[[], str], **kwargs: Any):
+        """Sets the function that determines the help text.
+
+        Args:
+            help_callback: Outputs the help text of the option
+        """
+        super().__init__(*args, **kwargs)
+        self._help_callback = help_callback
+
+    def get_help_record(self, ctx: click.Context) -> Optional[Tuple[str, str]]:
+        """Determines the help text before it's first shown."""
+        if self.help is None:
+            self.help = self._help_callback()
+        return super().get_help_record(ctx)
+
+
 F = TypeVar("F", bound=Callable[..., None])
 
 
@@ -84,6 +156,12 @@ def main_cmd(function: F) -> F:
     See https://stackoverflow.com/a/50061489/10763533
     """
     function = click.argument("name", type=str, shell_complete=get_names)(function)
+    return main_options(function)
+
+
+@beartype
+def main_options(function: F) -> F:
+    """The options of main_cmd, for commands where NAME is optional."""
     function = click.option(
         "--write",
         help="Writes the updated contents to the user's portfile, similar to the original port bump.",
@@ -113,4 +191,9 @@ def main_cmd(function: F) -> F:
     function = click.option(
         "--lint/--no-lint", default=False, help="Runs port lint --nitpick."
     )(function)
+    function = click.option(
+        "--refresh",
+        is_flag=True,
+        help="Ignores any cached livecheck results, checking upstream in full.",
+    )(function)
     return function
@@ -40,7 +40,8 @@ import click
 from beartype import beartype
 
 from seaport._clipboard.checks import user_path
-from seaport._clipboard.format import format_subprocess
+from seaport._clipboard.format import run_subprocess
+from seaport._port_session import port_output
 
 
 @beartype
@@ -54,8 +55,9 @@ def perform_lint(name: str) -> bool:
         bool: Whether the linting was successful or not
     """
     click.secho("🤔 Linting", fg="cyan")
-    lint_output = format_subprocess(
-        [f"{user_path(True)}/port", "lint", "--nitpick", name]
+    # Ports with lint errors are reported below, rather than raising
+    lint_output = port_output(
+        [f"{user_path(True)}/port", "lint", "--nitpick", name], check=False
     )
     click.echo(lint_output)
     output_list = lint_output.split(" ")
@@ -87,7 +89,7 @@ def perform_test(name: str, subport: Optional[str] = None) -> bool:
     """
     click.secho(f"🧪 Testing {name}", fg="cyan")
     try:
-        subprocess.run(
+        run_subprocess(
             [f"{user_path()}/sudo", f"{user_path(True)}/port", "test", name],
             check=True,
         )
@@ -97,7 +99,7 @@ def perform_test(name: str, subport: Optional[str] = None) -> bool:
         if subport:
             click.secho(f"🏗 Trying with subport {subport}", fg="cyan")
             try:
-                subprocess.run(
+                run_subprocess(
                     [f"{user_path()}/sudo", f"{user_path(True)}/port", "test", subport],
                     check=True,
                 )
@@ -119,7 +121,7 @@ def perform_install(name: str) -> None:
         name: The name of the port
     """
     click.secho(f"🏗️ Installing {name}", fg="cyan")
-    subprocess.run(
+    run_subprocess(
         [
             f"{user_path()}/sudo",
             f"{user_path(True)}/port",
@@ -135,7 +137,7 @@ def perform_install(name: str) -> None:
     )
     if click.confirm("Do you want to uninstall the port?"):
         click.secho(f"🗑  Uninstalling {name}", fg="cyan")
-        subprocess.run(
+        run_subprocess(
             [f"{user_path()}/sudo", f"{user_path(True)}/port", "uninstall", name],
             check=True,
         )
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Bumps many ports at once, running the network-bound stages on a pool of workers.
+
+Each port goes through the same stages as clip (livecheck, download, hash and rewrite),
+but without prompts or clipboard output. The rewritten portfile and a diff of it are
+saved for every port that's updated, and a summary table is shown at the end.
+"""
+
+import concurrent.futures
+import difflib
+import os
+import subprocess
+
+import click
+from beartype import beartype
+from beartype.typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from seaport._clipboard.checks import user_path
+from seaport._clipboard.distfile_cache import DistfileCache
+from seaport._clipboard.format import run_subprocess
+from seaport._clipboard.mirrors import candidates, race
+from seaport._clipboard.portfile.checksum_engine import parse_checksums
+from seaport._clipboard.portfile.checksums import replace_checksums
+from seaport._clipboard.portfile.portfile_numbers import DEVEL_VERSIONS
+from seaport._livecheck import format_stats
+from seaport._port_session import port_output
+from seaport.portfile import Port
+
+#: How many ports are bumped at once by default.
+DEFAULT_JOBS = 4
+
+#: Shown next to each port as it finishes.
+STATUS_ICONS = {"updated": "✅", "skipped": "⏭️ ", "failed": "❌"}
+
+#: The colour of each port's line as it finishes.
+STATUS_COLOURS = {"updated": "green", "skipped": "yellow", "failed": "red"}
+
+
+class BulkResult(NamedTuple):
+    """The outcome of bumping a single port.
+
+    Attributes:
+        name (str): The name of the port
+        status (str): Either updated, skipped or failed
+        old_version (str): The version before the bump (empty if unknown)
+        new_version (str): The version bumped to (empty if unknown)
+        detail (str): Where the diff was saved, or why the port was skipped/failed
+    """
+
+    name: str
+    status: str
+    old_version: str = ""
+    new_version: str = ""
+    detail: str = ""
+
+
+@beartype
+def read_ports(contents: str) -> List[Tuple[str, Optional[str]]]:
+    """Parses a list of ports, with one port (and optionally a version) per line.
+
+    Blank lines and anything after a # are ignored.
+
+    Examples:
+        >>> from seaport._clipboard.bulk import read_ports
+        >>> read_ports("gping\\n# A comment\\npy-rich 13.0.0  # Pinned\\n")
+        [('gping', None), ('py-rich', '13.0.0')]
+
+    Args:
+        contents: The contents of the file listing the ports
+
+    Returns:
+        List[Tuple[str, Optional[str]]]: Each port and the version to bump it to (None
+            to use the livecheck)
+    """
+    ports: List[Tuple[str, Optional[str]]] = []
+    for line in contents.splitlines():
+        words = line.split("#", 1)[0].split()
+        if not words:
+            continue
+        if len(words) > 2:
+            raise ValueError(f"Expected a port and optionally a version, got {line!r}")
+        ports.append((words[0], words[1] if len(words) == 2 else None))
+    return ports
+
+
+@beartype
+def bump(
+    name: str,
+    version: Optional[str],
+    output: str,
+    write: bool = False,
+    cache: Optional[DistfileCache] = None,
+    port: Optional[Port] = None,
+    refresh: bool = False,
+) -> BulkResult:
+    """Bumps a single port, saving the rewritten portfile and a diff of it.
+
+    Args:
+        name: The name of the port
+        version: The version to bump it to (None to use the livecheck)
+        output: The directory to save NAME/Portfile and NAME.diff in
+        write: Whether to also write the changes to the user's local portfile repo
+        cache: The distfile cache to download through (shared between workers)
+        port: The port, if it's already been created (e.g. by Port.bulk)
+        refresh: Whether to ignore the livecheck cache
+
+    Returns:
+        BulkResult: Whether the port was updated, skipped or failed
+    """
+    try:
+        port = Port(name) if port is None else port
+    except RuntimeError as error:
+        return BulkResult(name, "failed", detail=str(error))
+    name = port.name
+
+    new = port.livecheck(refresh) if version is None else version
+    if new == port.version:
+        return BulkResult(name, "skipped", port.version, new, "already up-to-date")
+    if "-devel" not in name and any(item in new for item in DEVEL_VERSIONS):
+        return BulkResult(
+            name, "skipped", port.version, new, "devel version, use clip to confirm"
+        )
+
+    try:
+        file_location = port_output([f"{user_path(True)}/port", "file", name])
+        with open(file_location) as file:
+            original = file.read()
+
+        distfile_urls = port.distfile_urls()
+        old_sums = parse_checksums(original) or dict(
+            zip(("rmd160", "sha256", "size"), port.checksums()[:3])
+        )
+
+        urls = candidates(
+            distfile_urls[0].replace(port.version, new),
+            [url.replace(port.version, new) for url in distfile_urls[1:]],
+        )
+        cache = DistfileCache() if cache is None else cache
+        if len(urls) > 1 and not cache.has(urls[0]):
+            source, response, _ = race(urls)
+            _, new_sums = cache.fetch(urls[0], list(old_sums), source, response)
+        else:
+            _, new_sums = cache.fetch(urls[0], list(old_sums))
+
+        contents = replace_checksums(
+            original,
+            {**old_sums, "version": port.version},
+            {**new_sums, "version": new},
+            quiet=True,
+            subport=name,
+        )
+    except (OSError, ValueError, RuntimeError, subprocess.CalledProcessError) as error:
+        return BulkResult(name, "failed", port.version, new, str(error) or repr(error))
+
+    portfile = os.path.join(output, name, "Portfile")
+    os.makedirs(os.path.dirname(portfile), exist_ok=True)
+    with open(portfile, "w") as file:
+        file.write(contents)
+
+    diff = os.path.join(output, f"{name}.diff")
+    category_path = f"{port.primary_category()}/{name}/Portfile"
+    with open(diff, "w") as file:
+        file.writelines(
+            difflib.unified_diff(
+                original.splitlines(True),
+                contents.splitlines(True),
+                f"a/{category_path}",
+                f"b/{category_path}",
+            )
+        )
+
+    if write:
+        run_subprocess(
+            ([] if os.access(file_location, os.W_OK) else [f"{user_path()}/sudo"])
+            + ["cp", portfile, file_location],
+            check=True,
+        )
+
+    return BulkResult(name, "updated", port.version, new, diff)
+
+
+@beartype
+def bulk(
+    ports: Sequence[Tuple[str, Optional[str]]],
+    output: str,
+    jobs: int = DEFAULT_JOBS,
+    write: bool = False,
+    refresh: bool = False,
+    known: Optional[Dict[str, Port]] = None,
+) -> List[BulkResult]:
+    """Bumps every port, with up to jobs ports being bumped at once.
+
+    Args:
+        ports: Each port and the version to bump it to (None to use the livecheck)
+        output: The directory to save the rewritten portfiles and diffs in
+        jobs: How many ports to bump at once
+        write: Whether to also write the changes to the user's local portfile repo
+        refresh: Whether to ignore the livecheck cache
+        known: The ports, under the names they were given as, if they've already
+            been created with Port.bulk
+
+    Returns:
+        List[BulkResult]: The outcome of each port, in the same order as ports
+    """
+    cache = DistfileCache()
+    # One port info/distfiles call for every port, rather than one per port
+    # The livechecks are left to the workers, since port livecheck checks one at a time
+    if known is None:
+        known = Port.bulk([name for name, _ in ports], livecheck=False)
+    results: Dict[int, BulkResult] = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(
+                bump, name, version, output, write, cache, known.get(name), refresh
+            ): index
+            for index, (name, version) in enumerate(ports)
+        }
+        for future in concurrent.futures.as_completed(futures):
+            index = futures[future]
+            try:
+                result = future.result()
+            # One port failing unexpectedly shouldn't stop the rest
+            except Exception as error:
+                result = BulkResult(ports[index][0], "failed", detail=repr(error))
+            click.secho(
+                f"{STATUS_ICONS[result.status]} {result.name}",
+                fg=STATUS_COLOURS[result.status],
+            )
+            results[index] = result
+    return [results[index] for index in range(len(ports))]
+
+
+@beartype
+def summary(
+    results: Sequence[BulkResult], livecheck: Optional[Dict[str, int]] = None
+) -> str:
+    """Formats the results as a table, followed by the totals of each status.
+
+    If the livecheck cache was used, its hit rate is shown at the end.
+
+    Examples:
+        >>> from seaport._clipboard.bulk import BulkResult, summary
+        >>> print(summary([BulkResult("gping", "updated", "1.0", "1.1", "gping.diff")]))
+        PORT   STATUS   OLD  NEW  DETAIL
+        gping  updated  1.0  1.1  gping.diff
+        1 updated, 0 skipped, 0 failed
+
+    Args:
+        results: The outcome of each port
+        livecheck: The counters of the livecheck cache (see session_stats)
+
+    Returns:
+        str: The summary table
+    """
+    rows = [("PORT", "STATUS", "OLD", "NEW", "DETAIL")] + [
+        (
+            result.name,
+            result.status,
+            result.old_version,
+            result.new_version,
+            result.detail,
+        )
+        for result in results
+    ]
+    widths = [max(len(row[column]) for row in rows) for column in range(4)]
+    lines = [
+        "  ".join(
+            [cell.ljust(width) for cell, width in zip(row, widths)] + [row[4]]
+        ).rstrip()
+        for row in rows
+    ]
+    totals = ", ".join(
+        f"{sum(result.status == status for result in results)} {status}"
+        for status in STATUS_ICONS
+    )
+    if livecheck is not None and any(livecheck.values()):
+        totals += f"\n{format_stats(livecheck)}"
+    return "\n".join(lines + [totals])
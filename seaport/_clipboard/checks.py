@@ -30,39 +30,15 @@
 
 """Defensive programming functions."""
 
-import sys
-from typing import Any, Callable, Optional, TypeVar
-
 from beartype import beartype
+from beartype.typing import Optional
 
-from seaport._clipboard.format import format_subprocess
-
-# Don't count code coverage since different python versions
-# won't run different parts of code
-if "pytest" in sys.modules:  # pragma: no cover
-    # Caching the result breaks tests, so disable caching during testing.
-
-    F = TypeVar("F", bound=Callable[..., Any])
-
-    @beartype
-    def cache(func: F) -> F:
-        """A decorator that does nothing."""
-        return func
-
-elif sys.version_info >= (3, 9):  # pragma: no cover
-    from functools import cache
-else:  # pragma: no cover
-    from functools import lru_cache
-
-    # mypy complains due to the type signature of cache for pytest
-    cache = lru_cache(maxsize=None)  # type: ignore[assignment]
+from seaport._host import which
 
 # TODO: This will need major refactoring (it's a mess)
 # It also kind of defeats the purpose of the bandit error it's meant to solve
-# TODO: This test will fail if non-default macports path is used
 
 
-@cache
 @beartype
 def user_path(
     port: bool = False, third_party: bool = False, manual: Optional[str] = None
@@ -97,23 +73,29 @@ def user_path(
     if manual:
         return manual.split("bin")[0] + "bin"
 
+    if not port and not third_party:
+        return "/usr/bin"
+
     # TODO: Run a small check to be certain that this port is the right port
-    port_path = format_subprocess(["/usr/bin/which", "port"])
+    port_path = which("port")
+    if port_path is None:
+        raise RuntimeError("port isn't on the PATH, is MacPorts installed?")
     port_prefix = port_path.split("bin")[0] + "bin"
 
     if port:
         return port_prefix
 
-    if third_party:
-        # Cannot use port_path in case not installed by MacPorts (e.g. Homebrew)
-        # TODO: Run a small check to be certain that this is the right seaport
-        seaport_path = format_subprocess(["/usr/bin/which", "seaport"])
+    # Cannot use port_path in case not installed by MacPorts (e.g. Homebrew)
+    # TODO: Run a small check to be certain that this is the right seaport
+    seaport_path = which("seaport")
 
-        if "Python" not in seaport_path and "virtualenvs" not in seaport_path:
-            # Can't run system commands from python path
-            return seaport_path.split("bin")[0] + "bin"
-
-        # Default to standard MacPorts prefix
-        return port_prefix
+    if (
+        seaport_path is not None
+        and "Python" not in seaport_path
+        and "virtualenvs" not in seaport_path
+    ):
+        # Can't run system commands from python path
+        return seaport_path.split("bin")[0] + "bin"
 
-    return "/usr/bin"
+    # Default to standard MacPorts prefix
+    return port_prefix
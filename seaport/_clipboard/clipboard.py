@@ -31,7 +31,6 @@
 """The main CLI function, which the user runs."""
 
 import os
-import subprocess
 import sys
 import tempfile
 from typing import Optional
@@ -39,36 +38,82 @@ from typing import Optional
 import click
 from beartype import beartype
 
-from seaport._click_functions import main_cmd
+from seaport._click_functions import get_names, main_options
 from seaport._clipboard.additional import perform_install, perform_lint, perform_test
+from seaport._clipboard.bulk import DEFAULT_JOBS, bulk, read_ports, summary
 from seaport._clipboard.checks import user_path
+from seaport._clipboard.format import run_subprocess
+from seaport._clipboard.portfile.checksum_engine import parse_checksums
 from seaport._clipboard.portfile.checksums import new_checksums, replace_checksums
 from seaport._clipboard.portfile.portfile_numbers import new_version
 from seaport._clipboard.user import revert_contents, user_clipboard
+from seaport._livecheck import format_stats, session_stats
+from seaport._port_session import port_output
 from seaport.portfile import Port
 
 
-# Some parameters are not used
-# They are only here since the pr function sends them
 @click.command()
-@main_cmd
+@click.argument("name", type=str, required=False, shell_complete=get_names)
+@main_options
+@click.option(
+    "--from-file",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Bumps every port listed in a file instead of NAME, with one port (and optionally "
+    "the version to bump it to) per line. The rewritten portfiles and diffs are saved to "
+    "--output rather than copied to the clipboard.",
+)
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=DEFAULT_JOBS,
+    show_default=True,
+    help="How many ports --from-file bumps at once.",
+)
+@click.option(
+    "--output",
+    type=click.Path(file_okay=False, writable=True),
+    default="seaport-bulk",
+    show_default=True,
+    help="Where --from-file saves each rewritten portfile (NAME/Portfile) and diff (NAME.diff).",
+)
 @beartype
 def clip(
-    name: str,
+    name: Optional[str],
     bump: Optional[str],
     test: bool,
     lint: bool,
     url: Optional[str],
     install: bool,
     write: bool,
-    location: Optional[str] = None,
-    new: bool = False,
-    gh: Optional[str] = None,
+    from_file: Optional[str] = None,
+    jobs: int = DEFAULT_JOBS,
+    output: str = "seaport-bulk",
+    refresh: bool = False,
 ) -> None:
     """Bumps the version number and checksum of NAME.
 
     It then copies the result to your clipboard.
     """
+    if from_file is not None:
+        if name is not None or bump or url or test or lint or install:
+            raise click.UsageError(
+                "NAME, --bump, --url, --test, --lint and --install can't be used with --from-file"
+            )
+        with open(from_file) as file:
+            try:
+                ports = read_ports(file.read())
+            except ValueError as error:
+                raise click.UsageError(str(error))
+
+        results = bulk(ports, output, jobs, write, refresh)
+        click.echo(summary(results, session_stats()))
+        if any(result.status == "failed" for result in results):
+            sys.exit(1)
+        return
+
+    if name is None:
+        raise click.UsageError("Missing argument 'NAME'.")
+
     port = Port(name)
 
     # Sets correct capitalisation
@@ -77,9 +122,11 @@ def clip(
     old_checks = port.checksums()
 
     # Determine new version
-    bump = new_version(port, bump)
+    bump = new_version(port, bump, refresh=refresh)
 
     click.secho(f"👍 New version is {bump}", fg="green")
+    if any(session_stats().values()):
+        click.echo(format_stats(session_stats()))
 
     # Allows pr function to get the version number and category
     # new_version checks if bump is none and deals with it there
@@ -88,35 +135,43 @@ def clip(
 
     # Allows setting custom url
     new_website = old_checks[3].replace(port.version, bump) if url is None else url
-
-    # Parameter is new website (old website with old version replaced with new version)
-    new_sha256, new_rmd160, new_size = new_checksums(
-        new_website, port if install or test else None
+    # The master_sites and distfiles mirrors are raced, unless a custom url is set
+    mirrors = (
+        [site.replace(port.version, bump) for site in port.distfile_urls()]
+        if url is None
+        else []
     )
 
-    click.secho("🔎 Checksums:", fg="cyan")
-    click.echo(f"Old rmd160: {old_checks[0]}")
-    click.echo(f"New rmd160: {new_rmd160}")
-    click.echo(f"Old sha256: {old_checks[1]}")
-    click.echo(f"New sha256: {new_sha256}")
-    click.echo(f"Old size: {old_checks[2]}")
-    click.echo(f"New size: {new_size}")
-
     # Add the new checksums, and take a backup of the original
-    file_location = (
-        subprocess.check_output([f"{user_path(True)}/port", "file", name])
-        .decode("utf-8")
-        .strip()
-    )
+    file_location = port_output([f"{user_path(True)}/port", "file", name])
 
     with click.open_file(file_location) as file:
         # Backup of the original contents
         original = file.read()
 
+    # Only generate the checksum types that the portfile uses
+    # Fall back to the checksums from port distfiles if the block can't be parsed
+    old_sums = parse_checksums(original) or {
+        "rmd160": old_checks[0],
+        "sha256": old_checks[1],
+        "size": old_checks[2],
+    }
+
+    # Parameter is new website (old website with old version replaced with new version)
+    new_sums = new_checksums(
+        new_website, port if install or test else None, list(old_sums), mirrors
+    )
+
+    click.secho("🔎 Checksums:", fg="cyan")
+    for algorithm, old_sum in old_sums.items():
+        click.echo(f"Old {algorithm}: {old_sum}")
+        click.echo(f"New {algorithm}: {new_sums[algorithm]}")
+
     new_contents = replace_checksums(
         original,
-        (old_checks[0], old_checks[1], old_checks[2], port.version),
-        (new_rmd160, new_sha256, new_size, bump),
+        {**old_sums, "version": port.version},
+        {**new_sums, "version": bump},
+        subport=port.name,
     )
 
     if test or install or write or lint:
@@ -130,7 +185,7 @@ def clip(
             # Changes only reverted if the user doesn't use the --write flag
             click.secho("📝 Changes will be reverted after completion", fg="cyan")
 
-        subprocess.run(
+        run_subprocess(
             ([] if os.access(file_location, os.W_OK) else [f"{user_path()}/sudo"])
             + ["cp", tmp_version.name, file_location],
             check=True,
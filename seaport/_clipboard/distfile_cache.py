@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""A cache of downloaded distfiles in the user's cache directory.
+
+Distfiles are stored by their sha256, and each url remembers which distfile it
+last served along with its ETag/Last-Modified headers. Re-running seaport then only
+costs a conditional request, which the server answers with 304 if nothing has changed.
+Downloads themselves are resumed and retried by :func:`seaport._clipboard.download.download`.
+"""
+
+import hashlib
+import http.client
+import json
+import os
+import threading
+import time
+import urllib.error
+
+import click
+from beartype import beartype
+from beartype.typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from seaport._cache import cache_dir
+from seaport._clipboard.download import download
+from seaport._clipboard.portfile.checksum_engine import hash_stream
+from seaport._livecheck import LivecheckCache
+
+#: The default size cap of the cache, in bytes (which can be set with SEAPORT_DISTFILE_CACHE_SIZE).
+DEFAULT_MAX_SIZE = 2 * 1024**3
+
+#: The counters kept by the cache.
+COUNTERS = ("hits", "misses", "evictions")
+
+
+@beartype
+class DistfileCache:
+    """A content-addressed cache of distfiles, evicting the least recently used.
+
+    Attributes:
+        directory (str): Where the cache is stored
+        max_size (int): How many bytes of distfiles the cache can hold
+    """
+
+    def __init__(
+        self, directory: Optional[str] = None, max_size: Optional[int] = None
+    ) -> None:
+        """Sets where the cache is stored and how big it can get."""
+        self.directory = (
+            os.path.join(cache_dir(), "distfiles") if directory is None else directory
+        )
+        self.max_size = (
+            int(os.environ.get("SEAPORT_DISTFILE_CACHE_SIZE", DEFAULT_MAX_SIZE))
+            if max_size is None
+            else max_size
+        )
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(self.directory, "objects"), exist_ok=True)
+
+    def path(self, sha256: str) -> str:
+        """The location of a cached distfile.
+
+        Args:
+            sha256: The sha256 of the distfile
+
+        Returns:
+            str: Where the distfile is (or would be) stored
+        """
+        return os.path.join(self.directory, "objects", sha256)
+
+    def _load(self) -> Dict[str, Any]:
+        """Reads the index of urls, distfiles and counters."""
+        try:
+            with open(os.path.join(self.directory, "index.json")) as file:
+                index: Dict[str, Any] = json.load(file)
+                return index
+        except (OSError, ValueError):
+            return {"urls": {}, "objects": {}, "stats": dict.fromkeys(COUNTERS, 0)}
+
+    def _save(self, index: Dict[str, Any]) -> None:
+        """Atomically writes the index."""
+        tmp = os.path.join(self.directory, f"index.json.{os.getpid()}")
+        with open(tmp, "w") as file:
+            json.dump(index, file)
+        os.replace(tmp, os.path.join(self.directory, "index.json"))
+
+    def has(self, url: str) -> bool:
+        """Whether the distfile from a url (or part of it) is already in the cache.
+
+        Args:
+            url: Where the distfile is downloaded from
+
+        Returns:
+            bool: True if fetching the url might not need a full download
+        """
+        return self._entry(url) is not None or os.path.exists(self._part(url))
+
+    def _entry(self, url: str) -> Optional[Dict[str, Any]]:
+        """The index entry for a url, if its distfile is still cached."""
+        with self._lock:
+            entry: Optional[Dict[str, Any]] = self._load()["urls"].get(url)
+        if entry is not None and not os.path.exists(self.path(entry["sha256"])):
+            return None
+        return entry
+
+    def _part(self, url: str) -> str:
+        """Where a distfile is downloaded to before it's added to the cache."""
+        return os.path.join(
+            self.directory,
+            "objects",
+            f".{hashlib.sha256(url.encode('utf-8')).hexdigest()}.part",
+        )
+
+    def fetch(
+        self,
+        url: str,
+        algorithms: Sequence[str],
+        source: Optional[str] = None,
+        response: Optional[http.client.HTTPResponse] = None,
+    ) -> Tuple[str, Dict[str, str]]:
+        """Determines the checksums of a distfile, only downloading it if it's changed.
+
+        Args:
+            url: Where to download the distfile from
+            algorithms: The checksum types to compute
+            source: A mirror of url to download from instead. The distfile is still
+                cached under url.
+            response: An already open response from source (or url) to read from
+
+        Returns:
+            Tuple[str, Dict[str, str]]: Where the distfile is cached, and its checksums
+        """
+        entry = self._entry(url)
+
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        # sha256 is always required, since it's used to store the distfile
+        hashed = _with_sha256(algorithms)
+        part = self._part(url)
+        try:
+            sums, validators = download(
+                url if source is None else source,
+                part,
+                hashed,
+                headers,
+                response=response,
+            )
+        except urllib.error.HTTPError as error:
+            if error.code != 304 or entry is None:
+                raise
+        else:
+            os.replace(part, self.path(sums["sha256"]))
+            self._add(sums, url, validators["etag"], validators["last_modified"])
+            return self.path(sums["sha256"]), {name: sums[name] for name in algorithms}
+
+        # The distfile hasn't changed, so only hash it for any checksums not already known
+        sums = entry["sums"]
+        missing = [name for name in algorithms if name not in sums]
+        if missing:
+            with open(self.path(entry["sha256"]), "rb") as file:
+                sums.update(hash_stream(file, missing))
+
+        with self._lock:
+            index = self._load()
+            index["stats"]["hits"] += 1
+            if url in index["urls"]:
+                index["urls"][url]["sums"] = sums
+            if entry["sha256"] in index["objects"]:
+                index["objects"][entry["sha256"]]["used"] = time.time()
+            self._save(index)
+
+        return self.path(entry["sha256"]), {name: sums[name] for name in algorithms}
+
+    def _add(
+        self,
+        sums: Dict[str, str],
+        url: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+    ) -> None:
+        """Records a newly stored distfile, evicting others if the cache is too big."""
+        with self._lock:
+            index = self._load()
+            index["stats"]["misses"] += 1
+            index["objects"][sums["sha256"]] = {
+                "size": int(sums["size"]),
+                "used": time.time(),
+            }
+            index["urls"][url] = {
+                "sha256": sums["sha256"],
+                "etag": etag,
+                "last_modified": last_modified,
+                "sums": sums,
+            }
+            self._evict(index, sums["sha256"])
+            self._save(index)
+
+    def _evict(self, index: Dict[str, Any], keep: str) -> None:
+        """Removes the least recently used distfiles until the cache fits its size cap.
+
+        The distfile that's about to be used (keep) is never removed.
+        """
+        total = sum(item["size"] for item in index["objects"].values())
+        for sha256, item in sorted(
+            index["objects"].items(), key=lambda pair: pair[1]["used"]
+        ):
+            if total <= self.max_size:
+                break
+            if sha256 == keep:
+                continue
+            if os.path.exists(self.path(sha256)):
+                os.remove(self.path(sha256))
+            del index["objects"][sha256]
+            total -= item["size"]
+            index["stats"]["evictions"] += 1
+
+        index["urls"] = {
+            url: entry
+            for url, entry in index["urls"].items()
+            if entry["sha256"] in index["objects"]
+        }
+
+    def stats(self) -> Dict[str, int]:
+        """Determines the hit/miss/evict counters and the size of the cache.
+
+        Returns:
+            Dict[str, int]: The counters, number of distfiles and total bytes stored
+        """
+        with self._lock:
+            index = self._load()
+        return {
+            **{name: index["stats"].get(name, 0) for name in COUNTERS},
+            "distfiles": len(index["objects"]),
+            "bytes": sum(item["size"] for item in index["objects"].values()),
+        }
+
+    def clear(self) -> None:
+        """Removes every cached distfile and resets the counters."""
+        with self._lock:
+            index = self._load()
+            for sha256 in index["objects"]:
+                if os.path.exists(self.path(sha256)):
+                    os.remove(self.path(sha256))
+            self._save({"urls": {}, "objects": {}, "stats": dict.fromkeys(COUNTERS, 0)})
+
+
+@click.group()
+@beartype
+def cache() -> None:
+    """Manages the caches of downloaded distfiles and livecheck results."""
+
+
+@cache.command()
+@beartype
+def stats() -> None:
+    """Shows how often the distfile and livecheck caches were used."""
+    for name, value in DistfileCache().stats().items():
+        click.echo(f"{name}: {value}")
+    for name, value in LivecheckCache().stats().items():
+        click.echo(f"livecheck {name}: {value}")
+
+
+@cache.command()
+@beartype
+def clear() -> None:
+    """Removes every cached distfile and livecheck result."""
+    DistfileCache().clear()
+    LivecheckCache().clear()
+    click.secho("🧽 Cleared the distfile and livecheck caches", fg="cyan")
+
+
+@beartype
+def _with_sha256(algorithms: Sequence[str]) -> List[str]:
+    """Adds sha256 and size to the checksum types, since the cache relies on them."""
+    return list(algorithms) + [
+        name for name in ("sha256", "size") if name not in algorithms
+    ]
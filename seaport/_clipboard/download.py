@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Downloads distfiles, resuming and retrying when the connection drops.
+
+Partial downloads are kept in a ``.part`` file. When a download fails, it's resumed
+with an HTTP Range request after a jittered exponential backoff. If a previous
+run left a ``.part`` file behind, its contents are hashed once before resuming, so the
+checksums always cover the whole distfile.
+"""
+
+import http.client
+import json
+import os
+import random
+import time
+import urllib.error
+import urllib.request
+
+from beartype import beartype
+from beartype.typing import Dict, Optional, Sequence, Tuple
+
+from seaport._clipboard.portfile.checksum_engine import Hasher, copy_stream
+
+#: How many times a download is resumed before giving up.
+RETRIES = 5
+
+#: How many seconds each read (or connection attempt) can take.
+TIMEOUT = 30.0
+
+#: The base delay between attempts, in seconds (doubled on each attempt).
+BACKOFF = 0.5
+
+#: HTTP status codes that are worth retrying.
+RETRY_CODES = (408, 429, 500, 502, 503, 504)
+
+
+@beartype
+def download(
+    url: str,
+    part: str,
+    algorithms: Sequence[str],
+    headers: Optional[Dict[str, str]] = None,
+    retries: Optional[int] = None,
+    timeout: Optional[float] = None,
+    backoff: Optional[float] = None,
+    response: Optional[http.client.HTTPResponse] = None,
+) -> Tuple[Dict[str, str], Dict[str, Optional[str]]]:
+    """Downloads a file into part, resuming from where it left off if interrupted.
+
+    Args:
+        url: Where to download the file from
+        part: Where to download the file to. If it already exists, the download is
+            resumed from the end of it.
+        algorithms: The checksum types to compute
+        headers: Extra headers to send (e.g. for a conditional request). A 304 response
+            raises HTTPError without retrying.
+        retries: How many times to resume the download before giving up (default RETRIES)
+        timeout: How many seconds each read can take (default TIMEOUT)
+        backoff: The base delay between attempts, in seconds (default BACKOFF)
+        response: An already open response for url (e.g. from a mirror race) to read
+            from first, instead of making a new request
+
+    Returns:
+        Tuple[Dict[str, str], Dict[str, Optional[str]]]: The checksums of the file, and
+            its ETag and Last-Modified headers (under the keys etag and last_modified)
+    """
+    retries = RETRIES if retries is None else retries
+    timeout = TIMEOUT if timeout is None else timeout
+    backoff = BACKOFF if backoff is None else backoff
+
+    # The validators of the partial download, to check it hasn't changed upstream
+    sidecar = f"{part}.json"
+    validators: Dict[str, Optional[str]] = {"etag": None, "last_modified": None}
+    if os.path.exists(part) and os.path.exists(sidecar):
+        with open(sidecar) as file:
+            validators = json.load(file)
+    elif os.path.exists(part):
+        os.remove(part)
+
+    first = response
+    hasher = Hasher(algorithms)
+    try:
+        # Hash what's already been downloaded once, rather than downloading it again
+        if os.path.exists(part):
+            with open(part, "rb") as file:
+                copy_stream(file, hasher)
+            # The response would start from the beginning, so it's of no use
+            if first is not None:
+                first.close()
+                first = None
+
+        attempt = 0
+        while True:
+            request = urllib.request.Request(url, headers=dict(headers or {}))
+            if hasher.size:
+                request.add_header("Range", f"bytes={hasher.size}-")
+                # If the file has changed, the server sends all of it instead
+                validator = validators["etag"] or validators["last_modified"]
+                if validator:
+                    request.add_header("If-Range", validator)
+
+            try:
+                opened = (
+                    urllib.request.urlopen(request, timeout=timeout)
+                    if first is None
+                    else first
+                )
+                first = None
+                with opened as response:
+                    if hasher.size and response.status != 206:
+                        # The server can't (or won't) resume, so start again
+                        hasher.close()
+                        hasher = Hasher(algorithms)
+                        os.remove(part)
+                    if not hasher.size:
+                        validators = {
+                            "etag": response.headers.get("ETag"),
+                            "last_modified": response.headers.get("Last-Modified"),
+                        }
+                        with open(sidecar, "w") as file:
+                            json.dump(validators, file)
+
+                    with open(part, "ab") as out_file:
+                        copy_stream(response, hasher, out_file)
+
+                    # Catch responses that end early without an error
+                    total = _total_size(response)
+                    if total is not None and hasher.size != total:
+                        raise http.client.IncompleteRead(b"", total - hasher.size)
+                break
+            except urllib.error.HTTPError as error:
+                if error.code not in RETRY_CODES or attempt >= retries:
+                    raise
+            except (OSError, http.client.HTTPException):
+                if attempt >= retries:
+                    raise
+
+            attempt += 1
+            time.sleep(backoff * 2**attempt * random.uniform(0.5, 1.5))
+
+        sums = hasher.hexdigests()
+    finally:
+        hasher.close()
+
+    os.remove(sidecar)
+    return sums, validators
+
+
+@beartype
+def _total_size(response: http.client.HTTPResponse) -> Optional[int]:
+    """Determines the size of the whole file from a (possibly partial) response."""
+    if response.status == 206:
+        # Content-Range: bytes start-end/total
+        total = response.headers.get("Content-Range", "").rpartition("/")[2]
+    else:
+        total = response.headers.get("Content-Length", "")
+    return int(total) if total.isdigit() else None
@@ -28,12 +28,55 @@
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-"""Functions for formatting output."""
+"""Functions for running external commands and formatting their output."""
 
 import subprocess
+import time
 
 from beartype import beartype
-from beartype.typing import List
+from beartype.typing import TYPE_CHECKING, Any, List, Union
+
+from seaport._profile import record
+
+# subprocess.CompletedProcess is only subscriptable when type checking
+if TYPE_CHECKING:  # pragma: no cover
+    CompletedProcess = subprocess.CompletedProcess[Any]
+else:  # pragma: no cover
+    CompletedProcess = subprocess.CompletedProcess
+
+
+@beartype
+def run_subprocess(
+    args: Union[str, List[str]], check: bool = False, **kwargs: Any
+) -> CompletedProcess:
+    """Runs an external command, recording how long it took (see seaport._profile).
+
+    Every external command should be run through this (or format_subprocess), so that
+    ``seaport --profile`` accounts for it.
+
+    Examples:
+        >>> import subprocess
+        >>> from seaport._clipboard.format import run_subprocess
+        >>> run_subprocess(["echo", "hello"], stdout=subprocess.PIPE).stdout
+        b'hello\\n'
+
+    Args:
+        args: The command and its arguments, as with subprocess.run
+        check: Whether to raise CalledProcessError if the command fails
+        kwargs: Passed on to subprocess.run
+
+    Raises:
+        subprocess.CalledProcessError: If check is set and the command fails
+
+    Returns:
+        CompletedProcess: The result of the command
+    """
+    start = time.perf_counter()
+    result = subprocess.run(args, **kwargs)
+    record(args, time.perf_counter() - start, result.returncode, result.stdout)
+    if check:
+        result.check_returncode()
+    return result
 
 
 @beartype
@@ -52,4 +95,5 @@ def format_subprocess(args: List[str]) -> str:
         str: The formatted output of the result
 
     """
-    return subprocess.check_output(args).decode("utf-8").strip()
+    output: bytes = run_subprocess(args, check=True, stdout=subprocess.PIPE).stdout
+    return output.decode("utf-8").strip()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Races the mirrors of a distfile, so it's downloaded from whichever is fastest.
+
+Every candidate url is requested at once. The first to respond with what looks like a
+distfile wins, and its response is streamed straight into the download. The other
+responses are closed as they arrive, so nothing more is read from the slower mirrors.
+"""
+
+import http.client
+import queue
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from beartype import beartype
+from beartype.typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+# Queue is only subscriptable when type checking
+if TYPE_CHECKING:  # pragma: no cover
+    Responses = queue.Queue[Tuple[str, Optional[http.client.HTTPResponse]]]
+else:  # pragma: no cover
+    Responses = queue.Queue
+
+#: How many seconds a mirror has to respond before it's given up on.
+PROBE_TIMEOUT = 10.0
+
+
+@beartype
+def candidates(url: str, mirrors: Sequence[str]) -> List[str]:
+    """Combines a url with its mirrors, removing duplicates but keeping the order.
+
+    Examples:
+        >>> from seaport._clipboard.mirrors import candidates
+        >>> candidates("https://a/x.tar.gz", ["https://b/x.tar.gz", "https://a/x.tar.gz"])
+        ['https://a/x.tar.gz', 'https://b/x.tar.gz']
+
+    Args:
+        url: The main url of the distfile
+        mirrors: Other urls the distfile can be downloaded from
+
+    Returns:
+        List[str]: Every url to try
+    """
+    return list(dict.fromkeys([url, *mirrors]))
+
+
+@beartype
+def is_distfile(response: http.client.HTTPResponse) -> bool:
+    """Whether a successful response could be a distfile.
+
+    Some mirrors answer a missing file with a 200 "not found" page, or redirect to a
+    landing page. Those are web pages (or empty), which a distfile never is.
+
+    Args:
+        response: The response of a mirror
+
+    Returns:
+        bool: False if the response is a web page or empty
+    """
+    content_type = response.headers.get("Content-Type", "").lower()
+    if content_type.startswith(("text/html", "application/xhtml")):
+        return False
+    return response.headers.get("Content-Length") != "0"
+
+
+@beartype
+def race(
+    urls: Sequence[str], timeout: Optional[float] = None
+) -> Tuple[str, http.client.HTTPResponse, Dict[str, Optional[float]]]:
+    """Requests every url at once, returning the first response that's a distfile.
+
+    Args:
+        urls: Where the distfile can be downloaded from
+        timeout: How many seconds each mirror has to respond (default PROBE_TIMEOUT)
+
+    Returns:
+        Tuple[str, http.client.HTTPResponse, Dict[str, Optional[float]]]: The winning
+            url, its (unread) response, and how many seconds each mirror took to respond.
+            Mirrors that failed (or haven't responded yet) have a time of None, and the
+            times of the slower mirrors are filled in as they respond.
+    """
+    timeout = PROBE_TIMEOUT if timeout is None else timeout
+    timings: Dict[str, Optional[float]] = dict.fromkeys(urls)
+    responses: Responses = queue.Queue()
+    start = time.perf_counter()
+
+    def probe(url: str) -> None:
+        try:
+            response = urllib.request.urlopen(url, timeout=timeout)
+        except (OSError, http.client.HTTPException):
+            responses.put((url, None))
+            return
+        timings[url] = time.perf_counter() - start
+        if not is_distfile(response):
+            response.close()
+            responses.put((url, None))
+            return
+        responses.put((url, response))
+
+    for url in timings:
+        threading.Thread(target=probe, args=(url,), daemon=True).start()
+
+    for remaining in range(len(timings), 0, -1):
+        url, response = responses.get()
+        if response is not None:
+            break
+    else:
+        raise urllib.error.URLError("None of the mirrors could be reached")
+
+    # The slower mirrors are closed in the background, so the download can start now
+    threading.Thread(
+        target=_close_responses, args=(responses, remaining - 1), daemon=True
+    ).start()
+    return url, response, timings
+
+
+@beartype
+def _close_responses(responses: Responses, count: int) -> None:
+    """Closes the responses of the mirrors that lost the race."""
+    for _ in range(count):
+        _, response = responses.get()
+        if response is not None:
+            response.close()
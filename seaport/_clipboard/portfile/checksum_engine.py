@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Computes whichever checksums a portfile uses.
+
+Each checksum type is hashed in its own thread, since hashlib releases the GIL
+while hashing large chunks.
+"""
+
+import hashlib
+import io
+import os
+import re
+import sys
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from beartype import beartype
+from beartype.typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+# Don't count code coverage since different python versions
+# won't run different parts of code
+if sys.version_info >= (3, 8):  # pragma: no cover
+    from beartype.typing import Final
+else:  # pragma: no cover
+    from typing_extensions import Final
+
+#: The checksum types that MacPorts supports (apart from size) and how to compute them.
+ALGORITHMS: Final[Dict[str, Callable[[], Any]]] = {
+    "md5": hashlib.md5,
+    "sha1": hashlib.sha1,
+    "rmd160": lambda: hashlib.new("ripemd160"),
+    "sha256": hashlib.sha256,
+    "sha512": hashlib.sha512,
+    "blake2b": hashlib.blake2b,
+    "blake2s": hashlib.blake2s,
+}
+
+#: The checksums used by most portfiles.
+DEFAULT_ALGORITHMS: Final = ("rmd160", "sha256", "size")
+
+#: How many bytes are read (and hashed) at a time.
+CHUNK_SIZE: Final = 1 << 20
+
+#: Chunks smaller than this are hashed in the main thread, since it's quicker.
+THREAD_THRESHOLD: Final = 1 << 16
+
+
+@beartype
+def parse_checksums(contents: str) -> Dict[str, str]:
+    """Finds the checksums of the first distfile in a portfile's checksums block.
+
+    Examples:
+        >>> from seaport._clipboard.portfile.checksum_engine import parse_checksums
+        >>> parse_checksums(
+        ...     "version 1.0\\n"
+        ...     "checksums           rmd160  abc \\\\\\n"
+        ...     "                    sha256  def \\\\\\n"
+        ...     "                    size    123\\n"
+        ... )
+        {'rmd160': 'abc', 'sha256': 'def', 'size': '123'}
+
+    Args:
+        contents: The contents of the portfile
+
+    Returns:
+        Dict[str, str]: The checksum types (in the order the portfile uses) and their values.
+            This is empty if there's no checksums block.
+    """
+    match = re.search(r"^[ \t]*checksums[ \t]+((?:.*\\\n)*.*)$", contents, re.M)
+    if match is None:
+        return {}
+
+    tokens = match.group(1).replace("\\\n", " ").split()
+    sums: Dict[str, str] = {}
+    i = 0
+    while i < len(tokens) - 1:
+        if tokens[i] in ALGORITHMS or tokens[i] == "size":
+            sums[tokens[i]] = tokens[i + 1]
+            i += 2
+        elif sums:
+            # The checksums of the next distfile begin with its filename
+            break
+        else:
+            # Skip the filename of the first distfile
+            i += 1
+    return sums
+
+
+@beartype
+class Hasher:
+    """Computes several checksums of data that arrives in chunks.
+
+    Each checksum type can be hashed in its own thread. In that case, :meth:`update`
+    returns as soon as hashing has started, so the next chunk can be read meanwhile
+    (into a different buffer, since the chunk can't change until it's been hashed).
+
+    Examples:
+        >>> from seaport._clipboard.portfile.checksum_engine import Hasher
+        >>> with Hasher(["sha1", "size"]) as hasher:
+        ...     hasher.update(b"hello ")
+        ...     hasher.update(b"there")
+        ...     hasher.hexdigests()
+        {'sha1': '6e71b3cac15d32fe2d36c270887df9479c25c640', 'size': '11'}
+
+    Attributes:
+        algorithms (Sequence[str]): The checksum types being computed
+        size (int): How many bytes have been hashed so far
+    """
+
+    def __init__(
+        self,
+        algorithms: Sequence[str] = DEFAULT_ALGORITHMS,
+        threaded: Optional[bool] = None,
+    ) -> None:
+        """Sets the checksum types to compute.
+
+        Args:
+            algorithms: The checksum types to compute (see ALGORITHMS), as well as size
+            threaded: Whether to hash each checksum type in its own thread. By default,
+                threads are used if there's more than one checksum type and more than one CPU.
+        """
+        unknown = [
+            name for name in algorithms if name not in ALGORITHMS and name != "size"
+        ]
+        if unknown:
+            raise ValueError(f"Unsupported checksum types: {', '.join(unknown)}")
+
+        self.algorithms = algorithms
+        self.size = 0
+        self._hashes = [ALGORITHMS[name]() for name in algorithms if name != "size"]
+        if threaded is None:
+            threaded = len(self._hashes) > 1 and (os.cpu_count() or 1) > 1
+        self._pool = (
+            ThreadPoolExecutor(max_workers=len(self._hashes)) if threaded else None
+        )
+        self._pending: List["Future[None]"] = []
+
+    def __enter__(self) -> "Hasher":
+        """Allows the hasher to be used as a context manager."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Stops the threads when leaving the with block."""
+        self.close()
+
+    def update(self, chunk: Union[bytes, memoryview]) -> None:
+        """Starts hashing the next chunk, once the previous chunk has been hashed.
+
+        Args:
+            chunk: The next chunk of data
+        """
+        self.wait()
+        if self._pool is not None and len(chunk) >= THREAD_THRESHOLD:
+            self._pending = [
+                self._pool.submit(item.update, chunk) for item in self._hashes
+            ]
+        else:
+            for item in self._hashes:
+                item.update(chunk)
+        self.size += len(chunk)
+
+    def wait(self) -> None:
+        """Waits until the last chunk has been hashed."""
+        for future in self._pending:
+            future.result()
+        self._pending = []
+
+    def hexdigests(self) -> Dict[str, str]:
+        """Determines the checksums of everything hashed so far.
+
+        Returns:
+            Dict[str, str]: The checksum types and their values, in the order requested
+        """
+        self.wait()
+        digests = iter(item.hexdigest() for item in self._hashes)
+        return {
+            name: str(self.size) if name == "size" else next(digests)
+            for name in self.algorithms
+        }
+
+    def close(self) -> None:
+        """Stops the threads."""
+        self.wait()
+        if self._pool is not None:
+            self._pool.shutdown()
+
+
+@beartype
+def copy_stream(
+    stream: Any, hasher: Hasher, out_file: Optional[io.BufferedIOBase] = None
+) -> None:
+    """Feeds a stream to a hasher, optionally copying it to a file.
+
+    The stream is read into two alternating buffers, so the next chunk is read while the
+    previous one is hashed, and memory use doesn't depend on the size of the stream.
+    If reading fails part way through, everything before the failed read has been both
+    hashed and written.
+
+    Args:
+        stream: What to hash (e.g. the response of urlopen)
+        hasher: Where to feed each chunk
+        out_file: Where to copy the stream to, if anywhere
+    """
+    buffers = [bytearray(CHUNK_SIZE), bytearray(CHUNK_SIZE)]
+    views = [memoryview(buffer) for buffer in buffers]
+    current = 0
+
+    try:
+        while True:
+            # The other buffer may still be being hashed
+            read = stream.readinto(buffers[current])
+            if not read:
+                break
+            chunk = views[current][:read]
+            hasher.update(chunk)
+            if out_file is not None:
+                out_file.write(chunk)
+            current ^= 1
+    finally:
+        hasher.wait()
+
+
+@beartype
+def hash_stream(
+    stream: io.BufferedIOBase,
+    algorithms: Sequence[str] = DEFAULT_ALGORITHMS,
+    out_file: Optional[io.BufferedIOBase] = None,
+    threaded: Optional[bool] = None,
+) -> Dict[str, str]:
+    """Computes the checksums of a stream in a single pass, optionally copying it to a file.
+
+    Examples:
+        >>> import io
+        >>> from seaport._clipboard.portfile.checksum_engine import hash_stream
+        >>> hash_stream(io.BytesIO(b"hello there"), ["sha1", "size"])
+        {'sha1': '6e71b3cac15d32fe2d36c270887df9479c25c640', 'size': '11'}
+
+    Args:
+        stream: What to hash (e.g. the response of urlopen)
+        algorithms: The checksum types to compute (see ALGORITHMS), as well as size
+        out_file: Where to copy the stream to, if anywhere
+        threaded: Whether to hash each checksum type in its own thread (see Hasher)
+
+    Returns:
+        Dict[str, str]: The checksum types and their values, in the order requested
+    """
+    with Hasher(algorithms, threaded) as hasher:
+        copy_stream(stream, hasher, out_file)
+        return hasher.hexdigests()
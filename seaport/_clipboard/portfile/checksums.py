@@ -30,22 +30,23 @@
 
 """Functions related to determining the current and new checksums."""
 
-import hashlib
-import shutil
-import subprocess
+import http.client
+import os
 import sys
-import tempfile
-import urllib.request
-from pathlib import Path
 from typing import Optional
 
 import click
 from beartype import beartype
-from beartype.typing import Tuple
+from beartype.typing import Dict, Sequence
 from beartype.vale import Is
 
 from seaport._clipboard.checks import user_path
-from seaport._clipboard.portfile.portfile_numbers import undo_revision
+from seaport._clipboard.distfile_cache import DistfileCache
+from seaport._clipboard.format import run_subprocess
+from seaport._clipboard.mirrors import candidates, race
+from seaport._clipboard.portfile.checksum_engine import DEFAULT_ALGORITHMS
+from seaport._clipboard.portfile.portfile_numbers import portfile_edits
+from seaport._tcl import apply_edits
 from seaport.portfile import Port
 
 # Don't count code coverage since different python versions
@@ -59,19 +60,24 @@ else:  # pragma: no cover
 def new_checksums(
     website: Annotated[str, Is[lambda text: text[:4] == "http"]],
     distfile: Optional[Port] = None,
-) -> Tuple[str, str, str]:
+    algorithms: Sequence[str] = DEFAULT_ALGORITHMS,
+    mirrors: Sequence[str] = (),
+) -> Dict[str, str]:
     """Generate checksums of file downloaded from website.
 
     Args:
         website: Where to download the new file from
-        distfile: Whether to move the distfile to the MacPorts distfile directory. If so,
+        distfile: Whether to link the distfile into the MacPorts distfile directory. If so,
             specifies the port object.
+        algorithms: The checksum types to generate (default rmd160, sha256 and size)
+        mirrors: Other urls the file can be downloaded from. If the file isn't cached,
+            they're raced against website, and the fastest to respond is downloaded from.
 
     Examples:
         >>> from seaport._clipboard.portfile.checksums import new_checksums
         >>> new_checksums("https://files.pythonhosted.org/packages/source/r/rich/rich-9.10.0.tar.gz")
         🔻 Downloading from https://files.pythonhosted.org/packages/source/r/rich/rich-9.10.0.tar.gz
-        ('e0f2db62a52536ee32f6f584a47536465872cae2b94887cf1f080fb9eaa13eb2', '3f8be5bb8220538ed2f7953a25d829584fa3b379', '172290')
+        {'rmd160': '3f8be5bb8220538ed2f7953a25d829584fa3b379', 'sha256': 'e0f2db62a52536ee32f6f584a47536465872cae2b94887cf1f080fb9eaa13eb2', 'size': '172290'}
         >>> try:
         ...     new_checksums("I_don't_exist_and_so_will_fail")
         ... except SystemExit:
@@ -80,44 +86,43 @@ def new_checksums(
         Couldn't determine the new url. Modify the url above and use the --url flag to set it manually
         >>> new_checksums("https://files.pythonhosted.org/packages/source/r/rich/rich-9.10.0.tar.gz", Port("py-rich"))
         🔻 Downloading from https://files.pythonhosted.org/packages/source/r/rich/rich-9.10.0.tar.gz
-        🚚 Sudo required - Moving distfile to installation directory
-        ('e0f2db62a52536ee32f6f584a47536465872cae2b94887cf1f080fb9eaa13eb2', '3f8be5bb8220538ed2f7953a25d829584fa3b379', '172290')
+        🚚 Sudo required - Linking distfile to installation directory
+        {'rmd160': '3f8be5bb8220538ed2f7953a25d829584fa3b379', 'sha256': 'e0f2db62a52536ee32f6f584a47536465872cae2b94887cf1f080fb9eaa13eb2', 'size': '172290'}
         >>>
         >>> new_checksums("https://files.pythonhosted.org/packages/source/c/commitizen/commitizen-2.42.0.tar.gz", Port("commitizen"))
         🔻 Downloading from https://files.pythonhosted.org/packages/source/c/commitizen/commitizen-2.42.0.tar.gz
-        🚚 Sudo required - Moving distfile to installation directory
-        ('c4c944408f3d55ca22b1c136e22217c167123c54f46730eb27a1c6503d705c69', '70bbe044e6a0a804e0faf11f48307316038cc910', '37609')
+        🚚 Sudo required - Linking distfile to installation directory
+        {'rmd160': '70bbe044e6a0a804e0faf11f48307316038cc910', 'sha256': 'c4c944408f3d55ca22b1c136e22217c167123c54f46730eb27a1c6503d705c69', 'size': '37609'}
 
     Returns:
-        Tuple[str, str, str]: A tuple of strings representing the new checksums in the order sha256,
-            rmd160 and size.
+        Dict[str, str]: The new checksums, in the same order as algorithms
     """
-    download_dir = tempfile.TemporaryDirectory()
     filename = website[website.rfind("/") + 1 :]
-    download_location = f"{download_dir.name}/{filename}"
 
-    # Download the file from `url` and save it locally under `file_name`:
-    # Originally urllib.request.urlretrieve(website, download_location), but this is depreciated
-    # Credit https://stackoverflow.com/a/7244263
+    # The distfile is only downloaded if it isn't cached or has changed upstream
+    # Each chunk is hashed as it arrives, so the distfile is never held in memory
+    # Interrupted downloads are retried, resuming from where they left off
     click.secho(f"🔻 Downloading from {website}", fg="cyan")
+    cache = DistfileCache()
+    urls = candidates(website, mirrors)
+    timings: Dict[str, Optional[float]] = {}
     try:
-        with urllib.request.urlopen(website) as response, open(
-            download_location, "wb"
-        ) as out_file:
-            shutil.copyfileobj(response, out_file)
-    except (urllib.error.HTTPError, urllib.error.URLError, ValueError):
+        if len(urls) > 1 and not cache.has(website):
+            source, response, timings = race(urls)
+            click.secho(f"🏁 Fastest mirror is {source}", fg="cyan")
+            cached, sums = cache.fetch(website, algorithms, source, response)
+        else:
+            cached, sums = cache.fetch(website, algorithms)
+    except (OSError, http.client.HTTPException, ValueError):
         click.secho(
             "Couldn't determine the new url. Modify the url above and use the --url flag to set it manually",
             fg="red",
         )
         sys.exit(1)
 
-    size = str(Path(download_location).stat().st_size)
-
-    with open(download_location, "rb") as file:
-        data = file.read()
-        sha256 = hashlib.sha256(data).hexdigest()
-        rmd160 = hashlib.new("ripemd160", data).hexdigest()
+    # The slower mirrors have had the whole download to respond
+    for url, seconds in timings.items():
+        click.echo(f"{url}: {'no response' if seconds is None else f'{seconds:.2f}s'}")
 
     # TODO: Maybe find a way of refactoring this using Port (especially the checksum method)
     # Maybe move logic to Port class.
@@ -128,60 +133,90 @@ def new_checksums(
             if subports:
                 distfile_dir = f"{user_path(True).split('bin')[0]}var/macports/distfiles/{subports[-1]}"
             else:
-                # If moving the file doesn't work, just don't bother moving.
-                download_dir.cleanup()
-                return sha256, rmd160, size
+                # If linking the file doesn't work, just don't bother linking.
+                return sums
         else:
             distfile_dir = f"{user_path(True).split('bin')[0]}var/macports/distfiles/{distfile.name}"
 
-        # TODO: Maybe use user_path for mv
-        click.secho(
-            f"🚚 Sudo required - Moving distfile to installation directory", fg="cyan"
-        )
-        # -p should not return warning if directory exists
-        subprocess.run([f"{user_path()}/sudo", "/bin/mkdir", "-p", distfile_dir])
-        subprocess.run(
-            [f"{user_path()}/sudo", "/bin/mv", download_location, distfile_dir]
-        )
+        link_distfile(cached, f"{distfile_dir}/{filename}")
+
+    return sums
 
-    download_dir.cleanup()
 
-    return sha256, rmd160, size
+@beartype
+def link_distfile(cached: str, destination: str) -> None:
+    """Hardlinks a cached distfile into the MacPorts distfile directory.
+
+    The distfile is copied instead if it's on a different filesystem to the cache.
+    Sudo is only used if the distfile directory isn't writable (or doesn't exist yet).
+
+    Args:
+        cached: Where the distfile is cached
+        destination: Where MacPorts expects the distfile to be
+    """
+    distfile_dir = os.path.dirname(destination)
+    sudo = [] if os.access(distfile_dir, os.W_OK) else [f"{user_path()}/sudo"]
+    click.secho(
+        f"🚚 {'Sudo required - ' if sudo else ''}Linking distfile to installation directory",
+        fg="cyan",
+    )
+    # -p should not return warning if directory exists
+    run_subprocess(sudo + ["/bin/mkdir", "-p", distfile_dir])
+    if run_subprocess(sudo + ["/bin/ln", "-f", cached, destination]).returncode:
+        run_subprocess(sudo + ["/bin/cp", cached, destination])
 
 
 @beartype
 def replace_checksums(
     file_contents: str,
-    old_sums: Tuple[str, str, str, str],
-    new_sums: Tuple[str, str, str, str],
+    old_sums: Dict[str, str],
+    new_sums: Dict[str, str],
+    quiet: bool = False,
+    subport: Optional[str] = None,
 ) -> str:
-    """Replaces the old checksums with the new ones.
+    """Replaces the old checksums (and version) with the new ones.
+
+    Only the words of the portfile that hold them are changed, so the rest of the
+    portfile stays exactly as it was.
 
     Args:
         file_contents: The old contents of the file
-        old_sums: The old checksums that are in file_contents
-        new_sums: The new checksums that will replace the old ones
+        old_sums: The old checksums that are in file_contents, as well as the old version
+            under the key "version"
+        new_sums: The new checksums that will replace the old ones, as well as the new version
+        quiet: Whether to change the revision number without any output. If so, ValueError
+            is raised rather than exiting if the portfile can't be parsed.
+        subport: The subport being updated (by default, the main port)
 
     Examples:
         >>> from seaport._clipboard.portfile.checksums import replace_checksums
         >>> replace_checksums(
-        ... "replace this oldrmd, oldsha, oldsize and oldversion with new ones please",
-        ... ("oldrmd", "oldsha", "oldsize", "oldversion"),
-        ... ("newrmd", "newsha", "newsize", "newversion"),
+        ... "version oldversion\\nchecksums rmd160 oldrmd sha256 oldsha size oldsize\\n",
+        ... {"rmd160": "oldrmd", "sha256": "oldsha", "size": "oldsize", "version": "oldversion"},
+        ... {"rmd160": "newrmd", "sha256": "newsha", "size": "newsize", "version": "newversion"},
         ... )
         ⏪️ Changing revision numbers
         No changes necessary
-        'replace this newrmd, newsha, newsize and newversion with new ones please'
+        'version newversion\\nchecksums rmd160 newrmd sha256 newsha size newsize\\n'
 
     Returns:
         A string representing the portfile contents with the new checksums
     """
-    # Bump revision numbers to 0
-    new_contents: str = undo_revision(file_contents)
+    try:
+        edits = portfile_edits(file_contents, old_sums, new_sums, subport)
+    except ValueError as error:
+        if quiet:
+            raise
+        click.secho(str(error), fg="red")
+        sys.exit(1)
 
-    # Replace first instances only
-    # Iterate over Checksums and version number
-    for i in range(4):
-        new_contents = new_contents.replace(old_sums[i], new_sums[i], 1)
+    if not quiet:
+        # Bump revision numbers to 0
+        click.secho("⏪️ Changing revision numbers", fg="cyan")
+        click.echo(
+            "Revision number changed" if edits["revision"] else "No changes necessary"
+        )
 
-    return new_contents
+    return apply_edits(
+        file_contents, [edit for group in edits.values() for edit in group]
+    )
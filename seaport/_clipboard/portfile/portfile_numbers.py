@@ -30,22 +30,35 @@
 
 """Functions related to bumping revision and version numbers of a portfile."""
 
-import re
 import sys
-from typing import Optional
 
 import click
 from beartype import beartype
+from beartype.typing import Dict, List, Optional
 
+from seaport._tcl import Edit, Word, apply_edits, blocks
 from seaport.portfile import Port
 
+#: Versions containing any of these need confirming for ports that aren't -devel.
+DEVEL_VERSIONS = ("alpha", "beta", "rc", "devel", "dev", "unstable")
+
+#: The position of the version in each portgroup's setup command (1 for version itself).
+SETUP_VERSIONS = {
+    "github.setup": 3,
+    "gitlab.setup": 3,
+    "bitbucket.setup": 3,
+    "perl5.setup": 2,
+    "ruby.setup": 2,
+    "hackage.setup": 2,
+}
+
 
 @beartype
 def undo_revision(text: str) -> str:
     """Make revision numbers 0.
 
-    Note that this supports a single revision number or multiple revision numbers that are 0.
-    If there are multiple revision numbers, and one of them is not 0, it raises SystemExit 1
+    Only the revision numbers of the main port (and any subports that share its version)
+    are changed. If the portfile can't be parsed, it raises SystemExit 1
 
     Args:
         text: The text of the portfile
@@ -57,11 +70,11 @@ def undo_revision(text: str) -> str:
         No changes necessary
         'No revision numbers here'
         >>> try:
-        ...     undo_revision("revision 1  revision 1")
+        ...     undo_revision("subport foo {\\n    revision 1\\n")
         ... except SystemExit:
         ...     pass
         ⏪️ Changing revision numbers
-        Multiple revision numbers found. Unsure which to reduce to 0
+        Unmatched { at position 12
         >>> undo_revision("revision 1")
         ⏪️ Changing revision numbers
         Revision number changed
@@ -74,44 +87,223 @@ def undo_revision(text: str) -> str:
     """
     click.secho("⏪️ Changing revision numbers", fg="cyan")
 
-    # Counts no. of revision numbers greater than 0
-    # Assumes revision number doesn't exceed 9
-    need_changed = len(re.findall(r"revision\s*[1-9]", text))
-    total = len(re.findall(r"revision\s*", text))
-
-    # If there are no revisions greater than 1, do nothing
-    if need_changed == 0:
-        click.echo("No changes necessary")
-        return text
-    # If there are multiple revision numbers, we don't know which one to change
-    # If all the revision numbers are 0, this is accounted for in the last if statement
-    if total > 1:
-        click.secho(
-            "Multiple revision numbers found. Unsure which to reduce to 0", fg="red"
-        )
+    try:
+        new_text = reset_revision(text)
+    except ValueError as error:
+        click.secho(str(error), fg="red")
         sys.exit(1)
 
-    # Implies need_changed == 1
+    click.echo(
+        "No changes necessary" if new_text == text else "Revision number changed"
+    )
+    return new_text
+
+
+@beartype
+def reset_revision(text: str, subport: Optional[str] = None) -> str:
+    """Make revision numbers 0, without any output.
+
+    Examples:
+        >>> from seaport._clipboard.portfile.portfile_numbers import reset_revision
+        >>> reset_revision("revision 2\\nsubport foo {\\n    version 3\\n    revision 1\\n}")
+        'revision 0\\nsubport foo {\\n    version 3\\n    revision 1\\n}'
+
+    Args:
+        text: The text of the portfile
+        subport: The subport whose revision numbers are changed (by default, the main port)
+
+    Raises:
+        ValueError: If the portfile can't be parsed
+
+    Returns:
+        str: The text with version numbers decremented to 0
+    """
+    return apply_edits(text, portfile_edits(text, {}, {}, subport)["revision"])
 
-    # Takes the original revision as a string
-    # We know original_revision will not be of type none (hence mypy ignore)
-    # This is since need_changed is equal to 1
-    original_revision = re.search(r"revision\s*[1-9]", text).group(0)  # type: ignore
-    # Replaces the number with 0
-    new_revision = original_revision[:-1] + "0"
-    click.echo("Revision number changed")
-    return text.replace(original_revision, new_revision)
+
+@beartype
+def portfile_edits(
+    text: str,
+    old: Dict[str, str],
+    new: Dict[str, str],
+    subport: Optional[str] = None,
+) -> Dict[str, List[Edit]]:
+    """Finds the edits needed to change the version and checksums of a port.
+
+    The portfile is split into commands once, and only the commands of the chosen block
+    are edited. A subport's version and checksums come from the main port unless its
+    block sets them. Changing the version also resets the revision numbers of every
+    block that uses it.
+
+    Examples:
+        >>> from seaport._clipboard.portfile.portfile_numbers import portfile_edits
+        >>> portfile_edits(
+        ...     "version 1.0\\nrevision 1\\nchecksums sha256 abc size 1\\n",
+        ...     {"version": "1.0", "sha256": "abc", "size": "1"},
+        ...     {"version": "1.1", "sha256": "def", "size": "2"},
+        ... )
+        {'version': [Edit(start=8, end=11, replacement='1.1')], 'revision': [Edit(start=21, end=22, replacement='0')], 'checksums': [Edit(start=40, end=43, replacement='def'), Edit(start=49, end=50, replacement='2')]}
+
+    Args:
+        text: The text of the portfile
+        old: The current checksums, as well as the current version under the key "version"
+        new: The checksums and version that replace them
+        subport: The subport to edit (by default, the main port)
+
+    Raises:
+        ValueError: If the portfile can't be parsed
+
+    Returns:
+        Dict[str, List[Edit]]: The edits of the version, revision and checksums
+    """
+    scopes: Dict[Optional[str], List[List[Word]]] = {}
+    for name, command in blocks(text):
+        scopes.setdefault(name, []).append(command)
+    chosen = subport if subport in scopes else None
+
+    version_scope = (
+        chosen if any(_sets_version(command) for command in scopes[chosen]) else None
+    )
+    checksums_scope = (
+        chosen
+        if any(command[0].value == "checksums" for command in scopes[chosen])
+        else None
+    )
+    edits: Dict[str, List[Edit]] = {"version": [], "revision": [], "checksums": []}
+
+    if "version" in old and "version" in new:
+        commands = scopes.get(version_scope, [])
+        # The version is usually set by version or a portgroup's setup command,
+        # but might be set through a variable
+        for command in sorted(commands, key=lambda words: not _sets_version(words)):
+            if edits["version"] and not _sets_version(command):
+                break
+            edits["version"] += [
+                word.replace(new["version"])
+                for word in command[1:]
+                if word.value == old["version"]
+            ]
+
+    # Resets the revision of every block that uses the version
+    for name, commands in scopes.items():
+        if name == version_scope or (
+            version_scope is None
+            and not any(_sets_version(command) for command in commands)
+        ):
+            edits["revision"] += [
+                command[1].replace("0")
+                for command in commands
+                if command[0].value == "revision"
+                and len(command) > 1
+                and command[1].value != "0"
+            ]
+
+    for command in scopes.get(checksums_scope, []):
+        if command[0].value != "checksums":
+            continue
+        for previous, word in zip(command[1:], command[2:]):
+            key = previous.value
+            if key in new and key in old and word.value == old[key]:
+                edits["checksums"].append(word.replace(new[key]))
+
+    return edits
+
+
+@beartype
+def current_version(text: str) -> Optional[str]:
+    """Finds the version the main port sets, as it's written in the portfile.
+
+    Examples:
+        >>> from seaport._clipboard.portfile.portfile_numbers import current_version
+        >>> current_version("PortGroup github 1.0\\ngithub.setup orf gping 1.16.1 gping-v")
+        '1.16.1'
+        >>> current_version("version ${major}.1") is None
+        True
+
+    Args:
+        text: The text of the portfile
+
+    Raises:
+        ValueError: If the portfile can't be parsed
+
+    Returns:
+        Optional[str]: The version, or None if it isn't set literally (e.g. it uses a
+            variable)
+    """
+    for subport, command in blocks(text):
+        if subport is not None or not _sets_version(command):
+            continue
+        position = SETUP_VERSIONS.get(command[0].value, 1)
+        if len(command) > position and "$" not in command[position].value:
+            return command[position].value
+    return None
+
+
+@beartype
+def revbump_edits(text: str, subport: Optional[str] = None) -> List[Edit]:
+    """Finds the edits needed to increase the revision of a port by one.
+
+    If the block doesn't set a revision, one is added after its version.
+
+    Examples:
+        >>> from seaport._clipboard.portfile.portfile_numbers import revbump_edits
+        >>> revbump_edits("version     1.0\\nrevision    2\\n")
+        [Edit(start=28, end=29, replacement='3')]
+        >>> revbump_edits("version     1.0\\n")
+        [Edit(start=15, end=15, replacement='\\nrevision    1')]
+
+    Args:
+        text: The text of the portfile
+        subport: The subport to revbump (by default, the main port)
+
+    Raises:
+        ValueError: If the portfile can't be parsed, or the revision isn't a number
+
+    Returns:
+        List[Edit]: The edits of the revision
+    """
+    scopes: Dict[Optional[str], List[List[Word]]] = {}
+    for name, command in blocks(text):
+        scopes.setdefault(name, []).append(command)
+    commands = scopes.get(subport if subport in scopes else None, [])
+
+    revisions = [
+        command[1]
+        for command in commands
+        if command[0].value == "revision" and len(command) > 1
+    ]
+    if revisions:
+        for word in revisions:
+            if not word.value.isdigit():
+                raise ValueError(f"Unsure how to revbump revision {word.value}")
+        return [word.replace(str(int(word.value) + 1)) for word in revisions]
+
+    for command in commands:
+        if _sets_version(command):
+            # Lines the number up with the version's arguments
+            padding = " " * max(command[1].start - command[0].start - 8, 1)
+            return [Edit(command[-1].end, command[-1].end, f"\nrevision{padding}1")]
+    raise ValueError("No version found to add a revision after")
+
+
+@beartype
+def _sets_version(command: List[Word]) -> bool:
+    """Whether the command sets the version (e.g. version or github.setup)."""
+    return command[0].value == "version" or command[0].value.endswith(".setup")
 
 
 # TODO: The doctest isn't reproducible, since the version number might change.
 @beartype
-def new_version(port: Port, stated: Optional[str], new: bool = False) -> str:
+def new_version(
+    port: Port, stated: Optional[str], new: bool = False, refresh: bool = False
+) -> str:
     """Determines livecheck version, and sees whether already up-to-date.
 
     Args:
         port: The port class
         stated: The user's new version via --bump
         new: If the port is new or not
+        refresh: Whether to ignore the livecheck cache
 
     Examples:
         >>> from seaport.portfile import Port
@@ -137,7 +329,7 @@ def new_version(port: Port, stated: Optional[str], new: bool = False) -> str:
 
     # Determines new version number if none manually specified
     if stated is None:  # None used rather than "is not" to make mypy happy
-        stated = port.livecheck()
+        stated = port.livecheck(refresh)
 
     if stated == port.version:
         click.secho(
@@ -150,8 +342,7 @@ def new_version(port: Port, stated: Optional[str], new: bool = False) -> str:
     # Credit to @herbygillot
     # See https://github.com/macports/macports-ports/pull/9589#issuecomment-753309298
     # alpha/beta/rc version detected on a port that isn't -devel
-    devel_versions = ["alpha", "beta", "rc", "devel", "dev", "unstable"]
-    if "-devel" not in port.name and any(item in stated for item in devel_versions):
+    if "-devel" not in port.name and any(item in stated for item in DEVEL_VERSIONS):
         if not click.confirm(
             f"{port.name} is not a devel port, but the new version ({stated}) is a devel build. Do you wish to continue?"
         ):
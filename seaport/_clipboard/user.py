@@ -31,13 +31,13 @@
 """Functions for modifying the user's system, such as the _clipboard."""
 
 import os
-import subprocess
 import tempfile
 
 import click
 from beartype import beartype
 
 from seaport._clipboard.checks import user_path
+from seaport._clipboard.format import run_subprocess
 
 
 @beartype
@@ -59,7 +59,7 @@ def revert_contents(
     tmp_original = tempfile.NamedTemporaryFile(mode="w")
     tmp_original.write(original_text)
     tmp_original.seek(0)
-    subprocess.run(
+    run_subprocess(
         ([] if os.access(location, os.W_OK) else [f"{user_path()}/sudo"])
         + ["cp", tmp_original.name, location],
         check=True,
@@ -82,7 +82,7 @@ def user_clipboard(new_contents: str) -> None:
     Args:
         new_contents: What to copy the clipboard
     """
-    subprocess.run(
+    run_subprocess(
         f"{user_path()}/pbcopy",
         text=True,
         input=new_contents,
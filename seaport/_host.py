@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Finds external tools and facts about the host without starting processes.
+
+Tools are found by searching PATH in-process. Their paths are cached in host.json
+in the cache directory, along with facts about the host (the macOS version and
+build, and the Xcode version). A tool's path is only trusted while the binary has
+the same mtime, and a fact is only trusted until the host reboots or the binary
+that determined it changes, so a warm run starts no processes to find either.
+
+Tests can describe a host with a :class:`HostProfile` and :func:`set_profile`.
+"""
+
+import contextlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+
+from beartype import beartype
+from beartype.typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from seaport._cache import cache_dir
+from seaport._clipboard.format import format_subprocess
+
+#: The command that determines each fact (the first word is the tool).
+FACTS: Dict[str, Tuple[str, ...]] = {
+    "macos_version": ("sw_vers", "-productVersion"),
+    "macos_build": ("sw_vers", "-buildVersion"),
+    "xcode_version": ("xcodebuild", "-version"),
+    "clt_version": ("xcode-select", "--version"),
+}
+
+#: Points to the developer directory chosen with ``xcode-select -s``.
+XCODE_SELECT_LINK = "/var/db/xcode_select_link"
+
+
+class HostProfile(NamedTuple):
+    """A description of a host, used instead of searching PATH or running commands.
+
+    Attributes:
+        tools (Dict[str, str]): The path of each tool (any other tool isn't installed)
+        facts (Dict[str, str]): The value of each fact in FACTS (any other is empty)
+    """
+
+    tools: Dict[str, str]
+    facts: Dict[str, str]
+
+
+@beartype
+class Host:
+    """Finds tools on the PATH and determines facts about the host, caching both.
+
+    Attributes:
+        path (str): Where the cache is stored
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        """Loads the cache, dropping anything from a different PATH or boot.
+
+        Args:
+            path: Where the cache is stored (default host.json in the cache directory)
+        """
+        self.path = os.path.join(cache_dir(), "host.json") if path is None else path
+        self._lock = threading.Lock()
+        self._search = os.environ.get("PATH", os.defpath)
+        self._boot = boot_time()
+        try:
+            with open(self.path) as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            data = {}
+        if not isinstance(data, dict):
+            data = {}
+
+        self._tools: Dict[str, List[Any]] = (
+            data.get("tools", {}) if data.get("search") == self._search else {}
+        )
+        # If the boot time is unknown, facts are only kept for this run
+        self._facts: Dict[str, List[Any]] = (
+            data.get("facts", {})
+            if self._boot is not None and data.get("boot") == self._boot
+            else {}
+        )
+
+    def which(self, tool: str) -> Optional[str]:
+        """Searches PATH for a tool, in the same way as the ``which`` command.
+
+        Args:
+            tool: The name of the tool
+
+        Returns:
+            Optional[str]: The path of the tool, or None if it isn't on the PATH
+        """
+        search = os.environ.get("PATH", os.defpath)
+        with self._lock:
+            if search != self._search:
+                self._search = search
+                self._tools = {}
+            entry = self._tools.get(tool)
+            if entry is not None and _mtime(entry[0]) == entry[1]:
+                return str(entry[0])
+
+        found = shutil.which(tool, path=search)
+        if found is None:
+            return None
+        with self._lock:
+            self._tools[tool] = [found, _mtime(found)]
+        self.save()
+        return found
+
+    def fact(self, name: str) -> str:
+        """Determines a fact about the host, running its command if it isn't cached.
+
+        Args:
+            name: One of the keys of FACTS
+
+        Returns:
+            str: The output of the command, or an empty string if it failed (e.g.
+                xcodebuild without Xcode installed)
+        """
+        command = FACTS[name]
+        tool = self.which(command[0])
+        key = self._key(name, tool)
+        with self._lock:
+            entry = self._facts.get(name)
+            if entry is not None and entry[1] == key:
+                return str(entry[0])
+
+        value = ""
+        if tool is not None:
+            try:
+                value = format_subprocess([tool, *command[1:]])
+            except (OSError, subprocess.CalledProcessError):
+                pass
+        with self._lock:
+            self._facts[name] = [value, key]
+        self.save()
+        return value
+
+    def save(self) -> None:
+        """Atomically writes the cache to disk, if the cache directory is writable."""
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}"
+        try:
+            with self._lock:
+                data = {
+                    "search": self._search,
+                    "boot": self._boot,
+                    "tools": self._tools,
+                    "facts": self._facts,
+                }
+                with open(tmp, "w") as file:
+                    json.dump(data, file)
+            os.replace(tmp, self.path)
+        except OSError:
+            # Everything is just looked up again next run
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+
+    @staticmethod
+    def _key(name: str, tool: Optional[str]) -> str:
+        """What a fact depends on, so it's determined again if any of it changes."""
+        key = f"{tool} {_mtime(tool) if tool else None}"
+        if name in ("xcode_version", "clt_version"):
+            key += f" {_mtime(os.path.realpath(XCODE_SELECT_LINK))}"
+        return key
+
+
+#: The host used by which and fact (created when first needed).
+_HOST: Optional[Host] = None
+
+#: Replaces the host if set (see set_profile).
+_PROFILE: Optional[HostProfile] = None
+
+
+@beartype
+def which(tool: str) -> Optional[str]:
+    """Searches PATH for a tool, remembering where it was found.
+
+    Examples:
+        >>> from seaport._host import HostProfile, set_profile, which
+        >>> set_profile(HostProfile({"port": "/opt/local/bin/port"}, {}))
+        >>> which("port")
+        '/opt/local/bin/port'
+        >>> which("brew") is None
+        True
+        >>> set_profile(None)
+
+    Args:
+        tool: The name of the tool
+
+    Returns:
+        Optional[str]: The path of the tool, or None if it isn't on the PATH
+    """
+    if _PROFILE is not None:
+        return _PROFILE.tools.get(tool)
+    return _host().which(tool)
+
+
+@beartype
+def fact(name: str) -> str:
+    """Determines a fact about the host (one of the keys of FACTS).
+
+    Examples:
+        >>> from seaport._host import HostProfile, fact, set_profile
+        >>> set_profile(HostProfile({}, {"macos_version": "13.4"}))
+        >>> fact("macos_version")
+        '13.4'
+        >>> fact("xcode_version")
+        ''
+        >>> set_profile(None)
+
+    Args:
+        name: The name of the fact
+
+    Returns:
+        str: The value of the fact, or an empty string if it couldn't be determined
+    """
+    if _PROFILE is not None:
+        return _PROFILE.facts.get(name, "")
+    return _host().fact(name)
+
+
+@beartype
+def set_profile(profile: Optional[HostProfile]) -> None:
+    """Uses a fixed description of the host instead of looking anything up.
+
+    Args:
+        profile: The host to describe, or None to go back to the real host
+    """
+    global _HOST, _PROFILE
+    _PROFILE = profile
+    # The cache directory may have changed since the host was created
+    _HOST = None
+
+
+@beartype
+def boot_time() -> Optional[int]:
+    """When the host last booted, found without starting a process.
+
+    Returns:
+        Optional[int]: The boot time in seconds since the epoch, or None if the
+            platform isn't supported
+    """
+    if sys.platform == "darwin":  # pragma: no cover
+        return _darwin_boot_time()
+    try:
+        with open("/proc/stat") as file:
+            for line in file:
+                if line.startswith("btime "):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+@beartype
+def _darwin_boot_time() -> Optional[int]:  # pragma: no cover
+    """Reads the kern.boottime sysctl."""
+    import ctypes
+    import ctypes.util
+
+    class Timeval(ctypes.Structure):
+        _fields_ = [("tv_sec", ctypes.c_long), ("tv_usec", ctypes.c_int32)]
+
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"))
+    except OSError:
+        return None
+    boot = Timeval()
+    size = ctypes.c_size_t(ctypes.sizeof(boot))
+    if libc.sysctlbyname(
+        b"kern.boottime", ctypes.byref(boot), ctypes.byref(size), None, 0
+    ):
+        return None
+    return int(boot.tv_sec)
+
+
+@beartype
+def _host() -> Host:
+    """The host, created the first time it's needed."""
+    global _HOST
+    if _HOST is None:
+        _HOST = Host()
+    return _HOST
+
+
+@beartype
+def _mtime(path: str) -> Optional[int]:
+    """When a file was last modified (in nanoseconds), or None if it doesn't exist."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
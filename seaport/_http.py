@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""A small HTTP client that keeps connections open between requests.
+
+urllib opens a new connection (and for HTTPS, a new TLS handshake) for every request.
+When checking hundreds of ports, most requests go to the same few hosts (GitHub, PyPI
+etc.), so idle connections are kept per host and reused by whichever thread asks next.
+"""
+
+import gzip
+import http.client
+import threading
+import urllib.parse
+
+from beartype import beartype
+from beartype.typing import Dict, List, Optional, Tuple
+
+from seaport import __version__
+
+#: How many seconds each request can take.
+TIMEOUT = 30.0
+
+#: How many redirects are followed before giving up.
+MAX_REDIRECTS = 5
+
+#: How many idle connections are kept open for each host.
+MAX_IDLE = 8
+
+#: Sent with every request, since some hosts reject requests without one.
+USER_AGENT = f"seaport/{__version__}"
+
+#: Headers that aren't sent on when a redirect leads to another host.
+CREDENTIALS = ("authorization", "cookie")
+
+#: Identifies a host by its scheme, hostname and port.
+Host = Tuple[str, str, Optional[int]]
+
+
+@beartype
+class HTTPPool:
+    """Sends requests, reusing idle connections to the same host.
+
+    The pool can be shared between threads. Each request takes a connection out of the
+    pool (or opens a new one), and puts it back once the response has been read.
+
+    Attributes:
+        timeout (float): How many seconds each request can take
+    """
+
+    def __init__(self, timeout: Optional[float] = None) -> None:
+        """Creates an empty pool.
+
+        Args:
+            timeout: How many seconds each request can take (default TIMEOUT)
+        """
+        self.timeout = TIMEOUT if timeout is None else timeout
+        self._idle: Dict[Host, List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self, url: str, headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, bytes]:
+        """Downloads a url, following any redirects.
+
+        Args:
+            url: What to download
+            headers: Extra headers to send
+
+        Returns:
+            Tuple[int, bytes]: The status code and (decompressed) body of the response
+        """
+        status, _, body = self.request(url, headers)
+        return status, body
+
+    def request(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        method: str = "GET",
+        body: Optional[bytes] = None,
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        """Sends a request, keeping the response headers.
+
+        Redirects are only followed for GET requests. Credentials (Authorization and
+        Cookie headers) aren't sent on to another host.
+
+        Args:
+            url: What to download (or send the request to)
+            headers: Extra headers to send (e.g. for a conditional request)
+            method: The HTTP method
+            body: What to send (e.g. JSON for an API)
+
+        Returns:
+            Tuple[int, Dict[str, str], bytes]: The status code, headers (with lowercase
+                names) and (decompressed) body of the response
+        """
+        headers = dict(headers or {})
+        for _ in range(MAX_REDIRECTS + 1):
+            status, response_headers, content = self._request(
+                url, headers, method, body
+            )
+            location = response_headers.get("location")
+            if (
+                method != "GET"
+                or status not in (301, 302, 303, 307, 308)
+                or location is None
+            ):
+                return status, response_headers, content
+            target = urllib.parse.urljoin(url, location)
+            if _origin(target) != _origin(url):
+                headers = {
+                    name: value
+                    for name, value in headers.items()
+                    if name.lower() not in CREDENTIALS
+                }
+            url = target
+        raise http.client.HTTPException(f"Too many redirects, last to {url}")
+
+    def _request(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        method: str = "GET",
+        body: Optional[bytes] = None,
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        """Sends a single request, returning the status, headers and body."""
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Can't download {url}")
+        host: Host = (parts.scheme, parts.hostname, parts.port)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+        with self._lock:
+            idle = self._idle.get(host, [])
+            connection = idle.pop() if idle else None
+        # An idle connection might have been closed by the server, so retry on a new one
+        for reused in (True, False) if connection is not None else (False,):
+            if connection is None:
+                connection = self._connect(host)
+            sent = False
+            try:
+                connection.request(
+                    method,
+                    path,
+                    body=body,
+                    headers={
+                        "User-Agent": USER_AGENT,
+                        "Accept-Encoding": "gzip",
+                        **headers,
+                    },
+                )
+                sent = True
+                response = connection.getresponse()
+                content = response.read()
+                break
+            except (OSError, http.client.HTTPException) as error:
+                connection.close()
+                connection = None
+                # Only retried if the server can't have acted on the request. Anything
+                # else (e.g. a timeout waiting for the response) might mean a POST was
+                # already carried out, so it mustn't be sent twice.
+                if not reused or (
+                    sent and not isinstance(error, http.client.RemoteDisconnected)
+                ):
+                    raise
+
+        assert connection is not None
+        if response.will_close:
+            connection.close()
+        else:
+            with self._lock:
+                idle = self._idle.setdefault(host, [])
+                if len(idle) < MAX_IDLE:
+                    idle.append(connection)
+                else:
+                    connection.close()
+
+        response_headers = {
+            name.lower(): value for name, value in response.getheaders()
+        }
+        if response_headers.get("content-encoding") == "gzip":
+            content = gzip.decompress(content)
+        return response.status, response_headers, content
+
+    def _connect(self, host: Host) -> http.client.HTTPConnection:
+        """Opens a new connection to a host."""
+        scheme, hostname, port = host
+        if scheme == "https":
+            return http.client.HTTPSConnection(hostname, port, timeout=self.timeout)
+        return http.client.HTTPConnection(hostname, port, timeout=self.timeout)
+
+    def close(self) -> None:
+        """Closes every idle connection."""
+        with self._lock:
+            for connections in self._idle.values():
+                for connection in connections:
+                    connection.close()
+            self._idle.clear()
+
+    def __enter__(self) -> "HTTPPool":
+        """Allows the pool to be used in a with statement."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Closes the idle connections at the end of the with statement."""
+        self.close()
+
+
+@beartype
+def _origin(url: str) -> Host:
+    """The scheme, hostname and port of a url (with the default port filled in)."""
+    parts = urllib.parse.urlsplit(url)
+    default = 443 if parts.scheme == "https" else 80
+    return parts.scheme, parts.hostname or "", parts.port or default
@@ -35,23 +35,36 @@ import click
 from beartype import beartype
 
 from seaport import __version__
-from seaport._clipboard.clipboard import clip
-from seaport._pull_request.pull_request import pr
+from seaport._click_functions import LazyGroup
+from seaport._profile import enable
 
 
 # This acts as the facade of the command line tool
-@click.group()
+# Subcommands are only imported when they're used
+@click.group(
+    cls=LazyGroup,
+    lazy_subcommands={
+        "cache": "seaport._clipboard.distfile_cache:cache",
+        "clip": "seaport._clipboard.clipboard:clip",
+        "pr": "seaport._pull_request.pull_request:pr",
+        "rewrite": "seaport._rewrite:rewrite",
+    },
+)
 @beartype
 @click.version_option(__version__)
-def seaport() -> None:
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Prints how long each external command took when seaport exits "
+    "(the same as SEAPORT_PROFILE=1).",
+)
+def seaport(profile: bool) -> None:
     """The modern MacPorts portfile updater.
 
     Bumps the version number and checksum of a port
 
     For more information, please visit https://seaport.rtfd.io/
     """
+    if profile:
+        enable()
     click.secho("🌊 Starting seaport...", fg="cyan")
-
-
-seaport.add_command(clip)
-seaport.add_command(pr)
@@ -0,0 +1,628 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Checks for new versions of ports without running ``port livecheck``.
+
+The livecheck settings are read straight from the Portfile (``livecheck.type``,
+``livecheck.url``, ``livecheck.regex`` etc.), including the defaults set by the github,
+gitlab and python portgroups. The page (or API) is then downloaded through a shared
+:class:`seaport._http.HTTPPool`, and the regex is applied in Python. Results are
+cached in the user's cache directory, and revalidated with a conditional request once
+they're older than the TTL.
+
+Only the regex, regexm, pypi and none livecheck types are supported. Anything else
+(or anything that can't be evaluated without Tcl, such as most bracketed commands)
+raises ValueError, so that the caller can fall back to ``port livecheck``.
+"""
+
+import concurrent.futures
+import http.client
+import json
+import os
+import re
+import threading
+import time
+
+from beartype import beartype
+from beartype.typing import Any, Dict, List, Match, NamedTuple, Optional, Sequence
+
+from seaport._cache import cache_dir
+from seaport._http import HTTPPool
+from seaport._tcl import Word, commands
+
+#: Where the github portgroup checks for new tags.
+GITHUB_URL = "https://github.com"
+
+#: Where the gitlab portgroup checks for new tags (unless gitlab.instance is set).
+GITLAB_URL = "https://gitlab.com"
+
+#: Where the pypi livecheck type looks up the latest release.
+PYPI_URL = "https://pypi.org"
+
+#: The livecheck types that can be checked without port livecheck.
+SUPPORTED_TYPES = ("regex", "regexm", "pypi", "none")
+
+#: How many ports are checked at once by default.
+DEFAULT_JOBS = 16
+
+#: How many seconds a livecheck result is used before it's revalidated by default
+#: (which can be set with SEAPORT_LIVECHECK_TTL).
+DEFAULT_TTL = 3600
+
+#: The counters kept by the livecheck cache.
+COUNTERS = ("hits", "revalidated", "misses")
+
+#: The counters of the livecheck cache since seaport started.
+_SESSION: Dict[str, int] = dict.fromkeys(COUNTERS, 0)
+
+#: POSIX character classes, which Python's re doesn't support.
+POSIX_CLASSES = {
+    "[:digit:]": "0-9",
+    "[:alpha:]": "a-zA-Z",
+    "[:alnum:]": "a-zA-Z0-9",
+    "[:upper:]": "A-Z",
+    "[:lower:]": "a-z",
+    "[:xdigit:]": "0-9a-fA-F",
+    "[:space:]": "\\s",
+}
+
+#: Tcl backslash escapes that don't just stand for the character after the backslash.
+BACKSLASHES = {"n": "\n", "t": "\t", "r": "\r"}
+
+
+class LivecheckSettings(NamedTuple):
+    """How to check a port for new versions.
+
+    Attributes:
+        type (str): The livecheck type (regex, regexm, pypi or none)
+        url (str): The page to download (for pypi, the JSON API of the project)
+        regex (str): The (Python) regex whose first group is the version
+        version (str): The current version, which new versions are compared against
+        name (str): The name of the port (which livecheck results are cached under)
+    """
+
+    type: str
+    url: str
+    regex: str
+    version: str
+    name: str = ""
+
+
+@beartype
+def livecheck_settings(contents: str) -> LivecheckSettings:
+    """Determines the livecheck settings of a Portfile.
+
+    Examples:
+        >>> from seaport._livecheck import livecheck_settings
+        >>> livecheck_settings(
+        ...     "PortGroup github 1.0\\ngithub.setup orf gping 1.16.1 gping-v"
+        ... )
+        LivecheckSettings(type='regex', url='https://github.com/orf/gping/tags', regex='/releases/tag/gping\\\\-v([^"]+)"', version='1.16.1', name='gping')
+        >>> livecheck_settings("PortGroup python 1.0\\nname py-rich\\nversion 13.0.0")
+        LivecheckSettings(type='pypi', url='https://pypi.org/pypi/rich/json', regex='', version='13.0.0', name='py-rich')
+
+    Args:
+        contents: The contents of the Portfile
+
+    Raises:
+        ValueError: If the livecheck can't be determined without port livecheck
+
+    Returns:
+        LivecheckSettings: How to check the port for new versions
+    """
+    variables: Dict[str, str] = {}
+    portgroups: List[str] = []
+    for words in commands(contents):
+        head, args = words[0].value, words[1:]
+        if head == "PortGroup" and args:
+            portgroups.append(args[0].value)
+        elif head in ("github.setup", "gitlab.setup") and len(args) >= 3:
+            prefix = head.split(".")[0]
+            values = [_substitute(word, variables) for word in args]
+            variables[f"{prefix}.author"] = values[0]
+            variables[f"{prefix}.project"] = values[1]
+            variables["version"] = values[2]
+            variables[f"{prefix}.tag_prefix"] = values[3] if len(values) > 3 else ""
+            variables[f"{prefix}.tag_suffix"] = values[4] if len(values) > 4 else ""
+            variables.setdefault("name", values[1])
+        elif head == "set" and len(args) == 2:
+            variables[args[0].value] = _substitute(args[1], variables)
+        elif re.fullmatch(r"[\w.]+", head) and args and not args[0].value[:1] == "-":
+            # Options are set with their arguments joined by spaces
+            try:
+                variables[head] = " ".join(
+                    _substitute(word, variables) for word in args
+                )
+            except ValueError:
+                # Only a problem if it's used by the livecheck
+                variables.pop(head, None)
+
+    version = variables.get("livecheck.version", variables.get("version", ""))
+    livecheck_type = variables.get("livecheck.type")
+    url = variables.get("livecheck.url")
+    regex = variables.get("livecheck.regex")
+
+    if "github" in portgroups and "github.author" in variables:
+        livecheck_type = livecheck_type or "regex"
+        url = url or (
+            f"{GITHUB_URL}/{variables['github.author']}/{variables['github.project']}/tags"
+        )
+        tag = variables.get("github.livecheck.regex", '[^"]+')
+        regex = regex or (
+            f"/releases/tag/{re.escape(variables['github.tag_prefix'])}({tag})"
+            f'{re.escape(variables["github.tag_suffix"])}"'
+        )
+    elif "gitlab" in portgroups and "gitlab.author" in variables:
+        instance = variables.get("gitlab.instance", GITLAB_URL)
+        livecheck_type = livecheck_type or "regex"
+        url = url or (
+            f"{instance}/{variables['gitlab.author']}/{variables['gitlab.project']}"
+            "/-/tags?format=atom"
+        )
+        regex = regex or (
+            f"<title>{re.escape(variables['gitlab.tag_prefix'])}([^<]+)"
+            f"{re.escape(variables['gitlab.tag_suffix'])}</title>"
+        )
+    elif livecheck_type is None and (
+        "python" in portgroups or variables.get("master_sites", "").startswith("pypi")
+    ):
+        livecheck_type = "pypi"
+
+    if livecheck_type == "pypi":
+        name = variables.get("livecheck.name") or variables.get("python.rootname")
+        if name is None:
+            name = re.sub(r"^py-", "", variables.get("name", ""))
+        return LivecheckSettings(
+            "pypi",
+            f"{PYPI_URL}/pypi/{name}/json",
+            "",
+            version,
+            variables.get("name", ""),
+        )
+
+    if livecheck_type not in SUPPORTED_TYPES:
+        raise ValueError(f"The {livecheck_type or 'default'} livecheck isn't supported")
+    if livecheck_type == "none":
+        return LivecheckSettings("none", "", "", version, variables.get("name", ""))
+    url = url or variables.get("homepage")
+    if not url or not regex:
+        raise ValueError("The livecheck has no url or regex")
+    return LivecheckSettings(
+        livecheck_type,
+        url.split()[0],
+        _python_regex(regex),
+        version,
+        variables.get("name", ""),
+    )
+
+
+@beartype
+def check(
+    settings: LivecheckSettings,
+    pool: Optional[HTTPPool] = None,
+    cache: Optional["LivecheckCache"] = None,
+    refresh: bool = False,
+) -> str:
+    """Finds the latest version of a port.
+
+    Like port livecheck, the highest version matched by the regex is taken. If that
+    isn't newer than the current version, the current version is returned.
+
+    If a cache is given, results newer than its TTL are used as they are. Older results
+    are revalidated with a conditional request, so an unchanged page costs a 304.
+
+    Args:
+        settings: How to check the port
+        pool: The connections to reuse (a new pool is used if not given)
+        cache: Where previous results are stored
+        refresh: Whether to ignore any cached result
+
+    Raises:
+        ValueError: If the page couldn't be downloaded or the regex didn't match
+
+    Returns:
+        str: The latest version
+    """
+    if settings.type == "none":
+        return settings.version
+
+    if pool is None:
+        with HTTPPool() as new_pool:
+            return check(settings, new_pool, cache, refresh)
+
+    entry = None if cache is None or refresh else cache.get(settings)
+    if (
+        cache is not None
+        and entry is not None
+        and time.time() - entry["checked"] < cache.ttl
+    ):
+        cache.count("hits")
+        return _newer(entry["version"], settings.version)
+
+    headers = {}
+    if entry is not None:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        status, response_headers, body = pool.request(settings.url, headers)
+    except (OSError, http.client.HTTPException) as error:
+        raise ValueError(f"Couldn't download {settings.url}: {error}")
+
+    if status == 304 and entry is not None and cache is not None:
+        cache.put(
+            settings, entry["version"], entry.get("etag"), entry.get("last_modified")
+        )
+        cache.count("revalidated")
+        return _newer(entry["version"], settings.version)
+    if status != 200:
+        raise ValueError(f"Couldn't download {settings.url} (HTTP {status})")
+
+    latest = _latest_match(settings, body.decode("utf-8", "replace"))
+    if cache is not None:
+        cache.put(
+            settings,
+            latest,
+            response_headers.get("etag"),
+            response_headers.get("last-modified"),
+        )
+        cache.count("misses")
+    return _newer(latest, settings.version)
+
+
+@beartype
+def latest_version(
+    contents: str,
+    pool: Optional[HTTPPool] = None,
+    cache: Optional["LivecheckCache"] = None,
+    refresh: bool = False,
+    version: Optional[str] = None,
+) -> Optional[str]:
+    """Finds the latest version of a port from its Portfile.
+
+    Args:
+        contents: The contents of the Portfile
+        pool: The connections to reuse (a new pool is used if not given)
+        cache: Where previous results are stored
+        refresh: Whether to ignore any cached result
+        version: The version of the port that new versions are compared against. If
+            the Portfile compares against anything else, port livecheck is needed.
+
+    Returns:
+        Optional[str]: The latest version, or None if port livecheck is needed instead
+    """
+    try:
+        settings = livecheck_settings(contents)
+        if version is not None and settings.version != version:
+            return None
+        return check(settings, pool, cache, refresh)
+    except (ValueError, KeyError, re.error):
+        return None
+
+
+@beartype
+def latest_versions(
+    portfiles: Sequence[str],
+    jobs: int = DEFAULT_JOBS,
+    refresh: bool = False,
+    versions: Optional[Sequence[str]] = None,
+) -> List[Optional[str]]:
+    """Finds the latest versions of many ports at once, through the livecheck cache.
+
+    Args:
+        portfiles: The contents of each Portfile
+        jobs: How many ports to check at once
+        refresh: Whether to ignore any cached results
+        versions: The version of each port (see :func:`latest_version`)
+
+    Returns:
+        List[Optional[str]]: The latest version of each port (in the same order), or
+            None if port livecheck is needed instead
+    """
+    cache = LivecheckCache()
+    with HTTPPool() as pool, concurrent.futures.ThreadPoolExecutor(
+        max_workers=jobs
+    ) as executor:
+        results = list(
+            executor.map(
+                lambda contents, version: latest_version(
+                    contents, pool, cache, refresh, version
+                ),
+                portfiles,
+                [None] * len(portfiles) if versions is None else versions,
+            )
+        )
+    cache.save()
+    return results
+
+
+@beartype
+class LivecheckCache:
+    """Remembers the result of each livecheck, along with its ETag/Last-Modified.
+
+    Results are keyed by the port's name and livecheck url, so changing the livecheck
+    starts afresh. The cache can be shared between threads, and is only written to
+    disk when saved.
+
+    Attributes:
+        path (str): Where the cache is stored
+        ttl (float): How many seconds a result is used without revalidating it
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[float] = None) -> None:
+        """Loads the cache.
+
+        Args:
+            path: Where the cache is stored (default livecheck.json in the cache directory)
+            ttl: How many seconds a result is used without revalidating it (default
+                SEAPORT_LIVECHECK_TTL or DEFAULT_TTL)
+        """
+        self.path = (
+            os.path.join(cache_dir(), "livecheck.json") if path is None else path
+        )
+        self.ttl = (
+            float(os.environ.get("SEAPORT_LIVECHECK_TTL", DEFAULT_TTL))
+            if ttl is None
+            else ttl
+        )
+        self._lock = threading.Lock()
+        try:
+            with open(self.path) as file:
+                self._data: Dict[str, Any] = json.load(file)
+        except (OSError, ValueError):
+            self._data = {"results": {}, "stats": dict.fromkeys(COUNTERS, 0)}
+
+    def get(self, settings: LivecheckSettings) -> Optional[Dict[str, Any]]:
+        """The cached result of a livecheck (if any).
+
+        Args:
+            settings: The livecheck of the port
+
+        Returns:
+            Optional[Dict[str, Any]]: The version found, when it was checked, and the
+                ETag/Last-Modified of the page (under version, checked, etag and
+                last_modified)
+        """
+        with self._lock:
+            entry: Optional[Dict[str, Any]] = self._data["results"].get(
+                f"{settings.name} {settings.url}"
+            )
+            return entry
+
+    def put(
+        self,
+        settings: LivecheckSettings,
+        version: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+    ) -> None:
+        """Stores the result of a livecheck, marking it as checked now.
+
+        Args:
+            settings: The livecheck of the port
+            version: The highest version found
+            etag: The ETag of the page
+            last_modified: The Last-Modified header of the page
+        """
+        with self._lock:
+            self._data["results"][f"{settings.name} {settings.url}"] = {
+                "version": version,
+                "checked": time.time(),
+                "etag": etag,
+                "last_modified": last_modified,
+            }
+
+    def count(self, counter: str) -> None:
+        """Adds one to a counter, both in the cache and for this session.
+
+        Args:
+            counter: Either hits, revalidated or misses
+        """
+        with self._lock:
+            self._data["stats"][counter] += 1
+            _SESSION[counter] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """How often the cache has been used, and how many results it holds.
+
+        Returns:
+            Dict[str, int]: The hits, revalidated and misses counters, as well as the
+                number of results
+        """
+        with self._lock:
+            return {**self._data["stats"], "results": len(self._data["results"])}
+
+    def save(self) -> None:
+        """Atomically writes the cache to disk."""
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}"
+        with self._lock:
+            with open(tmp, "w") as file:
+                json.dump(self._data, file)
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        """Removes every result (but keeps the counters)."""
+        with self._lock:
+            self._data["results"] = {}
+        self.save()
+
+
+@beartype
+def session_stats() -> Dict[str, int]:
+    """How often the livecheck cache has been used since seaport started.
+
+    Returns:
+        Dict[str, int]: The hits, revalidated and misses counters
+    """
+    return dict(_SESSION)
+
+
+@beartype
+def format_stats(stats: Dict[str, int]) -> str:
+    """Summarises the livecheck cache counters.
+
+    Examples:
+        >>> from seaport._livecheck import format_stats
+        >>> format_stats({"hits": 2, "revalidated": 1, "misses": 1})
+        'Livecheck cache: 2 hits, 1 revalidated, 1 misses (75% hit rate)'
+
+    Args:
+        stats: The hits, revalidated and misses counters
+
+    Returns:
+        str: The counters, and the proportion that didn't need a full livecheck
+    """
+    total = sum(stats[counter] for counter in COUNTERS)
+    rate = (stats["hits"] + stats["revalidated"]) / total if total else 0
+    return (
+        f"Livecheck cache: {stats['hits']} hits, {stats['revalidated']} revalidated, "
+        f"{stats['misses']} misses ({rate:.0%} hit rate)"
+    )
+
+
+@beartype
+def vercmp(first: str, second: str) -> int:
+    """Compares two versions in the same way as MacPorts.
+
+    Numbers are compared numerically and letters alphabetically, with numbers being
+    newer than letters. If one version is the start of the other, the longer is newer.
+
+    Examples:
+        >>> from seaport._livecheck import vercmp
+        >>> vercmp("1.10", "1.9")
+        1
+        >>> vercmp("1.0", "1.0.0")
+        -1
+        >>> vercmp("2.0b1", "2.0.1")
+        -1
+
+    Args:
+        first: A version
+        second: Another version
+
+    Returns:
+        int: 1 if first is newer, -1 if second is newer, or 0 if they're the same
+    """
+    first_parts = re.findall(r"\d+|[a-zA-Z]+", first)
+    second_parts = re.findall(r"\d+|[a-zA-Z]+", second)
+    for one, two in zip(first_parts, second_parts):
+        if one.isdigit() and two.isdigit():
+            difference = int(one) - int(two)
+        elif one.isdigit() or two.isdigit():
+            difference = 1 if one.isdigit() else -1
+        else:
+            difference = (one > two) - (one < two)
+        if difference:
+            return 1 if difference > 0 else -1
+    difference = len(first_parts) - len(second_parts)
+    return (difference > 0) - (difference < 0)
+
+
+@beartype
+def _latest_match(settings: LivecheckSettings, text: str) -> str:
+    """Finds the highest version matched by the livecheck in a page."""
+    if settings.type == "pypi":
+        found = [json.loads(text)["info"]["version"]]
+    elif settings.type == "regexm":
+        found = [
+            _version(match) for match in re.finditer(settings.regex, text, re.DOTALL)
+        ]
+    else:
+        # Like port livecheck, the regex is matched line by line
+        found = [
+            _version(match)
+            for line in text.splitlines()
+            for match in re.finditer(settings.regex, line)
+        ]
+    if not found:
+        raise ValueError(f"The livecheck regex didn't match {settings.url}")
+
+    latest: str = found[0]
+    for version in found[1:]:
+        if vercmp(version, latest) > 0:
+            latest = version
+    return latest
+
+
+@beartype
+def _newer(latest: str, current: str) -> str:
+    """The latest version, unless the current version is newer."""
+    return latest if vercmp(latest, current) > 0 else current
+
+
+@beartype
+def _version(match: Match[str]) -> str:
+    """The version matched by a livecheck regex (its first group, if it has one)."""
+    return match.group(1) if match.groups() else match.group(0)
+
+
+@beartype
+def _python_regex(regex: str) -> str:
+    """Converts the Tcl regex features that Python's re doesn't share."""
+    for posix, python in POSIX_CLASSES.items():
+        regex = regex.replace(posix, python)
+    # \m, \M and \y are word boundaries in Tcl
+    return re.sub(r"\\[mMy]", r"\\b", regex)
+
+
+@beartype
+def _substitute(word: Word, variables: Dict[str, str]) -> str:
+    """Performs Tcl's substitution of variables, backslashes and quotemeta on a word.
+
+    Raises:
+        ValueError: If the word uses a variable that isn't known, or a command other
+            than quotemeta
+    """
+    if word.kind == "braced":
+        return word.value
+
+    def replace(match: Match[str]) -> str:
+        token = match.group(0)
+        if token.startswith("\\"):
+            return BACKSLASHES.get(token[1], token[1])
+        if token.startswith("["):
+            command = token[1:-1].split(None, 1)
+            if len(command) == 2 and command[0] == "quotemeta":
+                inner = _substitute(Word(command[1], "bare", 0, 0), variables)
+                return re.sub(r"(\W)", r"\\\1", inner)
+            raise ValueError(f"Can't evaluate {token}")
+        name = match.group(1) or match.group(2)
+        if name not in variables:
+            raise ValueError(f"Unknown variable {name}")
+        return variables[name]
+
+    return re.sub(
+        r"\\.|\[[^\[\]]*\]|\$\{([^}]+)\}|\$([\w.]+)",
+        replace,
+        word.value,
+        flags=re.DOTALL,
+    )
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Runs port commands through a single long-lived ``port`` process.
+
+Every ``port`` process starts Tcl, sources macports.conf and opens the registry
+before it does anything, which takes longer than most of the commands seaport runs.
+A :class:`PortSession` starts ``port -p -F -`` once, which reads commands from stdin.
+Each command is followed by ``echo`` with a unique marker, so its output ends where
+the marker is echoed. stderr is merged into stdout so errors stay in order, and is
+separated out again by its ``Error:``/``Warning:`` prefix.
+
+If the session stops responding, commands fall back to running in their own process.
+"""
+
+import atexit
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+from beartype import beartype
+from beartype.typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+from seaport._clipboard.format import run_subprocess
+from seaport._profile import record
+
+#: How many seconds a command can take (port livecheck can be slow).
+TIMEOUT = 300.0
+
+#: Set to 0 to run every port command in its own process.
+SESSION_VARIABLE = "SEAPORT_PORT_SESSION"
+
+#: Lines starting with these are written to stderr, so aren't part of the output.
+STDERR_PREFIXES = ("Error: ", "Warning: ")
+
+# queue.Queue and subprocess.Popen are only subscriptable when type checking
+if TYPE_CHECKING:  # pragma: no cover
+    Lines = queue.Queue[Optional[str]]
+    Process = subprocess.Popen[str]
+else:  # pragma: no cover
+    Lines = queue.Queue
+    Process = subprocess.Popen
+
+#: The session of each port binary, or None if it stopped working.
+_SESSIONS: Dict[str, Optional["PortSession"]] = {}
+
+#: How long each command took, by whether it ran in a session or its own process.
+_LATENCIES: Dict[str, List[float]] = {"session": [], "one-shot": []}
+
+
+class SessionError(Exception):
+    """The session can't run the command (e.g. port exited or took too long)."""
+
+
+@beartype
+class PortSession:
+    """Keeps one ``port`` process running, sending it each command.
+
+    The session can be shared between threads, although commands run one at a time.
+
+    Examples:
+        >>> from seaport._port_session import PortSession
+        >>> with PortSession("/opt/local/bin/port") as session:
+        ...     session.run(["info", "--version", "py-base91"])
+        (0, 'version: 1.0.1\\n', '')
+
+    Attributes:
+        port (str): The location of the port binary
+        timeout (float): How many seconds each command can take
+        broken (bool): Whether port stopped responding, in which case it was stopped
+    """
+
+    def __init__(self, port: str, timeout: float = TIMEOUT) -> None:
+        """Sets the port binary to use. It isn't started until the first command.
+
+        Args:
+            port: The location of the port binary
+            timeout: How many seconds each command can take
+        """
+        self.port = port
+        self.timeout = timeout
+        self.broken = False
+        self._process: Optional[Process] = None
+        self._lines: Lines = queue.Queue()
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "PortSession":
+        """Allows the session to be used as a context manager."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Stops port when leaving the with block."""
+        self.close()
+
+    def _start(self) -> Process:
+        """Starts port (if it isn't running), along with a thread reading its output."""
+        if self._process is None or self._process.poll() is not None:
+            self._lines = queue.Queue()
+            try:
+                # -p carries on after a command fails, -F - reads commands from stdin
+                self._process = subprocess.Popen(
+                    [self.port, "-p", "-F", "-"],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    encoding="utf-8",
+                    errors="replace",
+                )
+            except OSError as error:
+                self.broken = True
+                raise SessionError(str(error))
+            threading.Thread(
+                target=_read_lines, args=(self._process, self._lines), daemon=True
+            ).start()
+        return self._process
+
+    def run(self, args: Sequence[str]) -> Tuple[int, str, str]:
+        """Runs a port command in the session.
+
+        Args:
+            args: The arguments to port (e.g. ``["info", "gping"]``)
+
+        Raises:
+            SessionError: If the arguments can't be sent as a single line, or port
+                doesn't respond in time (in which case the session is broken).
+
+        Returns:
+            Tuple[int, str, str]: 1 if port reported an error (otherwise 0), the output
+                and the errors/warnings that port would have written to stderr
+        """
+        if not args or any(
+            not arg or any(character in arg for character in " \t\n\"'{}\\")
+            for arg in args
+        ):
+            raise SessionError(f"Can't send {args} to port")
+
+        with self._lock:
+            process = self._start()
+            marker = f"seaport-{uuid.uuid4().hex}"
+            try:
+                assert process.stdin is not None
+                process.stdin.write(f"{' '.join(args)}\necho {marker}\n")
+                process.stdin.flush()
+            except OSError as error:
+                raise self._fail(str(error))
+
+            deadline = time.monotonic() + self.timeout
+            output: List[str] = []
+            errors: List[str] = []
+            while True:
+                try:
+                    line = self._lines.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    raise self._fail(f"port {' '.join(args)} timed out")
+                if line is None:
+                    raise self._fail(f"port exited during port {' '.join(args)}")
+                if line.strip() == marker:
+                    failed = any(error.startswith("Error: ") for error in errors)
+                    return int(failed), "".join(output), "".join(errors)
+                (errors if line.startswith(STDERR_PREFIXES) else output).append(line)
+
+    def _fail(self, message: str) -> SessionError:
+        """Stops port after it stopped responding, returning the error to raise."""
+        self.broken = True
+        self._stop(kill=True)
+        return SessionError(message)
+
+    def _stop(self, kill: bool = False) -> None:
+        """Stops port, killing it if asked to or it doesn't exit straight away."""
+        if self._process is None:
+            return
+        process, self._process = self._process, None
+        try:
+            if process.stdin is not None:
+                process.stdin.close()
+            if not kill:
+                process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            kill = True
+        if kill:
+            process.kill()
+            process.wait()
+
+    def close(self) -> None:
+        """Stops port once any running command has finished."""
+        with self._lock:
+            self._stop()
+
+
+@beartype
+def _read_lines(process: Process, lines: Lines) -> None:
+    """Passes on each line of output, followed by None once port exits."""
+    assert process.stdout is not None
+    for line in process.stdout:
+        lines.put(line)
+    lines.put(None)
+
+
+@beartype
+def port_output(args: List[str], check: bool = True) -> str:
+    """Runs a port command, using the session of its port binary if possible.
+
+    As when port runs in its own process, errors and warnings are written to stderr
+    rather than being part of the output.
+
+    Examples:
+        >>> from seaport._port_session import port_output
+        >>> port_output(["/opt/local/bin/port", "info", "--version", "py-base91"])
+        'version: 1.0.1'
+
+    Args:
+        args: The location of the port binary, followed by the command's arguments
+        check: Whether to raise CalledProcessError if port reports an error
+
+    Raises:
+        subprocess.CalledProcessError: If check is set and the command fails
+
+    Returns:
+        str: The output of the command (without surrounding whitespace)
+    """
+    start = time.perf_counter()
+    session = _session(args[0])
+    if session is not None:
+        try:
+            returncode, output, errors = session.run(args[1:])
+        except SessionError:
+            # A session that stopped responding isn't started again
+            if session.broken:
+                _SESSIONS[args[0]] = None
+        else:
+            _LATENCIES["session"].append(time.perf_counter() - start)
+            record(args, _LATENCIES["session"][-1], returncode, output)
+            sys.stderr.write(errors)
+            if check and returncode:
+                raise subprocess.CalledProcessError(returncode, args, output)
+            return output.strip()
+
+    stdout: bytes = run_subprocess(args, check=check, stdout=subprocess.PIPE).stdout
+    _LATENCIES["one-shot"].append(time.perf_counter() - start)
+    return stdout.decode("utf-8").strip()
+
+
+@beartype
+def _session(port: str) -> Optional[PortSession]:
+    """The session of a port binary, started on first use (unless disabled)."""
+    if os.environ.get(SESSION_VARIABLE, "1") == "0":
+        return None
+    if port not in _SESSIONS:
+        _SESSIONS[port] = PortSession(port)
+    return _SESSIONS[port]
+
+
+@beartype
+def latencies() -> Dict[str, Tuple[int, float]]:
+    """How many port commands ran in a session or in their own process, and the mean
+    number of seconds they took.
+
+    Returns:
+        Dict[str, Tuple[int, float]]: The number of commands and their mean latency,
+            under session and one-shot
+    """
+    return {
+        mode: (len(times), sum(times) / len(times) if times else 0.0)
+        for mode, times in _LATENCIES.items()
+    }
+
+
+@atexit.register
+def close_sessions() -> None:
+    """Stops every session (which happens when seaport exits)."""
+    for session in _SESSIONS.values():
+        if session is not None:
+            session.close()
+    _SESSIONS.clear()
@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Reads port records directly from a MacPorts PortIndex.
+
+The PortIndex consists of a ``name length`` header line for each port, followed by
+a Tcl list of ``key value`` pairs that is ``length`` bytes long. PortIndex.quick maps
+the lowercase name of each port to the byte offset of its header line.
+"""
+
+import bisect
+import contextlib
+import mmap
+import os
+import struct
+from array import array
+
+from beartype import beartype
+from beartype.typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+
+from seaport._cache import cache_dir
+
+# array is only subscriptable when type checking
+if TYPE_CHECKING:  # pragma: no cover
+    Offsets = array[int]
+else:  # pragma: no cover
+    Offsets = array
+
+#: Sorted lowercase names joined by newlines, where each name ends, and each record's offset.
+OffsetTable = Tuple[bytes, Offsets, Offsets]
+
+#: Identifies (and versions) the offset table saved next to the PortIndex.
+_MAGIC = b"SPOFFS01"
+
+#: The magic, PortIndex mtime (ns) and size, number of ports and size of the name blob.
+_HEADER = struct.Struct("=8sQQQQ")
+
+#: Where MacPorts keeps the PortIndex by default.
+DEFAULT_INDEX = "/opt/local/var/macports/sources/rsync.macports.org/macports/release/tarballs/ports/PortIndex"
+
+#: Backslash sequences that Tcl substitutes outside of braces.
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "a": "\a", "b": "\b", "f": "\f", "v": "\v"}
+
+
+@beartype
+def split_list(text: str) -> List[str]:
+    """Splits a Tcl list into its elements.
+
+    Examples:
+        >>> from seaport._portindex import split_list
+        >>> split_list('name gping description {ping, but {with} a graph} homepage "a\\\\"b" c\\\\ d')
+        ['name', 'gping', 'description', 'ping, but {with} a graph', 'homepage', 'a"b', 'c d']
+
+    Args:
+        text: The Tcl list
+
+    Returns:
+        List[str]: The elements of the list
+    """
+    elements: List[str] = []
+    i, length = 0, len(text)
+
+    while True:
+        while i < length and text[i].isspace():
+            i += 1
+        if i >= length:
+            return elements
+
+        if text[i] == "{":
+            # Braced words are taken literally, but can contain nested braces
+            depth, start = 1, i + 1
+            i += 1
+            while i < length and depth:
+                if text[i] == "\\":
+                    i += 1
+                elif text[i] == "{":
+                    depth += 1
+                elif text[i] == "}":
+                    depth -= 1
+                i += 1
+            elements.append(text[start : i - 1])
+            continue
+
+        quoted = text[i] == '"'
+        if quoted:
+            i += 1
+        word: List[str] = []
+        while i < length:
+            char = text[i]
+            if char == "\\" and i + 1 < length:
+                word.append(_ESCAPES.get(text[i + 1], text[i + 1]))
+                i += 2
+                continue
+            if (quoted and char == '"') or (not quoted and char.isspace()):
+                break
+            word.append(char)
+            i += 1
+        # Skip the closing quote
+        i += 1 if quoted else 0
+        elements.append("".join(word))
+
+
+@beartype
+class PortIndex:
+    """Looks up single ports in a PortIndex without parsing the rest of it.
+
+    The PortIndex is memory-mapped, so only the pages holding the records that are
+    looked up are ever read. The offset of each record is kept in a compact table (see
+    :meth:`offsets`) that's saved next to the index, so later runs don't have to rebuild it.
+
+    Examples:
+        >>> from seaport._portindex import PortIndex
+        >>> with PortIndex("/opt/local/var/macports/sources/rsync.macports.org/macports/release/tarballs/ports/PortIndex") as index:
+        ...     index.record("py-base91")["version"]
+        '1.0.1'
+
+    Attributes:
+        path (str): The location of the PortIndex
+    """
+
+    def __init__(self, path: str) -> None:
+        """Sets the location of the index. Nothing is read until a port is looked up."""
+        self.path = path
+        self._map: Optional[mmap.mmap] = None
+        self._offsets: Optional[OffsetTable] = None
+
+    def __enter__(self) -> "PortIndex":
+        """Allows the index to be used as a context manager."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Unmaps the index when leaving the with block."""
+        self.close()
+
+    def close(self) -> None:
+        """Unmaps the index."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def _mapped(self) -> Union[mmap.mmap, bytes]:
+        """The contents of the PortIndex, mapped into memory on first use."""
+        if self._map is None:
+            with open(self.path, "rb") as file:
+                if os.fstat(file.fileno()).st_size == 0:
+                    # Empty files can't be mapped
+                    return b""
+                self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def offsets(self) -> OffsetTable:
+        """The table of record offsets, sorted by lowercase port name.
+
+        The table is loaded from the ``.offsets`` file next to the PortIndex if it's
+        still up-to-date (the index's mtime and size haven't changed). Otherwise,
+        it's rebuilt from PortIndex.quick (or the record headers of the PortIndex if there's
+        no quick index) and saved for next time.
+
+        Returns:
+            OffsetTable: The sorted lowercase port names joined
+                by newlines, the position in that blob where each name ends, and the
+                byte offset of each port's record.
+        """
+        if self._offsets is None:
+            stat = os.stat(self.path)
+            key = (stat.st_mtime_ns, stat.st_size)
+            self._offsets = self._load_offsets(key)
+            if self._offsets is None:
+                self._offsets = self._build_offsets()
+                self._save_offsets(key, self._offsets)
+        return self._offsets
+
+    def _load_offsets(self, key: Tuple[int, int]) -> Optional[OffsetTable]:
+        """Loads the saved offset table, as long as it matches the index's mtime and size."""
+        try:
+            with open(f"{self.path}.offsets", "rb") as file:
+                header = file.read(_HEADER.size)
+                if len(header) != _HEADER.size:
+                    return None
+                magic, mtime, size, count, blob_size = _HEADER.unpack(header)
+                if magic != _MAGIC or (mtime, size) != key:
+                    return None
+                ends, offsets = array("Q"), array("Q")
+                ends.fromfile(file, count)
+                offsets.fromfile(file, count)
+                blob = file.read(blob_size)
+        except (OSError, EOFError):
+            return None
+        return (blob, ends, offsets) if len(blob) == blob_size else None
+
+    def _save_offsets(self, key: Tuple[int, int], table: OffsetTable) -> None:
+        """Saves the offset table next to the index, if the directory is writable."""
+        blob, ends, offsets = table
+        tmp = f"{self.path}.offsets.{os.getpid()}"
+        try:
+            with open(tmp, "wb") as file:
+                file.write(_HEADER.pack(_MAGIC, *key, len(ends), len(blob)))
+                ends.tofile(file)
+                offsets.tofile(file)
+                file.write(blob)
+            os.replace(tmp, f"{self.path}.offsets")
+        except OSError:
+            # The index is usually owned by root, in which case the table is just rebuilt
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+
+    def _build_offsets(self) -> OffsetTable:
+        """Builds the offset table from PortIndex.quick or the PortIndex headers."""
+        pairs: List[Tuple[bytes, int]] = []
+        quick = f"{self.path}.quick"
+        if os.path.exists(quick):
+            with open(quick, "rb") as file:
+                for line in file:
+                    name, _, offset = line.strip().partition(b" ")
+                    if offset:
+                        pairs.append((name, int(offset)))
+        else:
+            contents = self._mapped()
+            position = 0
+            while position < len(contents):
+                end = contents.find(b"\n", position)
+                if end == -1:
+                    break
+                name, _, size = contents[position:end].strip().partition(b" ")
+                pairs.append((name.lower(), position))
+                position = end + 1 + int(size)
+
+        pairs.sort()
+        ends = array("Q")
+        length = 0
+        for name, _ in pairs:
+            length += len(name) + 1
+            ends.append(length - 1)
+        return (
+            b"\n".join(name for name, _ in pairs) + (b"\n" if pairs else b""),
+            ends,
+            array("Q", (offset for _, offset in pairs)),
+        )
+
+    def _name(self, i: int) -> bytes:
+        """The lowercase name of the ith port in the offset table."""
+        blob, ends, _ = self.offsets()
+        return blob[ends[i - 1] + 1 if i else 0 : ends[i]]
+
+    def _search(self, name: bytes) -> int:
+        """The position of the first name in the offset table that isn't less than name."""
+        low, high = 0, len(self.offsets()[1])
+        while low < high:
+            middle = (low + high) // 2
+            if self._name(middle) < name:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def offset(self, name: str) -> Optional[int]:
+        """Finds the byte offset of a port's record.
+
+        Args:
+            name: The name of the port (any capitalisation)
+
+        Returns:
+            Optional[int]: The offset of the port's header line, or None if the port
+                isn't in the index.
+        """
+        key = name.lower().encode("utf-8")
+        i = self._search(key)
+        offsets = self.offsets()[2]
+        return offsets[i] if i < len(offsets) and self._name(i) == key else None
+
+    def record(self, name: str) -> Optional[Dict[str, str]]:
+        """Reads and parses the record of a single port.
+
+        Args:
+            name: The name of the port (any capitalisation)
+
+        Returns:
+            Optional[Dict[str, str]]: The key value pairs of the port's record, or None
+                if the port isn't in the index.
+        """
+        offset = self.offset(name)
+        if offset is None:
+            return None
+
+        contents = self._mapped()
+        end = contents.find(b"\n", offset)
+        _, _, size = contents[offset:end].strip().partition(b" ")
+        elements = split_list(
+            str(memoryview(contents)[end + 1 : end + 1 + int(size)], "utf-8")
+        )
+
+        return dict(zip(elements[::2], elements[1::2]))
+
+    def names(self) -> List[str]:
+        """Lists every port in the index, sorted case-insensitively.
+
+        Unlike the offset table, the names keep their correct capitalisation, since
+        they're read from each record's header line.
+
+        Returns:
+            List[str]: The names of all the ports in the index
+        """
+        contents = self._mapped()
+        names: List[str] = []
+        for offset in self.offsets()[2]:
+            end = contents.find(b"\n", offset)
+            names.append(contents[offset:end].split(b" ", 1)[0].decode("utf-8"))
+        return names
+
+
+class _LowerKeys:
+    """A view of a list of names that only lowercases the names bisect looks at."""
+
+    def __init__(self, names: List[str]) -> None:
+        self._names = names
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __getitem__(self, i: int) -> str:
+        return self._names[i].lower()
+
+
+@beartype
+def index_path() -> str:
+    """The location of the PortIndex, which can be set with ``SEAPORT_PORTINDEX``.
+
+    Returns:
+        str: The location of the PortIndex
+    """
+    return os.environ.get("SEAPORT_PORTINDEX") or DEFAULT_INDEX
+
+
+@beartype
+def port_names(path: Optional[str] = None) -> Optional[List[str]]:
+    """Lists every port name, using the copy saved in the user's cache directory.
+
+    The saved copy records the mtime and size of the PortIndex it was built from, and
+    is rebuilt whenever the index changes.
+
+    Args:
+        path: The location of the PortIndex (default from :func:`index_path`)
+
+    Returns:
+        Optional[List[str]]: The port names sorted case-insensitively, or None if
+            there's neither a PortIndex nor a saved copy of the names.
+    """
+    path = index_path() if path is None else path
+    cache = os.path.join(cache_dir(), "portnames")
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        stat = None
+    key = f"{path}\t{stat.st_mtime_ns}\t{stat.st_size}" if stat else None
+
+    try:
+        with open(cache, encoding="utf-8") as file:
+            header, _, names = file.read().partition("\n")
+        # The saved names are still used if the PortIndex has been removed
+        if key is None or header == key:
+            return names.split("\n") if names else []
+    except OSError:
+        pass
+
+    if key is None:
+        return None
+
+    with PortIndex(path) as index:
+        result = index.names()
+
+    tmp = f"{cache}.{os.getpid()}"
+    try:
+        with open(tmp, "w", encoding="utf-8") as file:
+            file.write(key + "\n" + "\n".join(result))
+        os.replace(tmp, cache)
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.remove(tmp)
+
+    return result
+
+
+@beartype
+def portfile_paths(names: List[str], path: Optional[str] = None) -> Dict[str, str]:
+    """Finds the Portfiles of ports from their portdir in the PortIndex.
+
+    The ports tree is the directory the PortIndex is in, so no port command is needed.
+
+    Args:
+        names: The potentially wrong-capitalised names of the ports
+        path: The location of the PortIndex (default from :func:`index_path`)
+
+    Returns:
+        Dict[str, str]: The location of each port's Portfile (by the name it was given
+            as). Ports that aren't in the index, or whose Portfile doesn't exist, are
+            left out.
+    """
+    path = index_path() if path is None else path
+    if not os.path.exists(path):
+        return {}
+
+    paths: Dict[str, str] = {}
+    with PortIndex(path) as index:
+        for name in names:
+            record = index.record(name)
+            if record is None or "portdir" not in record:
+                continue
+            portfile = os.path.join(
+                os.path.dirname(path), record["portdir"], "Portfile"
+            )
+            if os.path.exists(portfile):
+                paths[name] = portfile
+    return paths
+
+
+@beartype
+def complete(names: List[str], prefix: str) -> List[str]:
+    """Finds the names that start with a prefix (case-insensitively).
+
+    Examples:
+        >>> from seaport._portindex import complete
+        >>> complete(["gping", "py-Rich", "py-rich-click", "py-riddle"], "PY-RIC")
+        ['py-Rich', 'py-rich-click']
+
+    Args:
+        names: The names to search, sorted case-insensitively
+        prefix: What the names should start with
+
+    Returns:
+        List[str]: The matching names, in order
+    """
+    lowered = prefix.lower()
+    keys = _LowerKeys(names)
+    start = bisect.bisect_left(keys, lowered)
+    end = bisect.bisect_left(keys, lowered + "\U0010ffff", start)
+    return names[start:end]
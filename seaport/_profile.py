@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Records every external command seaport runs, to show where the time goes.
+
+With ``seaport --profile`` (or ``SEAPORT_PROFILE=1``), a table of the time spent in
+each type of command is printed when seaport exits. It also counts duplicates (the
+exact same command run again), which are usually a sign that a result isn't cached.
+"""
+
+import atexit
+import os
+import sys
+import threading
+
+from beartype import beartype
+from beartype.typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+#: Set to 1 to print the table when seaport exits.
+PROFILE_VARIABLE = "SEAPORT_PROFILE"
+
+
+class Call(NamedTuple):
+    """A single external command.
+
+    Attributes:
+        args (Tuple[str, ...]): The command and its arguments
+        seconds (float): How long it took (wall time)
+        returncode (int): Its exit code
+        output (int): How many bytes of output were captured
+    """
+
+    args: Tuple[str, ...]
+    seconds: float
+    returncode: int
+    output: int
+
+
+#: Every command run so far.
+_CALLS: List[Call] = []
+_LOCK = threading.Lock()
+
+
+@beartype
+def record(
+    args: Union[str, Sequence[str]],
+    seconds: float,
+    returncode: int,
+    output: Union[bytes, str, None] = None,
+) -> None:
+    """Records a command that was run.
+
+    Args:
+        args: The command and its arguments (or a single string)
+        seconds: How long it took
+        returncode: Its exit code
+        output: Whatever output was captured
+    """
+    size = len(output.encode("utf-8") if isinstance(output, str) else output or b"")
+    call = Call(
+        (args,) if isinstance(args, str) else tuple(args), seconds, returncode, size
+    )
+    with _LOCK:
+        _CALLS.append(call)
+
+
+@beartype
+def calls() -> List[Call]:
+    """Every command run so far, in the order they were run."""
+    with _LOCK:
+        return list(_CALLS)
+
+
+@beartype
+def enable() -> None:
+    """Prints the table when seaport exits (the same as ``SEAPORT_PROFILE=1``)."""
+    os.environ[PROFILE_VARIABLE] = "1"
+
+
+@beartype
+def command_type(args: Sequence[str]) -> str:
+    """Groups commands by the program (and subcommand) being run.
+
+    Examples:
+        >>> from seaport._profile import command_type
+        >>> command_type(["/opt/local/bin/port", "info", "--index", "--version", "gping"])
+        'port info'
+        >>> command_type(["/usr/bin/sudo", "/opt/local/bin/port", "-vst", "install", "gping"])
+        'sudo port install'
+
+    Args:
+        args: The command and its arguments
+
+    Returns:
+        str: The name of the program, followed by its first argument that isn't an option
+    """
+    words = [os.path.basename(args[0])] if args else []
+    rest = list(args[1:])
+    if words == ["sudo"] and rest:
+        words.append(os.path.basename(rest.pop(0)))
+    subcommand = next((arg for arg in rest if not arg.startswith("-")), None)
+    if subcommand is not None:
+        words.append(os.path.basename(subcommand) if "/" in subcommand else subcommand)
+    return " ".join(words)
+
+
+@beartype
+def summary(recorded: Optional[Sequence[Call]] = None) -> str:
+    """Formats the time spent in each type of command as a table, slowest first.
+
+    Examples:
+        >>> from seaport._profile import Call, summary
+        >>> print(summary([
+        ...     Call(("/usr/bin/which", "port"), 0.01, 0, 19),
+        ...     Call(("/usr/bin/which", "port"), 0.01, 0, 19),
+        ...     Call(("/opt/local/bin/port", "info", "gping"), 0.5, 1, 0),
+        ... ]))
+        command     calls  duplicates  failed  total (s)  mean (s)  output (B)
+        port info       1           0       1      0.500     0.500           0
+        which port      2           1       0      0.020     0.010          38
+        3 commands in 0.520s, 1 duplicates
+
+    Args:
+        recorded: The commands to summarise (by default, every command run so far)
+
+    Returns:
+        str: The table, followed by the totals
+    """
+    recorded = calls() if recorded is None else recorded
+    groups: Dict[str, List[Call]] = {}
+    for call in recorded:
+        groups.setdefault(command_type(call.args), []).append(call)
+
+    def duplicates(group: Sequence[Call]) -> int:
+        return len(group) - len({call.args for call in group})
+
+    rows = [
+        (
+            "command",
+            "calls",
+            "duplicates",
+            "failed",
+            "total (s)",
+            "mean (s)",
+            "output (B)",
+        )
+    ]
+    for name, group in sorted(
+        groups.items(), key=lambda item: -sum(call.seconds for call in item[1])
+    ):
+        total = sum(call.seconds for call in group)
+        rows.append(
+            (
+                name,
+                str(len(group)),
+                str(duplicates(group)),
+                str(sum(1 for call in group if call.returncode)),
+                f"{total:.3f}",
+                f"{total / len(group):.3f}",
+                str(sum(call.output for call in group)),
+            )
+        )
+
+    width = max(len(row[0]) for row in rows)
+    lines = [
+        "  ".join(
+            [row[0].ljust(width)]
+            + [
+                value.rjust(len(heading))
+                for value, heading in zip(row[1:], rows[0][1:])
+            ]
+        )
+        for row in rows
+    ]
+    lines.append(
+        f"{len(recorded)} commands in {sum(call.seconds for call in recorded):.3f}s, "
+        f"{sum(duplicates(group) for group in groups.values())} duplicates"
+    )
+    return "\n".join(lines)
+
+
+@atexit.register
+def _report() -> None:
+    """Prints the table to stderr when seaport exits, if profiling."""
+    if os.environ.get(PROFILE_VARIABLE) == "1":
+        print(summary(), file=sys.stderr)
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Bumps several related ports at once, so they can be sent in a single PR.
+
+Ports that move together (e.g. a library and its py- bindings) are bumped
+concurrently in the same way as ``clip --from-file``. If they're linted, tested or
+installed, every new portfile is written to the local portfile repo first, so
+each port is checked against the new versions of the others.
+"""
+
+import os
+import sys
+import tempfile
+
+import click
+from beartype import beartype
+from beartype.typing import Dict, List, NamedTuple, Sequence
+
+from seaport._clipboard.additional import perform_install, perform_lint, perform_test
+from seaport._clipboard.bulk import DEFAULT_JOBS, bulk, summary
+from seaport._clipboard.checks import user_path
+from seaport._clipboard.format import run_subprocess
+from seaport._livecheck import session_stats
+from seaport._port_session import port_output
+from seaport.portfile import Port
+
+
+class Update(NamedTuple):
+    """The new portfile of a port, ready to be committed.
+
+    Attributes:
+        name (str): The name of the port
+        category (str): The directory of the ports tree that the port is in
+        version (str): The version it was bumped to
+        contents (str): The new contents of the portfile
+    """
+
+    name: str
+    category: str
+    version: str
+    contents: str
+
+
+@beartype
+def commit_message(update: Update, new: bool = False) -> str:
+    """The commit message of an update, following the MacPorts guidelines.
+
+    Examples:
+        >>> from seaport._pull_request.batch import Update, commit_message
+        >>> commit_message(Update("gping", "net", "1.2", ""))
+        'gping: update to 1.2'
+        >>> commit_message(Update("gping", "net", "1.2", ""), new=True)
+        'gping: new port'
+
+    Args:
+        update: The port's new portfile
+        new: Whether the port is new
+
+    Returns:
+        str: The commit message
+    """
+    return (
+        f"{update.name}: new port"
+        if new
+        else f"{update.name}: update to {update.version}"
+    )
+
+
+@beartype
+def pr_title(updates: Sequence[Update]) -> str:
+    """The title of a PR that updates several ports.
+
+    Examples:
+        >>> from seaport._pull_request.batch import Update, pr_title
+        >>> pr_title([Update("gping", "net", "1.2", ""), Update("py-gping", "python", "1.2", "")])
+        'gping, py-gping: update to 1.2'
+        >>> pr_title([Update("qt6", "aqua", "6.5", ""), Update("qt6-devel", "aqua", "6.6", "")])
+        'qt6: update to 6.5, qt6-devel: update to 6.6'
+
+    Args:
+        updates: The new portfiles
+
+    Returns:
+        str: The title, which mentions the version once if every port shares it
+    """
+    versions = {update.version for update in updates}
+    if len(versions) == 1:
+        names = ", ".join(update.name for update in updates)
+        return f"{names}: update to {versions.pop()}"
+    return ", ".join(commit_message(update) for update in updates)
+
+
+@beartype
+def bump_ports(
+    names: Sequence[str],
+    test: bool = False,
+    lint: bool = False,
+    install: bool = False,
+    write: bool = False,
+    refresh: bool = False,
+    jobs: int = DEFAULT_JOBS,
+) -> List[Update]:
+    """Bumps several ports to their livecheck versions, checking them together.
+
+    Exits if any of the ports can't be bumped, since they're sent together.
+
+    Args:
+        names: The potentially wrong-capitalised names of the ports
+        test: Whether to run port test on each port
+        lint: Whether to run port lint on each port
+        install: Whether to install each port
+        write: Whether to keep the changes in the user's local portfile repo
+        refresh: Whether to ignore the livecheck cache
+        jobs: How many ports to bump at once
+
+    Returns:
+        List[Update]: The new portfile of each port, in the same order as names
+    """
+    known = Port.bulk(names, livecheck=False)
+    with tempfile.TemporaryDirectory() as output:
+        results = bulk(
+            [(name, None) for name in names], output, jobs, False, refresh, known
+        )
+        if any(result.status != "updated" for result in results):
+            click.echo(summary(results, session_stats()))
+            click.secho("Every port has to be updated to send them together", fg="red")
+            sys.exit(1)
+
+        updates: List[Update] = []
+        for name, result in zip(names, results):
+            with open(os.path.join(output, result.name, "Portfile")) as file:
+                contents = file.read()
+            updates.append(
+                Update(
+                    result.name,
+                    known[name].primary_category(),
+                    result.new_version,
+                    contents,
+                )
+            )
+
+    if test or lint or install or write:
+        _check_locally(updates, known, names, test, lint, install, write)
+    return updates
+
+
+@beartype
+def _check_locally(
+    updates: Sequence[Update],
+    known: Dict[str, Port],
+    names: Sequence[str],
+    test: bool,
+    lint: bool,
+    install: bool,
+    write: bool,
+) -> None:
+    """Writes every new portfile to the local portfile repo, and checks each port."""
+    originals: Dict[str, str] = {}
+    click.secho("💾 Editing local portfile repo", fg="cyan")
+    if not write:
+        # Changes only reverted if the user doesn't use the --write flag
+        click.secho("📝 Changes will be reverted after completion", fg="cyan")
+    passed = False
+    # The originals are put back even if a check crashes or is interrupted
+    try:
+        for update in updates:
+            location = port_output([f"{user_path(True)}/port", "file", update.name])
+            with open(location) as file:
+                originals[location] = file.read()
+            _replace(location, update.contents)
+
+        for name, update in zip(names, updates):
+            if lint and not perform_lint(update.name):
+                break
+            if test:
+                subports = known[name].subports()
+                if not perform_test(
+                    update.name, subports[-1] if subports is not None else None
+                ):
+                    break
+            if install:
+                perform_install(update.name)
+        else:
+            passed = True
+    finally:
+        if not write or not passed:
+            click.secho("🧽 Reverting portfile contents", fg="cyan")
+            for location, original in originals.items():
+                _replace(location, original)
+    if not passed:
+        sys.exit(1)
+
+
+@beartype
+def _replace(location: str, contents: str) -> None:
+    """Replaces the contents of a portfile, using sudo if it isn't writable."""
+    if os.access(location, os.W_OK):
+        with open(location, "w") as file:
+            file.write(contents)
+        return
+
+    # Temporary files created to get around sudo write problem
+    with tempfile.NamedTemporaryFile(mode="w") as tmp:
+        tmp.write(contents)
+        tmp.flush()
+        run_subprocess([f"{user_path()}/sudo", "cp", tmp.name, location], check=True)
@@ -28,33 +28,222 @@
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-"""Commands related to managing the clone macports-ports repo."""
+"""Commands related to managing the clone macports-ports repo.
 
+The clone is blobless and sparse. Every commit and tree is fetched, but file
+contents are only downloaded once they're checked out, and only _resources is
+checked out. PRs are committed without a checkout (see
+:mod:`seaport._pull_request.plumbing`), which keeps the clone to megabytes
+instead of gigabytes.
+"""
+
+import contextlib
+import fcntl
+import json
 import os
 import subprocess
+import time
 
 import click
 from beartype import beartype
-from beartype.typing import Tuple
+from beartype.typing import Any, Dict, Iterator, Optional, Tuple
 
 from seaport._clipboard.checks import user_path
-from seaport._clipboard.format import format_subprocess
+from seaport._clipboard.format import format_subprocess, run_subprocess
+from seaport._host import fact
+
+#: Where the ports tree is cloned from.
+UPSTREAM = "https://github.com/macports/macports-ports.git"
+
+#: Always checked out, since portfiles include files from it.
+RESOURCES = "_resources"
+
+#: How many seconds upstream is trusted for after fetching it (which can be set
+#: with SEAPORT_SYNC_TTL).
+SYNC_TTL = 600.0
+
+
+@beartype
+def sparse_clone(repo: str, upstream: str = UPSTREAM) -> bool:
+    """Clones the ports tree, only checking out _resources.
+
+    Args:
+        repo: Where the repo is (or should be) cloned to
+        upstream: Where to clone the repo from
+
+    Returns:
+        bool: Whether the repo was cloned (as opposed to already existing)
+    """
+    # An existing clone (even a full one from before clones were sparse) is kept
+    if os.path.isdir(repo):
+        return False
+
+    run_subprocess(
+        [
+            f"{user_path()}/git",
+            "clone",
+            "--filter=blob:none",
+            "--sparse",
+            "--single-branch",
+            "--branch",
+            "master",
+            upstream,
+            repo,
+        ],
+        check=True,
+    )
+    run_subprocess(
+        [f"{user_path()}/git", "-C", repo, "sparse-checkout", "set", "--cone"]
+        + [RESOURCES],
+        check=True,
+    )
+    return True
 
 
 @beartype
-def sync_fork(location: str) -> None:
-    """Update the cloned repo with upstream.
+def sync_fork(location: str, ttl: Optional[float] = None) -> str:
+    """Fetches the tip of upstream master, unless that was done recently.
 
-    Based on https://docs.github.com/en/free-pro-team@latest/github/collaborating-with-issues-and-pull-requests/syncing-a-fork
+    PR branches are based directly on upstream master, so nothing is checked out or
+    merged (the fork is brought up to date by :func:`update_fork`). The hash that was
+    fetched and when are kept in .git/seaport-sync.json, so a bulk run of PRs only
+    fetches once.
 
     Args:
         location: Where the macports-ports repo is located
+        ttl: How many seconds a fetch is trusted for (default SEAPORT_SYNC_TTL or SYNC_TTL)
+
+    Returns:
+        str: The hash of upstream master
     """
-    os.chdir(f"{location}/macports-ports")
-    subprocess.run([f"{user_path()}/git", "checkout", "-f", "master"], check=True)
-    subprocess.run([f"{user_path()}/git", "fetch", "upstream"], check=True)
-    subprocess.run([f"{user_path()}/git", "merge", "upstream/master"], check=True)
-    subprocess.run([f"{user_path()}/git", "push"], check=True)
+    repo = f"{location.rstrip('/')}/macports-ports"
+    if ttl is None:
+        ttl = float(os.environ.get("SEAPORT_SYNC_TTL", SYNC_TTL))
+    state_path = f"{repo}/.git/seaport-sync.json"
+
+    # Other seaport processes may be syncing at the same time
+    with locked(f"{repo}/.git/seaport-sync.lock"):
+        state = _read_state(state_path)
+        try:
+            if time.time() - state["synced"] < ttl:
+                return str(state["upstream"])
+        except (KeyError, TypeError):
+            pass
+
+        # The clone's blob filter carries over, so only commits and trees are fetched
+        run_subprocess(
+            [
+                f"{user_path()}/git",
+                "-C",
+                repo,
+                "fetch",
+                "--no-tags",
+                "upstream",
+                "master",
+            ],
+            check=True,
+        )
+        upstream = format_subprocess(
+            [f"{user_path()}/git", "-C", repo, "rev-parse", "upstream/master"]
+        )
+        _write_state(state_path, {**state, "upstream": upstream, "synced": time.time()})
+    return upstream
+
+
+@beartype
+def update_fork(
+    repo: str, owner: str, gh: Optional[str] = None, ttl: Optional[float] = None
+) -> None:
+    """Brings master on the user's fork up to date with upstream, on GitHub's side.
+
+    PR branches are based on upstream master, and the clone is blobless. Unless the
+    fork already has upstream's commits, pushing a branch would mean downloading
+    (and sending) every portfile that changed since the fork was last updated.
+
+    Nothing is done if the fork already has the fetched upstream master, or was
+    synced with it recently (kept in .git/seaport-sync.json), so a bulk run of PRs
+    only syncs once.
+
+    Args:
+        repo: The clone of the fork
+        owner: Who owns the fork on GitHub
+        gh: The location of gh, if it isn't in the default location
+        ttl: How many seconds a sync is trusted for (default SEAPORT_SYNC_TTL or SYNC_TTL)
+    """
+    if ttl is None:
+        ttl = float(os.environ.get("SEAPORT_SYNC_TTL", SYNC_TTL))
+    state_path = f"{repo}/.git/seaport-sync.json"
+
+    with locked(f"{repo}/.git/seaport-sync.lock"):
+        state = _read_state(state_path)
+        upstream = format_subprocess(
+            [f"{user_path()}/git", "-C", repo, "rev-parse", "upstream/master"]
+        )
+        try:
+            if state["fork"] == upstream and time.time() - state["forked"] < ttl:
+                return
+        except (KeyError, TypeError):
+            pass
+
+        # The fork may have been updated some other way (e.g. on GitHub's website)
+        contained = run_subprocess(
+            [
+                f"{user_path()}/git",
+                "-C",
+                repo,
+                "merge-base",
+                "--is-ancestor",
+                upstream,
+                "origin/master",
+            ],
+            stderr=subprocess.DEVNULL,
+        )
+        if contained.returncode:
+            run_subprocess(
+                [
+                    f"{user_path(False, True, gh)}/gh",
+                    "repo",
+                    "sync",
+                    f"{owner}/macports-ports",
+                    "--branch",
+                    "master",
+                ],
+                check=True,
+            )
+            # Lets git push know that the fork has upstream's objects
+            run_subprocess(
+                [
+                    f"{user_path()}/git",
+                    "-C",
+                    repo,
+                    "fetch",
+                    "--no-tags",
+                    "origin",
+                    "master",
+                ],
+                check=True,
+            )
+        _write_state(state_path, {**state, "fork": upstream, "forked": time.time()})
+
+
+@beartype
+def _read_state(path: str) -> Dict[str, Any]:
+    """What was last fetched and synced (empty if it can't be read)."""
+    try:
+        with open(path) as file:
+            state = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+@beartype
+def _write_state(path: str, state: Dict[str, Any]) -> None:
+    """Atomically replaces what was last fetched and synced."""
+    tmp = f"{path}.{os.getpid()}"
+    with open(tmp, "w") as file:
+        json.dump(state, file)
+    os.replace(tmp, path)
 
 
 @beartype
@@ -66,20 +255,30 @@ def pr_variables() -> Tuple[str, str]:
     Returns:
         Tuple[str, str]: The macOS version and Xcode version
     """
-    mac_version = " ".join(
-        [
-            format_subprocess([f"{user_path()}/sw_vers", "-productVersion"]),
-            format_subprocess([f"{user_path()}/sw_vers", "-buildVersion"]),
-        ]
-    )
+    mac_version = f"{fact('macos_version')} {fact('macos_build')}"
 
-    try:
-        xcode_version = format_subprocess(
-            [f"{user_path()}/xcodebuild", "-version"]
-        ).replace("\nBuild version", "")
-    except subprocess.CalledProcessError:
+    xcode_version = fact("xcode_version").replace("\nBuild version", "")
+    if not xcode_version:
         # If Xcode isn't installed
         click.secho("⏩ Using Command Line Tools instead", fg="cyan")
-        xcode_version = format_subprocess([f"{user_path()}/xcode-select", "--version"])
+        xcode_version = fact("clt_version")
 
     return mac_version, xcode_version
+
+
+@contextlib.contextmanager
+def locked(path: str) -> Iterator[None]:
+    """Waits until no other seaport process holds the lock at path, and holds it.
+
+    Args:
+        path: The lock file (created if needed)
+
+    Yields:
+        None: While the lock is held
+    """
+    lock = os.open(path, os.O_CREAT | os.O_RDWR)
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(lock)
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Sends a PR through the GitHub REST API, without a local clone.
+
+A version bump only changes a single file. With ``seaport pr --remote-commit``, the
+blob, tree and commit are created on the user's fork through the Git Data API, a
+branch is pointed at the commit and the PR is opened. Every request goes over the
+same pooled HTTPS connection, so the whole PR takes a handful of round trips.
+"""
+
+import json
+import os
+import time
+
+from beartype import beartype
+from beartype.typing import Any, Dict, Optional, Sequence, Tuple
+
+from seaport._clipboard.checks import user_path
+from seaport._clipboard.format import format_subprocess
+from seaport._http import HTTPPool
+
+#: Where requests are sent (which can be set with SEAPORT_GITHUB_API).
+API = "https://api.github.com"
+
+#: The repo that PRs are sent to.
+UPSTREAM_REPO = "macports/macports-ports"
+
+#: How many more times a new fork is checked for before giving up.
+FORK_RETRIES = 6
+
+#: The delay before checking for a new fork again, in seconds (doubled each time).
+FORK_BACKOFF = 0.5
+
+
+class GitHubError(Exception):
+    """GitHub rejected a request.
+
+    Attributes:
+        status (int): The status code of the response
+    """
+
+    def __init__(self, status: int, message: str) -> None:
+        """Describes the rejected request.
+
+        Args:
+            status: The status code of the response
+            message: What went wrong
+        """
+        super().__init__(message)
+        self.status = status
+
+
+@beartype
+class GitHub:
+    """Sends requests to the GitHub REST API over pooled connections.
+
+    Attributes:
+        api (str): Where requests are sent
+    """
+
+    def __init__(
+        self, token: str, api: Optional[str] = None, pool: Optional[HTTPPool] = None
+    ) -> None:
+        """Prepares to send requests.
+
+        Args:
+            token: Authenticates the user (e.g. from gh auth token)
+            api: Where requests are sent (default SEAPORT_GITHUB_API or API)
+            pool: The connections to send requests over (default a new pool)
+        """
+        self.api = (api or os.environ.get("SEAPORT_GITHUB_API") or API).rstrip("/")
+        self._token = token
+        self._pool = HTTPPool() if pool is None else pool
+
+    def call(self, method: str, path: str, payload: Optional[Any] = None) -> Any:
+        """Sends a request, decoding the JSON response.
+
+        Args:
+            method: The HTTP method
+            path: The endpoint (e.g. /repos/macports/macports-ports/pulls)
+            payload: What to send as JSON (if anything)
+
+        Raises:
+            GitHubError: If the response isn't successful
+
+        Returns:
+            Any: The decoded response
+        """
+        headers = {
+            "Accept": "application/vnd.github+json",
+            "Authorization": f"Bearer {self._token}",
+        }
+        body = None
+        if payload is not None:
+            body = json.dumps(payload).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        status, _, content = self._pool.request(
+            f"{self.api}{path}", headers, method, body
+        )
+        response = json.loads(content) if content else None
+        if status >= 400:
+            message = response.get("message") if isinstance(response, dict) else None
+            raise GitHubError(status, f"{method} {path} failed ({status}): {message}")
+        return response
+
+    def close(self) -> None:
+        """Closes the pooled connections."""
+        self._pool.close()
+
+
+@beartype
+def remote_commit_pr(
+    github: GitHub,
+    commits: Sequence[Tuple[str, Dict[str, str]]],
+    branch: str,
+    title: str,
+    body: str,
+    upstream_repo: str = UPSTREAM_REPO,
+) -> str:
+    """Commits on top of upstream master on the user's fork, and opens a PR.
+
+    Args:
+        github: Sends the requests
+        commits: The message of each commit, and the new contents of each file it
+            changes by its path (e.g. net/gping/Portfile)
+        branch: The branch to create on the fork (replacing any existing branch)
+        title: The title of the PR
+        body: The description of the PR
+        upstream_repo: The repo that the PR is sent to
+
+    Returns:
+        str: The url of the PR
+    """
+    # Returns the existing fork if there already is one
+    fork = github.call("POST", f"/repos/{upstream_repo}/forks")["full_name"]
+    _wait_for_fork(github, fork)
+
+    # Forks share objects with upstream, so the commit can be based on upstream master
+    commit = github.call("GET", f"/repos/{upstream_repo}/git/ref/heads/master")[
+        "object"
+    ]["sha"]
+    tree = github.call("GET", f"/repos/{upstream_repo}/git/commits/{commit}")["tree"][
+        "sha"
+    ]
+
+    for message, files in commits:
+        # The blobs are created along with the tree
+        tree = github.call(
+            "POST",
+            f"/repos/{fork}/git/trees",
+            {
+                "base_tree": tree,
+                "tree": [
+                    {
+                        "path": path,
+                        "mode": "100644",
+                        "type": "blob",
+                        "content": contents,
+                    }
+                    for path, contents in files.items()
+                ],
+            },
+        )["sha"]
+        commit = github.call(
+            "POST",
+            f"/repos/{fork}/git/commits",
+            {"message": message, "tree": tree, "parents": [commit]},
+        )["sha"]
+
+    try:
+        github.call(
+            "POST",
+            f"/repos/{fork}/git/refs",
+            {"ref": f"refs/heads/{branch}", "sha": commit},
+        )
+    except GitHubError as error:
+        # The branch is left over from an earlier PR
+        if error.status != 422:
+            raise
+        github.call(
+            "PATCH",
+            f"/repos/{fork}/git/refs/heads/{branch}",
+            {"sha": commit, "force": True},
+        )
+
+    pull = github.call(
+        "POST",
+        f"/repos/{upstream_repo}/pulls",
+        {
+            "title": title,
+            "head": f"{fork.split('/')[0]}:{branch}",
+            "base": "master",
+            "body": body,
+        },
+    )
+    return str(pull["html_url"])
+
+
+@beartype
+def _wait_for_fork(
+    github: GitHub,
+    fork: str,
+    retries: Optional[int] = None,
+    backoff: Optional[float] = None,
+) -> None:
+    """Waits until a fork has its master branch.
+
+    GitHub creates forks in the background, and until then objects can't be created
+    in them.
+
+    Args:
+        github: Sends the requests
+        fork: The fork (e.g. harens/macports-ports)
+        retries: How many more times to check before giving up (default FORK_RETRIES)
+        backoff: The delay before checking again, in seconds (default FORK_BACKOFF)
+
+    Raises:
+        GitHubError: If the fork still isn't there after the last check
+    """
+    retries = FORK_RETRIES if retries is None else retries
+    backoff = FORK_BACKOFF if backoff is None else backoff
+
+    attempt = 0
+    while True:
+        try:
+            github.call("GET", f"/repos/{fork}/git/ref/heads/master")
+            return
+        except GitHubError as error:
+            # An empty repo is 409 Conflict
+            if error.status not in (404, 409) or attempt >= retries:
+                raise
+        time.sleep(backoff * 2**attempt)
+        attempt += 1
+
+
+@beartype
+def github_token(gh: Optional[str] = None) -> str:
+    """Finds a token for the GitHub API.
+
+    GITHUB_TOKEN and GH_TOKEN take precedence, followed by gh's own token.
+
+    Args:
+        gh: The path of gh (default found on the PATH)
+
+    Returns:
+        str: The token
+    """
+    token = os.environ.get("GITHUB_TOKEN") or os.environ.get("GH_TOKEN")
+    if token:
+        return token
+    return format_subprocess([f"{user_path(False, True, gh)}/gh", "auth", "token"])
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Commits new portfiles without checking anything out.
+
+The blobs, trees and commit are written straight into the object store with
+``hash-object``, ``mktree`` and ``commit-tree``. Only the trees on the way to each
+file are rewritten, so a commit takes a handful of small git processes however
+large the ports tree is, and the working tree and index are never touched.
+"""
+
+from beartype import beartype
+from beartype.typing import Dict, List, Optional, Tuple, Union
+
+from seaport._clipboard.checks import user_path
+from seaport._clipboard.format import run_subprocess
+
+#: The mode of a new file.
+FILE_MODE = "100644"
+
+#: A directory's changes, by the name of each file (its contents) or directory.
+Changes = Dict[str, Union[str, "Changes"]]
+
+
+@beartype
+def commit_files(repo: str, parent: str, files: Dict[str, str], message: str) -> str:
+    """Creates a commit on top of parent that changes (or adds) some files.
+
+    No branch is created or updated, so the commit should be pushed by its hash.
+
+    Args:
+        repo: The clone to create the commit in
+        parent: The commit to build on top of (e.g. upstream/master)
+        files: The new contents of each file, by its path (e.g. net/gping/Portfile)
+        message: The commit message
+
+    Returns:
+        str: The hash of the new commit
+    """
+    changes: Changes = {}
+    for path, contents in files.items():
+        *directories, name = path.split("/")
+        directory = changes
+        for part in directories:
+            directory = directory.setdefault(part, {})  # type: ignore[assignment]
+        directory[name] = contents
+
+    tree = _write_tree(repo, parent, changes)
+    return _git(repo, ["commit-tree", tree, "-p", parent, "-m", message])
+
+
+@beartype
+def _write_tree(repo: str, tree: Optional[str], changes: Changes) -> str:
+    """Writes a copy of tree (or a new tree) with the changes made, returning its hash."""
+    entries = _read_tree(repo, tree) if tree is not None else {}
+    for name, change in changes.items():
+        mode, kind, sha = entries.get(name, (FILE_MODE, "", ""))
+        if isinstance(change, str):
+            # Keeps the mode of an existing file (e.g. if it's executable)
+            entries[name] = (
+                mode if kind == "blob" else FILE_MODE,
+                "blob",
+                _git(repo, ["hash-object", "-w", "--stdin"], change),
+            )
+        else:
+            entries[name] = (
+                "040000",
+                "tree",
+                _write_tree(repo, sha if kind == "tree" else None, change),
+            )
+    return _git(
+        repo,
+        ["mktree", "-z"],
+        "".join(
+            f"{mode} {kind} {sha}\t{name}\0"
+            for name, (mode, kind, sha) in entries.items()
+        ),
+    )
+
+
+@beartype
+def _read_tree(repo: str, tree: str) -> Dict[str, Tuple[str, str, str]]:
+    """The mode, type and hash of every entry of a tree, by name."""
+    entries: Dict[str, Tuple[str, str, str]] = {}
+    for entry in _git(repo, ["ls-tree", "-z", tree]).split("\0"):
+        if entry:
+            details, name = entry.split("\t", 1)
+            mode, kind, sha = details.split()
+            entries[name] = (mode, kind, sha)
+    return entries
+
+
+@beartype
+def _git(repo: str, args: List[str], stdin: Optional[str] = None) -> str:
+    """Runs a git plumbing command in repo, returning its output."""
+    return str(
+        run_subprocess(
+            [f"{user_path()}/git", "-C", repo, *args],
+            check=True,
+            capture_output=True,
+            text=True,
+            input=stdin,
+        ).stdout
+    ).strip("\n")
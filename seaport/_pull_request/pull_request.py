@@ -31,23 +31,35 @@
 """Command to send a PR after updating portfile."""
 
 import os
-import subprocess
+import re
+import sys
 from typing import Any, Optional
 
 import click
 from beartype import beartype
+from beartype.typing import Tuple
 
-from seaport._click_functions import main_cmd
+from seaport._click_functions import LazyHelpOption, get_names, main_options
 from seaport._clipboard.checks import user_path
 from seaport._clipboard.clipboard import clip
-from seaport._pull_request.clone import pr_variables, sync_fork
+from seaport._clipboard.format import format_subprocess, run_subprocess
+from seaport._pull_request.batch import Update, bump_ports, commit_message, pr_title
+from seaport._pull_request.clone import (
+    pr_variables,
+    sparse_clone,
+    sync_fork,
+    update_fork,
+)
+from seaport._pull_request.github import GitHub, github_token, remote_commit_pr
+from seaport._pull_request.plumbing import commit_files
 from seaport._pull_request.portfile import new_contents
 from seaport.portfile import Port
 
 
 @click.command()
 @beartype
-@main_cmd
+@main_options
+@click.argument("names", nargs=-1, required=True, shell_complete=get_names)
 @click.argument(
     "location",
     type=click.Path(exists=True, dir_okay=True, writable=True),
@@ -59,127 +71,199 @@ from seaport.portfile import Port
 )  # TODO: Rewrite (preferably) user_path or this function so that if gh isn't found, this flag is recommended
 @click.option(
     "--gh",
-    help=f"Manually select the path to find gh (GitHub CLI). Default: {user_path(False, True)}/gh",
+    cls=LazyHelpOption,
+    help_callback=lambda: "Manually select the path to find gh (GitHub CLI). "
+    f"Default: {user_path(False, True)}/gh",
     type=click.Path(exists=True, executable=True, dir_okay=False),
 )
+@click.option(
+    "--remote-commit",
+    is_flag=True,
+    help="Commit and send the PR through the GitHub API, without cloning macports-ports "
+    "(LOCATION isn't used).",
+)
 @click.pass_context
 def pr(
     ctx: Any,  # This has to be the first parameter
-    name: str,
-    bump: Optional[str],  # bump is used as part of ctx.forward
-    write: bool,  # Also used in ctx.forward
-    url: Optional[str],  # same here
+    names: Tuple[str, ...],
+    bump: Optional[str],
+    write: bool,
+    url: Optional[str],
     location: str,
     test: bool,
     lint: bool,
     install: bool,
     new: bool,
     gh: Optional[str],
+    remote_commit: bool,
+    refresh: bool,
 ) -> None:
-    """Bumps the version number and checksum of NAME.
+    """Bumps the version number and checksum of NAMES.
 
     It then sends a PR to update it, cloning the macports repo to LOCATION if it doesn't exist already.
 
+    Ports that move together (e.g. a library and its py- bindings) can be given at once. They're bumped at the same
+    time and sent in a single PR, with a commit for each port.
+
     The flags in clip are also valid for this subcommand.
 
     The pull request template is automatically filled in depending on what flags the command was run with (e.g. if
     --lint was used, this would be noted in the verification section of the template).
     """
-    # Invoke the clipboard cmd
-    # That's the command that determines the new contents
-    ctx.forward(clip)
+    if len(names) == 1:
+        # Invoke the clipboard cmd
+        # That's the command that determines the new contents
+        ctx.invoke(
+            clip,
+            name=names[0],
+            bump=bump,
+            test=test,
+            lint=lint,
+            url=url,
+            install=install,
+            write=write,
+            refresh=refresh,
+        )
 
-    # Sets the correct capitalisation of name
-    name, _ = Port.rightcapitalised(name, user_path(True))
+        # Sets the correct capitalisation of name
+        name, _ = Port.rightcapitalised(names[0], user_path(True))
 
-    # Retrieve new version number and contents
-    # Assumes first category is where to put the portfile
-    contents, bump, category = new_contents()
+        # Retrieve new version number and contents
+        # Assumes first category is where to put the portfile
+        contents, bump, category = new_contents()
+        updates = [Update(name, category, bump, contents)]
+    else:
+        if bump or url or new:
+            raise click.UsageError(
+                "--bump, --url and --new can only be used with a single NAME"
+            )
+        updates = bump_ports(names, test, lint, install, write, refresh)
 
-    click.secho("🚀 Cloning macports/macports-ports", fg="cyan")
-    os.chdir(location)
-    # check false if macports-ports already exists (error 127)
-    subprocess.run(
-        [
-            f"{user_path(False, True, gh)}/gh",
-            "repo",
-            "fork",
-            "macports/macports-ports",
-            "--clone=true",
-            "--remote=true",
-        ],
-        check=False,
+    # Different titles depending on whether updating
+    # or adding new file
+    commits = [
+        (
+            commit_message(update, new),
+            {f"{update.category}/{update.name}/Portfile": update.contents},
+        )
+        for update in updates
+    ]
+    title = commits[0][0] if len(commits) == 1 else pr_title(updates)
+    branch = "-".join(
+        ["seaport", *(update.name for update in updates), updates[0].version]
     )
 
-    # Update origin
-    sync_fork(location)
+    mac_version, xcode_version = pr_variables()
 
-    # Different titles depending on whether updating
-    # or adding new file
-    commit_title = f"{name}: new port" if new else f"{name}: update to {bump}"
+    # Skip prompt if in GitHub Actions
+    # Also different commit message
+    github_actions = os.getenv("GITHUB_ACTIONS") == "true"
+    body = pr_body(github_actions, mac_version, xcode_version, lint, test, install)
 
-    subprocess.run(
-        [f"{user_path()}/git", "checkout", "-b", f"seaport-{name}-{bump}"],
-        check=True,
-    )
+    if remote_commit:
+        # See https://docs.github.com/en/actions/reference/environment-variables
+        if github_actions or click.confirm(
+            "Does everything look good before sending PR?"
+        ):
+            github = GitHub(github_token(gh))
+            try:
+                pull = remote_commit_pr(github, commits, branch, title, body)
+            finally:
+                github.close()
+            click.secho(f"🚀 Opened {pull}", fg="cyan")
+        return
 
     # Remove backslash from user macports repo location
-    # This allows copyfile to work regardless of whether there's
-    # a backslash or not
     location = location.rstrip("/")
+    repo = f"{location}/macports-ports"
 
-    if new:
-        # Have to create directories for new portfile
-        subprocess.run(
-            ["/bin/mkdir", "-p", f"{location}/macports-ports/{category}/{name}"],
-            check=True,
+    click.secho("🚀 Cloning macports/macports-ports", fg="cyan")
+    if sparse_clone(repo):
+        # Makes origin the user's fork, and upstream macports/macports-ports
+        run_subprocess(
+            [f"{user_path(False, True, gh)}/gh", "repo", "fork", "--remote=true"],
+            check=False,
+            cwd=repo,
         )
 
-    # Add the new contents to the portfile
-    with open(f"{location}/macports-ports/{category}/{name}/Portfile", "w") as portfile:
-        portfile.write(contents)
+    # Fetch upstream (unless that was done recently)
+    upstream = sync_fork(location)
 
-    subprocess.run(
-        [f"{user_path()}/git", "add", f"{category}/{name}/Portfile"], check=True
-    )
-    subprocess.run(
-        [f"{user_path()}/git", "commit", "-m", commit_title],
-        check=True,
-    )
+    # The commits are built straight from upstream, without checking anything out
+    commit = upstream
+    for message, files in commits:
+        commit = commit_files(repo, commit, files, message)
     # Automatically choose to send PR to remote
     # Change to remote.origin.gh-resolved to send to user's fork
-    subprocess.run(
-        [f"{user_path()}/git", "config", "remote.upstream.gh-resolved", "base"],
+    run_subprocess(
+        [
+            f"{user_path()}/git",
+            "-C",
+            repo,
+            "config",
+            "remote.upstream.gh-resolved",
+            "base",
+        ],
         check=True,
     )
 
-    mac_version, xcode_version = pr_variables()
-
-    # Skip prompt if in GitHub Actions
-    # Also different commit message
-    github_actions = os.getenv("GITHUB_ACTIONS") == "true"
-
     # See https://docs.github.com/en/actions/reference/environment-variables
     if github_actions or click.confirm("Does everything look good before sending PR?"):
-        subprocess.run(
+        owner = _fork_owner(repo)
+        update_fork(repo, owner, gh)
+        # A thin pack would delta against the old portfiles, which aren't downloaded
+        run_subprocess(
             [
                 f"{user_path()}/git",
+                "-C",
+                repo,
                 "push",
-                "--set-upstream",
+                "--no-thin",
                 "origin",
-                f"seaport-{name}-{bump}",
+                f"{commit}:refs/heads/{branch}",
             ],
             check=True,
         )
-        subprocess.run(
+        run_subprocess(
             [
                 f"{user_path(False, True, gh)}/gh",
                 "pr",
                 "create",
+                "--head",
+                f"{owner}:{branch}",
                 "--title",
-                commit_title,
+                title,
                 "--body",
-                f"""#### Description
+                body,
+            ],
+            check=True,
+            cwd=repo,
+        )
+
+
+@beartype
+def pr_body(
+    github_actions: bool,
+    mac_version: str,
+    xcode_version: str,
+    lint: bool,
+    test: bool,
+    install: bool,
+) -> str:
+    """Fills in the pull request template.
+
+    Args:
+        github_actions: Whether seaport is running in GitHub Actions
+        mac_version: The macOS version and build
+        xcode_version: The Xcode (or Command Line Tools) version
+        lint: Whether port lint was run
+        test: Whether port test was run
+        install: Whether the port was installed
+
+    Returns:
+        str: The description of the PR
+    """
+    return f"""#### Description
 
 {"Created with [action-macports-bump](https://github.com/harens/action-macports-bump)" if github_actions else "Created with [seaport](https://seaport.rtfd.io/), the modern MacPorts portfile updater."}
 
@@ -203,12 +287,24 @@ Have you
 - [{"x" if lint else " "}] checked your Portfile with `port lint`?
 - [{"x" if test else " "}] tried existing tests with `sudo port test`?
 - [{"x" if install else " "}] tried a full install with `sudo port -vst install`?
-- [{"x" if install else " "}] tested basic functionality of all binary files?""",
-            ],
-            check=True,
-        )
-    # cleanup process
-    subprocess.run([f"{user_path()}/git", "checkout", "master"], check=True)
-    subprocess.run(
-        [f"{user_path()}/git", "branch", "-D", f"seaport-{name}-{bump}"], check=True
+- [{"x" if install else " "}] tested basic functionality of all binary files?"""
+
+
+@beartype
+def _fork_owner(repo: str) -> str:
+    """Determines who owns the fork that origin points to.
+
+    Args:
+        repo: The clone of the fork
+
+    Returns:
+        str: The owner of the fork on GitHub
+    """
+    url = format_subprocess(
+        [f"{user_path()}/git", "-C", repo, "remote", "get-url", "origin"]
     )
+    match = re.search(r"github\.com[:/]([^/]+)/", url)
+    if match is None:
+        click.secho(f"origin ({url}) isn't a fork on GitHub", fg="red")
+        sys.exit(1)
+    return match.group(1)
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Makes the same edit to many portfiles of a ports tree at once.
+
+Each portfile is tokenized, edited and written back in a separate process, since
+tokenizing thousands of portfiles is CPU-bound. Portfiles are only written if their
+contents changed, and are replaced atomically so a ports tree is never left with a
+half-written portfile.
+"""
+
+import fnmatch
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+from beartype import beartype
+from beartype.typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from seaport._clipboard.portfile.checksum_engine import ALGORITHMS, parse_checksums
+from seaport._clipboard.portfile.portfile_numbers import (
+    current_version,
+    portfile_edits,
+    revbump_edits,
+)
+from seaport._portindex import index_path
+from seaport._tcl import Edit, apply_edits, blocks
+
+#: How many portfiles each process is sent at a time.
+CHUNK_SIZE = 64
+
+
+class Rewrite(NamedTuple):
+    """The edits to make to every selected portfile.
+
+    Attributes:
+        revbump (bool): Whether to increase the revision by one
+        version (Optional[str]): The version to set (which resets the revision)
+        checksums (Dict[str, str]): The checksum types and values to set
+        maintainers (Tuple[str, ...]): Only portfiles maintained by one of these are
+            edited (any portfile if empty)
+    """
+
+    revbump: bool = False
+    version: Optional[str] = None
+    checksums: Dict[str, str] = {}
+    maintainers: Tuple[str, ...] = ()
+
+
+@beartype
+def select_portfiles(
+    tree: str, names: Sequence[str] = (), categories: Sequence[str] = ()
+) -> Iterator[str]:
+    """Finds the portfiles of a ports tree (e.g. a macports-ports checkout).
+
+    Args:
+        tree: The root of the ports tree, which contains a directory for each category
+        names: Globs that the port's directory must match (any port if empty)
+        categories: The categories whose ports are selected (all of them if empty)
+
+    Yields:
+        str: The location of each selected portfile, in alphabetical order
+    """
+    lowered = [name.lower() for name in names]
+    for category in sorted(os.scandir(tree), key=lambda entry: entry.name):
+        # Skips _resources, .git and so on
+        if category.name[:1] in "_." or not category.is_dir():
+            continue
+        if categories and category.name not in categories:
+            continue
+        for port in sorted(os.scandir(category.path), key=lambda entry: entry.name):
+            if lowered and not any(
+                fnmatch.fnmatchcase(port.name.lower(), name) for name in lowered
+            ):
+                continue
+            portfile = os.path.join(port.path, "Portfile")
+            if os.path.isfile(portfile):
+                yield portfile
+
+
+@beartype
+def maintained_by(text: str, maintainers: Sequence[str]) -> bool:
+    """Whether the main port is maintained by any of the maintainers.
+
+    Examples:
+        >>> from seaport._rewrite import maintained_by
+        >>> portfile = "maintainers {gmail.com:harens @harens} openmaintainer"
+        >>> maintained_by(portfile, ["harens"]), maintained_by(portfile, ["someone"])
+        (True, False)
+
+    Args:
+        text: The text of the portfile
+        maintainers: GitHub handles, emails (e.g. ``gmail.com:user``) or ``nomaintainer``
+
+    Returns:
+        bool: Whether any of them are in the portfile's maintainers
+    """
+    for subport, command in blocks(text):
+        if subport is None and command[0].value == "maintainers":
+            handles = {
+                handle
+                for word in command[1:]
+                for item in word.value.split()
+                for handle in (item, item.lstrip("@"))
+            }
+            return any(maintainer in handles for maintainer in maintainers)
+    return False
+
+
+@beartype
+def rewrite_text(text: str, rewrite: Rewrite) -> str:
+    """Makes the edits to the main port of a portfile.
+
+    Examples:
+        >>> from seaport._rewrite import Rewrite, rewrite_text
+        >>> rewrite_text("version 1.0\\nrevision 1\\n", Rewrite(revbump=True))
+        'version 1.0\\nrevision 2\\n'
+        >>> rewrite_text("version 1.0\\nrevision 1\\n", Rewrite(version="1.1"))
+        'version 1.1\\nrevision 0\\n'
+
+    Args:
+        text: The text of the portfile
+        rewrite: The edits to make
+
+    Raises:
+        ValueError: If the portfile can't be parsed, or the edits can't be made
+
+    Returns:
+        str: The edited text, which is the same as text if nothing needed changing
+    """
+    if rewrite.maintainers and not maintained_by(text, rewrite.maintainers):
+        return text
+
+    edits: List[Edit] = []
+    old = {
+        key: value
+        for key, value in parse_checksums(text).items()
+        if key in rewrite.checksums
+    }
+    new = dict(rewrite.checksums)
+    if rewrite.version is not None:
+        version = current_version(text)
+        if version is None:
+            raise ValueError("The version isn't set literally, so it can't be changed")
+        old["version"], new["version"] = version, rewrite.version
+
+    if old:
+        changes = portfile_edits(text, old, new)
+        edits += changes["version"] + changes["checksums"]
+        # Setting the version resets the revision (so it isn't revbumped too)
+        if "version" in old and old["version"] != new["version"]:
+            edits += changes["revision"]
+        elif rewrite.revbump:
+            edits += revbump_edits(text)
+    elif rewrite.revbump:
+        edits += revbump_edits(text)
+
+    return apply_edits(text, edits)
+
+
+@beartype
+def rewrite_file(path: str, rewrite: Rewrite, dry_run: bool = False) -> str:
+    """Edits a portfile, only writing it if its contents changed.
+
+    The new contents are written to a temporary file next to the portfile, which
+    then replaces it (keeping its permissions).
+
+    Args:
+        path: The location of the portfile
+        rewrite: The edits to make
+        dry_run: Whether to leave the portfile as it is
+
+    Returns:
+        str: Either changed or unchanged, or why the portfile couldn't be edited
+    """
+    try:
+        with open(path, encoding="utf-8", newline="") as file:
+            text = file.read()
+        new_text = rewrite_text(text, rewrite)
+        if new_text == text:
+            return "unchanged"
+        if not dry_run:
+            tmp = f"{path}.seaport.{os.getpid()}"
+            with open(tmp, "w", encoding="utf-8", newline="") as file:
+                file.write(new_text)
+            os.chmod(tmp, os.stat(path).st_mode)
+            os.replace(tmp, path)
+    except (OSError, UnicodeDecodeError, ValueError) as error:
+        return str(error) or repr(error)
+    return "changed"
+
+
+@beartype
+def _rewrite_chunk(
+    paths: List[str], rewrite: Rewrite, dry_run: bool
+) -> List[Tuple[str, str]]:
+    """Edits several portfiles in a worker process, so fewer results need sending back."""
+    return [(path, rewrite_file(path, rewrite, dry_run)) for path in paths]
+
+
+@beartype
+def rewrite_tree(
+    paths: Sequence[str], rewrite: Rewrite, jobs: int, dry_run: bool = False
+) -> Iterator[Tuple[str, str]]:
+    """Edits the portfiles on a pool of processes.
+
+    Args:
+        paths: The locations of the portfiles
+        rewrite: The edits to make
+        jobs: How many processes to use. With one, the portfiles are edited in this process.
+        dry_run: Whether to leave the portfiles as they are
+
+    Yields:
+        Tuple[str, str]: Each portfile and the result of editing it (see rewrite_file),
+            in the same order as paths
+    """
+    chunks = [
+        list(paths[start : start + CHUNK_SIZE])
+        for start in range(0, len(paths), CHUNK_SIZE)
+    ]
+    if jobs == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield from _rewrite_chunk(chunk, rewrite, dry_run)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for results in pool.map(
+            _rewrite_chunk,
+            chunks,
+            [rewrite] * len(chunks),
+            [dry_run] * len(chunks),
+        ):
+            yield from results
+
+
+@beartype
+def _checksum(
+    ctx: click.Context, param: click.Parameter, values: Tuple[str, ...]
+) -> Dict[str, str]:
+    """Parses the TYPE=VALUE pairs of --checksum."""
+    checksums: Dict[str, str] = {}
+    for value in values:
+        key, _, checksum = value.partition("=")
+        if not checksum or (key not in ALGORITHMS and key != "size"):
+            raise click.BadParameter(f"{value} isn't of the form TYPE=VALUE")
+        checksums[key] = checksum
+    return checksums
+
+
+@click.command()
+@click.option(
+    "--tree",
+    type=click.Path(exists=True, file_okay=False),
+    help="The ports tree to edit. Defaults to the one the PortIndex is in.",
+)
+@click.option(
+    "--name", "names", multiple=True, help="Only edits ports matching this glob."
+)
+@click.option(
+    "--category", "categories", multiple=True, help="Only edits ports in this category."
+)
+@click.option(
+    "--maintainer",
+    "maintainers",
+    multiple=True,
+    help="Only edits ports with this maintainer (a GitHub handle or email).",
+)
+@click.option("--revbump", is_flag=True, help="Increases the revision by one.")
+@click.option(
+    "--set-version", "version", help="Sets the version, resetting the revision to 0."
+)
+@click.option(
+    "--checksum",
+    "checksums",
+    multiple=True,
+    callback=_checksum,
+    help="Sets a checksum of the first distfile, e.g. sha256=VALUE.",
+)
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=os.cpu_count() or 1,
+    show_default="the number of CPUs",
+    help="How many portfiles are edited at once.",
+)
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    help="Shows which portfiles would change without writing them.",
+)
+@beartype
+def rewrite(
+    tree: Optional[str],
+    names: Tuple[str, ...],
+    categories: Tuple[str, ...],
+    maintainers: Tuple[str, ...],
+    revbump: bool,
+    version: Optional[str],
+    checksums: Dict[str, str],
+    jobs: int,
+    dry_run: bool,
+) -> None:
+    """Edits many portfiles of a ports tree at once.
+
+    For example, seaport rewrite --revbump --maintainer harens
+    """
+    if not (revbump or version or checksums):
+        raise click.UsageError(
+            "Nothing to do. Use --revbump, --set-version and/or --checksum."
+        )
+    tree = os.path.dirname(index_path()) if tree is None else tree
+
+    start = time.perf_counter()
+    paths = list(select_portfiles(tree, names, categories))
+    rewrite_settings = Rewrite(revbump, version, checksums, maintainers)
+
+    counts = {"changed": 0, "unchanged": 0, "failed": 0}
+    for path, result in rewrite_tree(paths, rewrite_settings, jobs, dry_run):
+        port = os.path.relpath(os.path.dirname(path), tree)
+        if result == "changed":
+            counts["changed"] += 1
+            click.echo(f"✏️  {port}")
+        elif result == "unchanged":
+            counts["unchanged"] += 1
+        else:
+            counts["failed"] += 1
+            click.secho(f"❌ {port}: {result}", fg="red")
+    # Avoids dividing by zero for tiny trees
+    elapsed = max(time.perf_counter() - start, 1e-6)
+
+    click.secho(
+        f"{'Would change' if dry_run else 'Changed'} {counts['changed']} of "
+        f"{len(paths)} portfiles ({counts['failed']} failed) in {elapsed:.2f}s: "
+        f"{counts['changed'] / elapsed:.0f} changed/s, {len(paths) / elapsed:.0f} scanned/s",
+        fg="green" if not counts["failed"] else "yellow",
+    )
+    if counts["failed"]:
+        sys.exit(1)
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Splits Tcl (e.g. a Portfile) into commands and words, keeping their positions.
+
+This only follows Tcl's quoting rules (braces, double quotes, brackets, backslashes and
+comments), so substitution is left to the caller. The positions of each word allow
+the original text to be edited without reformatting the rest of it.
+"""
+
+import re
+
+from beartype import beartype
+from beartype.typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+#: The commands whose braced words (after the first) are blocks of commands.
+BLOCKS = ("if", "platform", "subport")
+
+#: Characters of bare and quoted words that have no special meaning.
+_BARE = re.compile(r"[^ \t\r\n;\\\[]+")
+_QUOTED = re.compile(r'[^"\\\[]+')
+
+#: The characters that matter when finding the end of braces and brackets.
+_BRACES = re.compile(r"[\\{}]")
+_BRACKETS = re.compile(r"[\\\[\]]")
+
+
+class Word(NamedTuple):
+    """A single word of a Tcl command.
+
+    Attributes:
+        value (str): The word without any surrounding braces or double quotes
+        kind (str): Either bare, quoted or braced
+        start (int): Where the word starts in the text (including any brace or quote)
+        end (int): Where the word ends in the text (excluding)
+    """
+
+    value: str
+    kind: str
+    start: int
+    end: int
+
+    def replace(self, value: str) -> "Edit":
+        """Replaces the value of the word, keeping any braces or double quotes.
+
+        Args:
+            value: The new value
+
+        Returns:
+            Edit: The edit to make to the text
+        """
+        if self.kind == "bare":
+            return Edit(self.start, self.end, value)
+        return Edit(self.start + 1, self.end - 1, value)
+
+
+class Edit(NamedTuple):
+    """A replacement of part of the text.
+
+    Attributes:
+        start (int): Where the replaced part starts
+        end (int): Where the replaced part ends (excluding)
+        replacement (str): What it's replaced with
+    """
+
+    start: int
+    end: int
+    replacement: str
+
+
+@beartype
+def apply_edits(text: str, edits: Iterable[Edit]) -> str:
+    """Makes several edits to the text at once, leaving the rest of it untouched.
+
+    Examples:
+        >>> from seaport._tcl import Edit, apply_edits
+        >>> apply_edits("version 1.0\\nrevision 2\\n", [Edit(21, 22, "0"), Edit(8, 11, "1.1")])
+        'version 1.1\\nrevision 0\\n'
+
+    Args:
+        text: The original text
+        edits: The edits to make, in any order. Positions are those of the original text.
+
+    Raises:
+        ValueError: If any of the edits overlap
+
+    Returns:
+        str: The edited text
+    """
+    pieces: List[str] = []
+    position = 0
+    for edit in sorted(edits):
+        if edit.start < position:
+            raise ValueError(f"Overlapping edit at position {edit.start}")
+        pieces += [text[position : edit.start], edit.replacement]
+        position = edit.end
+    pieces.append(text[position:])
+    return "".join(pieces)
+
+
+@beartype
+def blocks(text: str) -> Iterator[Tuple[Optional[str], List[Word]]]:
+    """Splits Tcl into commands, including those within ``subport``, ``if`` and
+    ``platform`` blocks.
+
+    Examples:
+        >>> from seaport._tcl import blocks
+        >>> [(subport, [word.value for word in command]) for subport, command in blocks(
+        ...     'version 1.0\\nsubport foo {\\n    if {$a} {revision 1} else {revision 2}\\n}'
+        ... ) if command[0].value != "subport"]
+        [(None, ['version', '1.0']), ('foo', ['if', '$a', 'revision 1', 'else', 'revision 2']), ('foo', ['revision', '1']), ('foo', ['revision', '2'])]
+
+    Args:
+        text: The Tcl to split
+
+    Yields:
+        Tuple[Optional[str], List[Word]]: The subport each command belongs to (None for the
+            main port) and the words of the command. Blocks come before their commands.
+    """
+    yield from _blocks(text, None, 0, len(text))
+
+
+@beartype
+def _blocks(
+    text: str, subport: Optional[str], start: int, end: int
+) -> Iterator[Tuple[Optional[str], List[Word]]]:
+    """Splits the commands between start and end, which belong to subport."""
+    for command in commands(text, start, end):
+        yield subport, command
+        if command[0].value not in BLOCKS:
+            continue
+
+        name = command[1].value if command[0].value == "subport" else subport
+        for index, word in enumerate(command[2:], 2):
+            # The conditions of elseif are braced too
+            if word.kind == "braced" and command[index - 1].value != "elseif":
+                yield from _blocks(text, name, word.start + 1, word.end - 1)
+
+
+@beartype
+def commands(
+    text: str, start: int = 0, end: Optional[int] = None
+) -> Iterator[List[Word]]:
+    """Splits Tcl into commands, with each command split into words.
+
+    Commands end at a newline or semicolon, unless it's within braces, double quotes
+    or brackets (or follows a backslash). Comments are skipped. The bodies of blocks
+    (e.g. ``subport`` or ``if``) are single braced words, which can be split again.
+
+    Examples:
+        >>> from seaport._tcl import commands
+        >>> [[word.value for word in command] for command in commands(
+        ...     'version 1.0 ;# A comment\\nchecksums sha256 abc \\\\\\n    size 1\\n'
+        ...     'livecheck.regex {v(\\\\d+)}'
+        ... )]
+        [['version', '1.0'], ['checksums', 'sha256', 'abc', 'size', '1'], ['livecheck.regex', 'v(\\\\d+)']]
+
+    Args:
+        text: The Tcl to split
+        start: Where to start splitting (e.g. the inside of a braced word)
+        end: Where to stop splitting (by default, the end of the text)
+
+    Yields:
+        List[Word]: The words of each command, with positions relative to the whole text
+    """
+    position = start
+    length = len(text) if end is None else end
+    while position < length:
+        # Skip the whitespace (and empty commands) between commands
+        while position < length and (
+            text[position] in " \t\n\r;" or text.startswith("\\\n", position)
+        ):
+            position += 2 if text[position] == "\\" else 1
+        if position >= length:
+            return
+        if text[position] == "#":
+            position = _comment_end(text, position)
+            continue
+
+        words: List[Word] = []
+        while position < length and text[position] not in "\n;":
+            if text[position] in " \t\r":
+                position += 1
+            elif text.startswith("\\\n", position):
+                # A line continuation counts as a space
+                position += 2
+            else:
+                word = _word(text, position, length)
+                words.append(word)
+                position = word.end
+        yield words
+
+
+@beartype
+def _word(text: str, start: int, end: int) -> Word:
+    """Reads the word starting at start, which can't go beyond end."""
+    if text[start] == "{":
+        end = _close(text, start, "{", "}")
+        return Word(text[start + 1 : end - 1], "braced", start, end)
+    if text[start] == '"':
+        position = start + 1
+        while position < end and text[position] != '"':
+            # Jumps over the characters that can't end the word at once
+            match = _QUOTED.match(text, position, end)
+            position = match.end() if match else _skip(text, position)
+        return Word(text[start + 1 : position], "quoted", start, position + 1)
+
+    position = start
+    while position < end and text[position] not in " \t\r\n;":
+        if text.startswith("\\\n", position):
+            break
+        match = _BARE.match(text, position, end)
+        position = match.end() if match else _skip(text, position)
+    return Word(text[start:position], "bare", start, position)
+
+
+@beartype
+def _skip(text: str, position: int) -> int:
+    """Moves past a character, or a whole bracketed command/backslash escape."""
+    if text[position] == "\\":
+        return position + 2
+    if text[position] == "[":
+        return _close(text, position, "[", "]")
+    return position + 1
+
+
+@beartype
+def _close(text: str, start: int, opening: str, closing: str) -> int:
+    """Finds the end of the braces/brackets opened at start (counting any nested ones)."""
+    special = _BRACES if opening == "{" else _BRACKETS
+    depth = 0
+    match = special.search(text, start)
+    while match is not None:
+        character = match.group()
+        if character == opening:
+            depth += 1
+        elif character == closing:
+            depth -= 1
+            if depth == 0:
+                return match.end()
+        # Backslashes escape the next character
+        match = special.search(text, match.end() + (character == "\\"))
+    raise ValueError(f"Unmatched {opening} at position {start}")
+
+
+@beartype
+def _comment_end(text: str, start: int) -> int:
+    """Finds the end of a comment, which continues onto the next line after a backslash."""
+    position = start
+    while position < len(text) and text[position] != "\n":
+        position += 2 if text[position] == "\\" else 1
+    return position
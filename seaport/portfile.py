@@ -36,9 +36,12 @@ import sys
 from typing import Optional
 
 from beartype import beartype
-from beartype.typing import List, Tuple
+from beartype.typing import Dict, List, NamedTuple, Sequence, Set, Tuple
 
-from seaport._clipboard.format import format_subprocess
+from seaport._clipboard.checks import user_path
+from seaport._livecheck import latest_versions
+from seaport._port_session import port_output
+from seaport._portindex import PortIndex, portfile_paths, split_list
 
 # Don't count code coverage since different python versions
 # won't run different parts of code
@@ -48,6 +51,156 @@ else:  # pragma: no cover
     from typing_extensions import Final
 
 
+#: The fields requested from ``port info`` when taking a snapshot of a port.
+#: Each field is printed on its own ``field: value`` line, so the order doesn't matter.
+INFO_FIELDS: Final[Tuple[str, ...]] = (
+    "name",
+    "version",
+    "revision",
+    "epoch",
+    "categories",
+    "subports",
+    "maintainers",
+    "homepage",
+)
+
+
+@beartype
+def parse_maintainers(value: str) -> List[str]:
+    """Parses the maintainers field of ``port info`` into portfile-style entries.
+
+    ``port info`` labels each handle of a maintainer and separates everything with
+    a comma, so the handles are grouped back together. Each maintainer is written
+    as it would be in a portfile, to match those read from the PortIndex.
+
+    Examples:
+        >>> from seaport.portfile import parse_maintainers
+        >>> parse_maintainers(
+        ...     "Email: harens@macports.org, GitHub: harens, "
+        ...     "Email: someone@gmail.com, GitHub: someone, openmaintainer"
+        ... )
+        ['harens @harens', 'gmail.com:someone @someone', 'openmaintainer']
+
+    Args:
+        value: The maintainers field of ``port info``
+
+    Returns:
+        List[str]: The maintainers of the port
+    """
+    maintainers: List[List[str]] = []
+    labels: Set[str] = set()
+    for part in filter(None, (i.strip() for i in value.split(","))):
+        label, _, handle = part.partition(": ")
+        if label == "Email":
+            user, _, domain = handle.partition("@")
+            handle = user if domain == "macports.org" else f"{domain}:{user}"
+        elif label == "GitHub":
+            handle = f"@{handle}"
+        else:
+            # Keywords such as openmaintainer are maintainers of their own
+            handle, label = handle or part, ""
+
+        # An email always comes first, so a repeated label starts a new maintainer
+        if label and labels and label != "Email" and label not in labels:
+            maintainers[-1].append(handle)
+            labels.add(label)
+        else:
+            maintainers.append([handle])
+            labels = {label} if label else set()
+    return [" ".join(handles) for handles in maintainers]
+
+
+class PortInfo(NamedTuple):
+    """A snapshot of the fields of a port, as given by a single ``port info`` call.
+
+    Attributes:
+        name (str): The correctly capitalised name of the port
+        version (str): The version of the port e.g. 1.0.1
+        revision (int): The revision of the port
+        epoch (int): The epoch of the port
+        categories (List[str]): The categories of the port, primary category first
+        subports (List[str]): The subports of the port (empty if there aren't any)
+        maintainers (List[str]): The maintainers of the port
+        homepage (str): The homepage of the port
+    """
+
+    name: str
+    version: str
+    revision: int
+    epoch: int
+    categories: List[str]
+    subports: List[str]
+    maintainers: List[str]
+    homepage: str
+
+    @classmethod
+    def from_info(cls, output: str) -> "PortInfo":
+        """Parses the output of ``port info`` run with every field in INFO_FIELDS.
+
+        Examples:
+            >>> from seaport.portfile import PortInfo
+            >>> PortInfo.from_info(
+            ...     "name: py-base91\\nversion: 1.0.1\\nrevision: 0\\nepoch: 0\\n"
+            ...     "categories: python\\nsubports: py38-base91, py39-base91\\n"
+            ...     "maintainers: nomaintainer\\nhomepage: https://github.com/aberaud/base91-python"
+            ... ).subports
+            ['py38-base91', 'py39-base91']
+
+        Args:
+            output: The output of ``port info``
+
+        Returns:
+            PortInfo: The parsed snapshot of the port
+        """
+        fields: Dict[str, str] = {}
+        for line in output.splitlines():
+            field, _, value = line.partition(":")
+            fields[field.strip()] = value.strip()
+
+        # Other list fields are separated by a comma and a space
+        def as_list(field: str) -> List[str]:
+            return [i.strip() for i in fields.get(field, "").split(",") if i.strip()]
+
+        return cls(
+            name=fields.get("name", ""),
+            version=fields.get("version", ""),
+            revision=int(fields.get("revision") or 0),
+            epoch=int(fields.get("epoch") or 0),
+            categories=as_list("categories"),
+            subports=as_list("subports"),
+            maintainers=parse_maintainers(fields.get("maintainers", "")),
+            homepage=fields.get("homepage", ""),
+        )
+
+    @classmethod
+    def from_record(cls, record: Dict[str, str]) -> "PortInfo":
+        """Converts the key value pairs of a PortIndex record.
+
+        Examples:
+            >>> from seaport.portfile import PortInfo
+            >>> PortInfo.from_record(
+            ...     {"name": "gping", "version": "1.16.1", "categories": "net sysutils"}
+            ... ).categories
+            ['net', 'sysutils']
+
+        Args:
+            record: The record of a port, as parsed from the PortIndex
+
+        Returns:
+            PortInfo: The snapshot of the port
+        """
+        return cls(
+            name=record.get("name", ""),
+            version=record.get("version", ""),
+            revision=int(record.get("revision") or 0),
+            epoch=int(record.get("epoch") or 0),
+            categories=split_list(record.get("categories", "")),
+            subports=split_list(record.get("subports", "")),
+            maintainers=split_list(record.get("maintainers", "")),
+            homepage=record.get("homepage", ""),
+        )
+
+
 # TODO: Set no output (especially for errors)
 @beartype
 class Port:
@@ -73,80 +226,241 @@ class Port:
 
     Attributes:
         name (str): The name of the port e.g. gping
+        version (str): The version of the port e.g. 1.0.1
+        revision (int): The revision of the port
+        epoch (int): The epoch of the port
+        maintainers (List[str]): The maintainers of the port
+        homepage (str): The homepage of the port
     """
 
-    def __init__(self, name: str) -> None:
-        """Set optional attributes and check if port exists."""
-        # TODO: Figure out how to find path without subprocess
-        # TODO: Refactor this
-        # TODO: This also kind of defeats the purpose of that bandit error, so find a better way to determine the path
-        # no forward slash at end for Bandit B607
+    def __init__(self, name: str, info: Optional[PortInfo] = None) -> None:
+        """Take a snapshot of the port's info and check if port exists.
 
-        self._path: Final[str] = format_subprocess(["/usr/bin/which", "port"]).replace(
-            "/port", ""
+        Args:
+            name: The name of the port
+            info: A snapshot of the port's info that has already been determined (e.g. from
+                the PortIndex). If not given, it's determined from ``port info``.
+        """
+        self._port_path: Optional[str] = None
+        # port distfiles output, split into tokens (by port/subport name)
+        self._distfiles: Dict[str, List[str]] = {}
+        # The result of the livecheck, once it's been run
+        self._latest: Optional[str] = None
+
+        # Every field is taken from a single port info call
+        self._info: Final[PortInfo] = (
+            self.snapshot(name, self._path) if info is None else info
         )
 
-        capitalised_name, info = self.rightcapitalised(name, self._path)
-        self.name: Final[str] = capitalised_name
-        self._info: Final[str] = info
+        self.name: Final[str] = self._info.name
+        self.version: Final[str] = self._info.version
+        self.revision: Final[int] = self._info.revision
+        self.epoch: Final[int] = self._info.epoch
+        self.maintainers: Final[List[str]] = self._info.maintainers
+        self.homepage: Final[str] = self._info.homepage
 
-        self._parsedInfo: Final[List[str]] = self._info[
-            self._info.find("@") + 1 :
-        ].split()
-        version_parse: Final[List[str]] = self._parsedInfo[0].split("_")
+    @classmethod
+    def from_index(cls, name: str, index_path: str) -> "Port":
+        """Creates a port from a PortIndex, without running the port command.
 
-        # Parse saved port info, falling back to calling the explicit function
-        # As a quick sanity check, see that the first digit of the version number is indeed a digit
+        PortIndex.quick (in the same directory as the index) is used to jump straight to
+        the port's record, so only that record is parsed.
 
-        self.version: Final[str] = (
-            format_subprocess(
-                [f"{self._path}/port", "info", "--version", self.name]
-            ).split(" ")[1]
-            if len(version_parse) not in (1, 2) or not version_parse[0][0].isdigit()
-            else version_parse[0]
+        Examples:
+            >>> from seaport.portfile import Port
+            >>> port = Port.from_index("py-base91", "/opt/local/var/macports/sources/rsync.macports.org/macports/release/tarballs/ports/PortIndex")
+            >>> port.version
+            '1.0.1'
+
+        Args:
+            name: The potentially wrong-capitalised name of a port
+            index_path: The location of the PortIndex
+
+        Returns:
+            Port: The port, with its info taken from the index
+        """
+        with PortIndex(index_path) as index:
+            record = index.record(name)
+        if record is None:
+            raise RuntimeError(f"{name} doesn't exist, run portindex if port is new")
+        return cls(name, PortInfo.from_record(record))
+
+    @classmethod
+    def bulk(
+        cls,
+        names: Sequence[str],
+        livecheck: bool = True,
+        port_path: Optional[str] = None,
+        refresh: bool = False,
+    ) -> Dict[str, "Port"]:
+        """Creates many ports at once, running each port command once rather than per port.
+
+        ``port info``, ``port distfiles`` and ``port livecheck`` are each run with every
+        name, and their output is split back up by port. As with the single port methods,
+        subports are used for any ports whose distfiles or livecheck come back empty, but
+        they're also queried all at once. So however many ports there are, at most six
+        processes are spawned.
+
+        Examples:
+            >>> from seaport.portfile import Port
+            >>> ports = Port.bulk(["py-base91", "gping"])
+            >>> ports["py-base91"].livecheck()
+            '1.0.1'
+
+        Args:
+            names: The potentially wrong-capitalised names of the ports
+            livecheck: Whether to run the livecheck of every port. This can be slow, since
+                port livecheck checks each port one after another.
+            port_path: The path to the port binary (determined if not given)
+            refresh: Whether to ignore the livecheck cache
+
+        Returns:
+            Dict[str, Port]: Every port that exists, under the name it was given as
+        """
+        if port_path is None:
+            port_path = user_path(True)
+        names = list(dict.fromkeys(names))
+        if not names:
+            return {}
+
+        # Each port is separated by a line of --
+        output = port_output(
+            [f"{port_path}/port", "info", "--index"]
+            + [f"--{field}" for field in INFO_FIELDS]
+            + names,
+            check=False,
+        )
+        infos: Dict[str, PortInfo] = {}
+        for chunk in re.split(r"^--$", output, flags=re.MULTILINE):
+            info = PortInfo.from_info(chunk)
+            if info.name:
+                infos[info.name.lower()] = info
+
+        ports: Dict[str, Port] = {}
+        for name in names:
+            if name.lower() in infos:
+                ports[name] = cls(name, infos[name.lower()])
+                ports[name]._port_path = port_path
+
+        # The distfiles of python ports are only listed under their subports
+        distfiles = _split_by_port(
+            port_output(
+                [f"{port_path}/port", "distfiles"]
+                + [port.name for port in ports.values()],
+                check=False,
+            ),
+            r"^--->\s+Distfiles for (\S+)\s*$",
         )
+        subports: Dict[str, Port] = {}
+        for port in ports.values():
+            tokens = _distfile_tokens(distfiles.get(port.name.lower(), ""))
+            port._distfiles[port.name] = tokens
+            if port._info.subports and not any(
+                token.startswith(("http://", "https://")) for token in tokens
+            ):
+                subports[port._info.subports[-1]] = port
+        if subports:
+            distfiles = _split_by_port(
+                port_output(
+                    [f"{port_path}/port", "distfiles"] + list(subports), check=False
+                ),
+                r"^--->\s+Distfiles for (\S+)\s*$",
+            )
+            for subport, port in subports.items():
+                port._distfiles[subport] = _distfile_tokens(
+                    distfiles.get(subport.lower(), "")
+                )
 
-        self.revision: Final[int] = (
-            int(
-                format_subprocess(
-                    [f"{self._path}/port", "info", "--revision", self.name]
-                ).split(" ")[1]
+        if livecheck:
+            # Checked concurrently in Python where possible, falling back to port livecheck
+            native = _native_livechecks(
+                {port.name: port.version for port in ports.values()}, refresh
             )
-            if len(version_parse) not in (1, 2) or not version_parse[0][0].isdigit()
-            else 0
-            if len(version_parse) == 1
-            else int(version_parse[1])
-        )
+            for port in ports.values():
+                port._latest = native.get(port.name)
+            ports_left = [port for port in ports.values() if port._latest is None]
+
+            latest = _livecheck_versions(
+                port_output(
+                    [f"{port_path}/port", "livecheck"]
+                    + [port.name for port in ports_left],
+                    check=False,
+                )
+                if ports_left
+                else ""
+            )
+            # Ports that are up-to-date have no output, so their subports are checked
+            subports = {
+                port._info.subports[-1]: port
+                for port in ports_left
+                if port.name.lower() not in latest and port._info.subports
+            }
+            if subports:
+                subport_latest = _livecheck_versions(
+                    port_output(
+                        [f"{port_path}/port", "livecheck"] + list(subports),
+                        check=False,
+                    )
+                )
+                for subport, port in subports.items():
+                    if subport.lower() in subport_latest:
+                        latest[port.name.lower()] = subport_latest[subport.lower()]
+            for port in ports_left:
+                port._latest = latest.get(port.name.lower(), port.version)
+
+        return ports
+
+    @property
+    def _path(self) -> str:
+        """The path to the port binary, only determined once it's needed."""
+        # no forward slash at end for Bandit B607
+        if self._port_path is None:
+            self._port_path = user_path(True)
+        return self._port_path
 
     @staticmethod
-    def rightcapitalised(
-        input_name: str, port_path: str = "/opt/local/bin"
-    ) -> Tuple[str, str]:
-        """Get the correct capitalisation of a port.
+    def snapshot(input_name: str, port_path: str = "/opt/local/bin") -> PortInfo:
+        """Determines every field of a port in one ``port info`` call.
 
         Args:
             input_name: The potentially wrong-capitalised name of a port
             port_path: The path to the port binary (default /opt/local/bin)
 
         Returns:
-            Tuple[str, str]: A tuple representing the right-capitalised name and the scraped
-                port info.
-
+            PortInfo: A snapshot of the port's fields
         """
         try:
-            portInfo: Final[str] = format_subprocess(
-                [f"{port_path}/port", "info", input_name]
+            output: Final[str] = port_output(
+                [f"{port_path}/port", "info", "--index"]
+                + [f"--{field}" for field in INFO_FIELDS]
+                + [input_name]
             )
         except subprocess.CalledProcessError:
             raise RuntimeError(
                 f"{input_name} doesn't exist, run portindex if port is new"
             )
 
-        # If @ not in output, then parsing probably failed. Fall back to original name
-        return (
-            portInfo.split("@")[0].strip() if "@" in portInfo else input_name,
-            portInfo,
-        )
+        info = PortInfo.from_info(output)
+        # If the name wasn't parsed, fall back to the original name
+        return info if info.name else info._replace(name=input_name)
+
+    @staticmethod
+    def rightcapitalised(
+        input_name: str, port_path: str = "/opt/local/bin"
+    ) -> Tuple[str, PortInfo]:
+        """Get the correct capitalisation of a port.
+
+        Args:
+            input_name: The potentially wrong-capitalised name of a port
+            port_path: The path to the port binary (default /opt/local/bin)
+
+        Returns:
+            Tuple[str, PortInfo]: A tuple representing the right-capitalised name and the
+                snapshot of the port's info.
+
+        """
+        info: Final[PortInfo] = Port.snapshot(input_name, port_path)
+        return info.name, info
 
     def __str__(self) -> str:
         """Outputs the name and version of the port.
@@ -169,7 +483,7 @@ class Port:
         return f"Port(name={self.name})"
 
     # TODO: These livecheck tests will fail when I least expect it
-    def livecheck(self) -> str:
+    def livecheck(self, refresh: bool = False) -> str:
         """Runs port livecheck to check for any new versions.
 
         If no livecheck is available or the portfile is already the latest version, the current version is outputted.
@@ -186,13 +500,25 @@ class Port:
             >>> port.livecheck()
             '1.0.1'
 
+        Args:
+            refresh: Whether to ignore the livecheck cache
+
         Returns:
             A string representing the latest version.
         """
+        if self._latest is not None and not refresh:
+            return self._latest
+
+        # If the Portfile's in the ports tree, try checking it without port livecheck
+        native = _native_livechecks({self.name: self.version}, refresh).get(self.name)
+        if native is not None:
+            self._latest = native
+            return native
+
         # Take the last word of port livecheck, and then remove the bracket
-        update = format_subprocess(
-            [f"{self._path}/port", "livecheck", self.name]
-        ).split(" ")[-1][:-1]
+        update = port_output([f"{self._path}/port", "livecheck", self.name]).split(" ")[
+            -1
+        ][:-1]
 
         # If there's no livecheck output, fallback to subport
         # Convoluted if statement to make mypy happy
@@ -200,14 +526,15 @@ class Port:
             # Makes mypy happy since a function could theoretically change to be None
             subports = self.subports()
             if subports is not None:
-                update = format_subprocess(
+                update = port_output(
                     [f"{self._path}/port", "livecheck", subports[-1]]
                 ).split(" ")[-1][:-1]
 
         # If there's no livecheck output again, fallback to current version
         # Implies no livecheck available or already up-to-date
         # N.B. str is required for py 3.7 type checking
-        return update if update != "" else str(self.version)
+        self._latest = update if update != "" else str(self.version)
+        return self._latest
 
     def subports(self) -> Optional[List[str]]:
         """Determines a list of subports of a port.
@@ -230,22 +557,8 @@ class Port:
         Returns:
             A list representing all the subports of the port.
         """
-        # Split subport section by colon and comma
-        # This needs to be made more efficient
-        # TODO: Refactor so that as soon as a line containing sub-ports is found, don't bother
-        # with other iterations in for list comprehension
-        return (
-            None
-            if "Sub-ports" not in self._info
-            else [
-                i.replace(" ", "")
-                for i in re.split(
-                    "[:,]",
-                    " ".join([s for s in self._info.splitlines() if "Sub-ports" in s]),
-                )
-                if i != "Sub-ports"
-            ]
-        )
+        # N.B. list is required for python type checking
+        return list(self._info.subports) if self._info.subports else None
 
     # noinspection HttpUrlsUsage
     def checksums(self, _name: Optional[str] = None) -> Tuple[str, str, str, str]:
@@ -268,11 +581,7 @@ class Port:
         """
         # Name is used if recursion required for subports
         _name = self.name if _name is None else _name
-        distfiles = (
-            format_subprocess([f"{self._path}/port", "distfiles", _name])
-            .replace("\n ", "")
-            .split(" ")
-        )
+        distfiles = self._distfile_tokens(_name)
         try:
             # We're only interested in the first result
             # Credit to https://stackoverflow.com/a/9868665/10763533
@@ -299,6 +608,48 @@ class Port:
             website,
         )
 
+    def distfile_urls(self, _name: Optional[str] = None) -> List[str]:
+        """Determines every url the first distfile can be downloaded from.
+
+        This includes the port's master_sites, as well as the MacPorts distfiles mirrors.
+        The output of `port distfiles NAME` is shared with the checksums method, so calling
+        both only runs the command once.
+
+        Examples:
+            >>> from seaport.portfile import Port
+            >>> port = Port("py-base91")
+            >>> port.distfile_urls()[0]
+            'https://files.pythonhosted.org/packages/source/b/base91/base91-1.0.1.tar.gz'
+
+        Returns:
+            The urls of the first distfile, in the order MacPorts would try them.
+        """
+        _name = self.name if _name is None else _name
+        urls: List[str] = []
+        # Distfiles are separated by blank lines, which the tokens don't split on
+        for word in " ".join(self._distfile_tokens(_name)).split():
+            if word.startswith(("http://", "https://")):
+                urls.append(word)
+            elif urls and word.startswith("["):
+                # The start of the next distfile
+                break
+
+        if not urls:
+            # As with the checksums method, distfiles only works for subports
+            subports = self.subports()
+            if subports is None:
+                raise RuntimeError(f"port distfiles {_name} provides no output")
+            return self.distfile_urls(subports[-1])
+        return urls
+
+    def _distfile_tokens(self, name: str) -> List[str]:
+        """Runs `port distfiles NAME` (only once per name), splitting the output on spaces."""
+        if name not in self._distfiles:
+            self._distfiles[name] = _distfile_tokens(
+                port_output([f"{self._path}/port", "distfiles", name])
+            )
+        return self._distfiles[name]
+
     def primary_category(self) -> str:
         """Determines the first category of a port.
 
@@ -313,21 +664,91 @@ class Port:
         Returns:
             The category of the port e.g. sysutils.
         """
-        # Remove leftmost bracket and rightmost comma (if multiple categories) or bracket (if only one)
-        if self._parsedInfo[1][0] != "(" or self._parsedInfo[1][-1] not in (
-            ")",
-            ",",
-        ):
-            category_list: Final[List[str]] = format_subprocess(
-                [f"{self._path}/port", "info", "--category", self.name]
-            ).split(" ")
-            # Remove comma, and only take the first category
-            # N.B. str seems to be required for py37 type checking
-            return (
-                str(category_list[1][:-1])
-                if len(category_list) > 2
-                else str(category_list[1])
-            )
-        else:
-            # N.B. str is required for python type checking
-            return str(self._parsedInfo[1][1:-1])
+        if not self._info.categories:
+            raise RuntimeError(f"{self.name} has no categories")
+        # N.B. str is required for python type checking
+        return str(self._info.categories[0])
+
+
+@beartype
+def _distfile_tokens(output: str) -> List[str]:
+    """Splits the output of port distfiles on spaces (joining any indented lines)."""
+    return output.replace("\n ", "").split(" ")
+
+
+@beartype
+def _split_by_port(output: str, header: str) -> Dict[str, str]:
+    """Splits the output of a port command run with many ports, by the lowercase port name.
+
+    Args:
+        output: The output of the port command
+        header: A regex matching the line that starts each port, capturing the name
+
+    Returns:
+        Dict[str, str]: The output of each port (excluding its header)
+    """
+    parts = re.split(header, output, flags=re.MULTILINE)
+    # parts is the output before the first header, then each name followed by its output
+    return {name.lower(): body for name, body in zip(parts[1::2], parts[2::2])}
+
+
+@beartype
+def _livecheck_versions(output: str) -> Dict[str, str]:
+    """Finds the new version of each outdated port in the output of port livecheck.
+
+    Examples:
+        >>> from seaport.portfile import _livecheck_versions
+        >>> _livecheck_versions(
+        ...     "gping seems to have been updated (port version: 0.1, new version: 0.2)"
+        ... )
+        {'gping': '0.2'}
+
+    Returns:
+        Dict[str, str]: The new version of each port (by lowercase name)
+    """
+    return {
+        name.lower(): version
+        for name, version in re.findall(
+            r"^(\S+) seems to have been updated \(.*new version: (\S+)\)\s*$",
+            output,
+            flags=re.MULTILINE,
+        )
+    }
+
+
+@beartype
+def _native_livechecks(
+    versions: Dict[str, str], refresh: bool = False
+) -> Dict[str, str]:
+    """Checks ports for new versions in Python, if their Portfiles are in the ports tree.
+
+    The ports tree can be out of step with the source that port info uses, so ports
+    whose Portfile has a different version (or can't be read) are left for port
+    livecheck. The results are cached (see :class:`seaport._livecheck.LivecheckCache`),
+    unless refresh is set.
+
+    Args:
+        versions: The current version of each port, keyed by name
+        refresh: Whether to ignore any cached results
+
+    Returns:
+        Dict[str, str]: The latest version of each port that could be checked
+    """
+    names: List[str] = []
+    portfiles: List[str] = []
+    for name, path in portfile_paths(list(versions)).items():
+        try:
+            with open(path, encoding="utf-8") as file:
+                portfiles.append(file.read())
+        except OSError:
+            continue
+        names.append(name)
+    if not portfiles:
+        return {}
+
+    latest = latest_versions(
+        portfiles, refresh=refresh, versions=[versions[name] for name in names]
+    )
+    return {
+        name: version for name, version in zip(names, latest) if version is not None
+    }
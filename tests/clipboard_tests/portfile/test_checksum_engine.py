@@ -0,0 +1,130 @@
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import hashlib
+import io
+import tracemalloc
+from typing import TYPE_CHECKING
+
+import pytest
+from beartype import beartype
+
+from seaport._clipboard.portfile.checksum_engine import (
+    CHUNK_SIZE,
+    hash_stream,
+    parse_checksums,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from _typeshed import WriteableBuffer
+
+CONTENTS = bytes(range(256)) * 40_000
+
+
+class ZeroStream(io.RawIOBase):
+    """A stream of zeroes that's never held in memory all at once."""
+
+    def __init__(self, size: int) -> None:
+        self.remaining = size
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: "WriteableBuffer") -> int:
+        with memoryview(buffer) as view:
+            read = min(len(view), self.remaining)
+            view[:read] = bytes(read)
+        self.remaining -= read
+        return read
+
+
+@beartype
+def test_parse_checksums() -> None:
+    assert parse_checksums("no checksums here") == {}
+
+    # Multiple distfiles (only the first is used)
+    assert parse_checksums(
+        "checksums   foo-1.0.tar.gz \\\n"
+        "            rmd160  abc \\\n"
+        "            sha256  def \\\n"
+        "            size    123 \\\n"
+        "            bar-2.0.tar.gz \\\n"
+        "            rmd160  ghi\n"
+    ) == {"rmd160": "abc", "sha256": "def", "size": "123"}
+
+    # Older ports
+    assert parse_checksums("    checksums md5 abc sha1 def\nversion 1.0") == {
+        "md5": "abc",
+        "sha1": "def",
+    }
+
+
+@beartype
+def test_hash_stream() -> None:
+    out_file = io.BytesIO()
+
+    assert hash_stream(
+        io.BytesIO(CONTENTS), ["sha256", "size", "rmd160", "blake2b"], out_file
+    ) == {
+        "sha256": hashlib.sha256(CONTENTS).hexdigest(),
+        "size": str(len(CONTENTS)),
+        "rmd160": hashlib.new("ripemd160", CONTENTS).hexdigest(),
+        "blake2b": hashlib.blake2b(CONTENTS).hexdigest(),
+    }
+    assert out_file.getvalue() == CONTENTS
+
+
+@beartype
+def test_hash_stream_threads() -> None:
+    """Hashing in threads gives the same result as hashing serially."""
+    algorithms = ["md5", "sha1", "rmd160", "sha256", "sha512", "size"]
+
+    assert hash_stream(io.BytesIO(CONTENTS), algorithms, threaded=True) == hash_stream(
+        io.BytesIO(CONTENTS), algorithms, threaded=False
+    )
+
+
+@beartype
+def test_hash_stream_unsupported() -> None:
+    with pytest.raises(ValueError):
+        hash_stream(io.BytesIO(CONTENTS), ["crc32"])
+
+
+@beartype
+def test_hash_stream_memory() -> None:
+    """Memory use stays the same regardless of the size of the stream."""
+    tracemalloc.start()
+    try:
+        sums = hash_stream(io.BufferedReader(ZeroStream(64 * CHUNK_SIZE)))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert sums["size"] == str(64 * CHUNK_SIZE)
+    assert peak < 4 * CHUNK_SIZE
@@ -0,0 +1,184 @@
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import hashlib
+from pathlib import Path
+
+import pytest
+from beartype import beartype
+from pytest_subprocess import FakeProcess
+
+from seaport._clipboard.portfile.checksums import (
+    link_distfile,
+    new_checksums,
+    replace_checksums,
+)
+from tests.helpers import DISTFILE, DistfileServer
+
+
+@beartype
+def test_new_checksums(server: DistfileServer) -> None:
+    assert new_checksums(f"{server.url}/example-1.0.tar.gz") == {
+        "rmd160": hashlib.new("ripemd160", DISTFILE).hexdigest(),
+        "sha256": hashlib.sha256(DISTFILE).hexdigest(),
+        "size": str(len(DISTFILE)),
+    }
+
+
+@beartype
+def test_new_checksums_algorithms(server: DistfileServer) -> None:
+    """Only the checksum types the portfile uses are generated."""
+    assert new_checksums(f"{server.url}/example-1.0.tar.gz", None, ["md5", "sha1"]) == {
+        "md5": hashlib.md5(DISTFILE).hexdigest(),
+        "sha1": hashlib.sha1(DISTFILE).hexdigest(),
+    }
+
+
+@beartype
+def test_replace_checksums() -> None:
+    contents = "version 1.0\nrevision 2\nchecksums sha1 abc \\\n    size 10\n"
+
+    assert replace_checksums(
+        contents,
+        {"sha1": "abc", "size": "10", "version": "1.0"},
+        {"sha1": "def", "size": "20", "version": "1.1"},
+    ) == ("version 1.1\nrevision 0\nchecksums sha1 def \\\n    size 20\n")
+
+
+#: A portfile whose subports set their own version, checksums and revision.
+SUBPORTS = """PortSystem          1.0
+PortGroup           github 1.0
+
+github.setup        example foo {main} v
+revision            {main_revision}
+checksums           sha256  {main_sum} \\
+                    size    10
+
+subport foo-devel {{
+    github.setup    example foo {devel} v
+    revision        {devel_revision}
+    checksums       sha256  {devel_sum} \\
+                    size    10
+}}
+
+subport foo-docs {{
+    revision        {docs_revision}
+}}
+
+if {{${{subport}} eq "foo"}} {{
+    revision        {main_revision}
+}}
+"""
+
+#: The portfile before it's updated.
+ORIGINAL = {
+    "main": "1.0",
+    "main_revision": "1",
+    "main_sum": "abc",
+    "devel": "2.0-rc1",
+    "devel_revision": "1",
+    "devel_sum": "abc",
+    "docs_revision": "3",
+}
+
+
+@beartype
+def test_replace_checksums_subport() -> None:
+    """Only the chosen block (and any subports that share its version) is edited."""
+    old = {"sha256": "abc", "size": "10"}
+    new = {"sha256": "def", "size": "10"}
+    portfile = SUBPORTS.format(**ORIGINAL)
+
+    assert replace_checksums(
+        portfile, {**old, "version": "1.0"}, {**new, "version": "1.1"}, quiet=True
+    ) == SUBPORTS.format(
+        **{
+            **ORIGINAL,
+            "main": "1.1",
+            "main_revision": "0",
+            "main_sum": "def",
+            "docs_revision": "0",
+        }
+    )
+
+    assert replace_checksums(
+        portfile,
+        {**old, "version": "2.0-rc1"},
+        {**new, "version": "2.0-rc2"},
+        quiet=True,
+        subport="foo-devel",
+    ) == SUBPORTS.format(
+        **{**ORIGINAL, "devel": "2.0-rc2", "devel_revision": "0", "devel_sum": "def"}
+    )
+
+
+@beartype
+def test_replace_checksums_unparsable() -> None:
+    with pytest.raises(ValueError):
+        replace_checksums("subport foo {\n", {}, {}, quiet=True)
+
+    with pytest.raises(SystemExit):
+        replace_checksums("subport foo {\n", {}, {})
+
+
+@beartype
+def test_new_checksums_bad_url() -> None:
+    with pytest.raises(SystemExit):
+        new_checksums("http://127.0.0.1:1/example-1.0.tar.gz")
+
+
+@beartype
+def test_new_checksums_cached(server: DistfileServer) -> None:
+    """The distfile is only downloaded again if it's changed upstream."""
+    first = new_checksums(f"{server.url}/example-1.0.tar.gz")
+    assert new_checksums(f"{server.url}/example-1.0.tar.gz") == first
+    assert server.requests[-1]["If-None-Match"] == '"v1"'
+
+
+@beartype
+def test_link_distfile(tmp_path: Path, fake_process: FakeProcess) -> None:
+    fake_process.register_subprocess(["/bin/mkdir", "-p", str(tmp_path)])
+    fake_process.register_subprocess(
+        ["/bin/ln", "-f", "cached", f"{tmp_path}/example.tar.gz"]
+    )
+
+    link_distfile("cached", f"{tmp_path}/example.tar.gz")
+    assert fake_process.call_count(["/bin/cp", fake_process.any()]) == 0
+
+    # Copies the distfile if it can't be linked
+    fake_process.register_subprocess(["/bin/mkdir", "-p", str(tmp_path)])
+    fake_process.register_subprocess(
+        ["/bin/ln", "-f", "cached", f"{tmp_path}/example.tar.gz"], returncode=1
+    )
+    fake_process.register_subprocess(
+        ["/bin/cp", "cached", f"{tmp_path}/example.tar.gz"]
+    )
+
+    link_distfile("cached", f"{tmp_path}/example.tar.gz")
+    assert fake_process.call_count(["/bin/cp", fake_process.any()]) == 1
@@ -0,0 +1,239 @@
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import hashlib
+import time
+from pathlib import Path
+
+import pytest
+from beartype import beartype
+from beartype.typing import Sequence
+from click.testing import CliRunner
+from pytest_subprocess import FakeProcess
+
+from seaport._clipboard.bulk import BulkResult, bulk, read_ports, summary
+from seaport._clipboard.clipboard import clip
+from tests.helpers import DISTFILE, DistfileServer
+from tests.test_portfile import info_args
+
+#: The portfile of every port in these tests, before it's bumped.
+PORTFILE = """name {name}
+version 1.0
+revision 1
+checksums rmd160 oldrmd \\
+    sha256 oldsha \\
+    size 10
+"""
+
+
+@beartype
+def setup_ports(
+    fake_process: FakeProcess,
+    server: DistfileServer,
+    tmp_path: Path,
+    latest: str = "1.1",
+    count: int = 4,
+    missing: Sequence[str] = (),
+) -> None:
+    """Registers count example ports (p0, p1, ...), all at version 1.0.
+
+    The ports are looked up all at once, followed by any missing ports.
+    """
+    names = [f"p{number}" for number in range(count)]
+    fake_process.register(
+        info_args(*names, *missing),
+        stdout=[
+            "\n--\n".join(
+                f"name: {name}\nversion: 1.0\nrevision: 1\ncategories: net"
+                for name in names
+            )
+        ],
+        returncode=1 if missing else 0,
+    )
+    fake_process.register(
+        ["/opt/local/bin/port", "distfiles", *names],
+        stdout=[
+            "\n".join(
+                f"--->  Distfiles for {name}\n"
+                f"[{name}-1.0.tar.gz] /opt/local/var/macports/distfiles/{name}/{name}-1.0.tar.gz\n"
+                f"  {server.url}/{name}-1.0.tar.gz"
+                for name in names
+            )
+        ],
+    )
+
+    for name in names:
+        portfile = tmp_path / name / "Portfile"
+        portfile.parent.mkdir()
+        portfile.write_text(PORTFILE.format(name=name))
+
+        fake_process.register(
+            ["/opt/local/bin/port", "livecheck", name],
+            stdout=[
+                f"{name} seems to have been updated (port version: 1.0, new version: {latest})"
+            ],
+        )
+        fake_process.register(
+            ["/opt/local/bin/port", "file", name], stdout=[str(portfile)]
+        )
+
+
+@beartype
+def test_read_ports() -> None:
+    assert read_ports("gping\n\n  # Comment\npy-rich 13.0.0 # Pinned\n") == [
+        ("gping", None),
+        ("py-rich", "13.0.0"),
+    ]
+    with pytest.raises(ValueError):
+        read_ports("gping 1.0 extra")
+
+
+@beartype
+def test_bulk(
+    fake_process: FakeProcess, server: DistfileServer, tmp_path: Path
+) -> None:
+    setup_ports(fake_process, server, tmp_path, count=2)
+    output = tmp_path / "output"
+
+    results = bulk([("p0", None), ("p1", "1.2")], str(output), jobs=2)
+
+    assert results == [
+        BulkResult("p0", "updated", "1.0", "1.1", str(output / "p0.diff")),
+        BulkResult("p1", "updated", "1.0", "1.2", str(output / "p1.diff")),
+    ]
+    assert (output / "p0" / "Portfile").read_text() == (
+        "name p0\nversion 1.1\nrevision 0\n"
+        f"checksums rmd160 {hashlib.new('ripemd160', DISTFILE).hexdigest()} \\\n"
+        f"    sha256 {hashlib.sha256(DISTFILE).hexdigest()} \\\n"
+        f"    size {len(DISTFILE)}\n"
+    )
+    diff = (output / "p1.diff").read_text()
+    assert diff.startswith("--- a/net/p1/Portfile\n+++ b/net/p1/Portfile\n")
+    assert "-version 1.0\n" in diff and "+version 1.2\n" in diff
+    # The original portfile is left alone
+    assert (tmp_path / "p0" / "Portfile").read_text() == PORTFILE.format(name="p0")
+
+
+@beartype
+def test_bulk_skipped_and_failed(
+    fake_process: FakeProcess, server: DistfileServer, tmp_path: Path
+) -> None:
+    """Ports that are up-to-date are skipped, and failures don't stop the other ports."""
+    setup_ports(
+        fake_process, server, tmp_path, latest="1.0", count=1, missing=["missing"]
+    )
+    fake_process.register(info_args("missing"), returncode=1)
+
+    results = bulk([("p0", None), ("missing", None)], str(tmp_path / "output"))
+
+    assert results[0] == BulkResult("p0", "skipped", "1.0", "1.0", "already up-to-date")
+    assert results[1].status == "failed"
+
+
+@beartype
+def test_bulk_jobs(
+    fake_process: FakeProcess, server: DistfileServer, tmp_path: Path
+) -> None:
+    """Downloads happen in parallel, so the time taken is close to that of one port."""
+    setup_ports(fake_process, server, tmp_path)
+    server.delay = 0.5
+
+    start = time.perf_counter()
+    results = bulk([(f"p{number}", None) for number in range(4)], str(tmp_path), jobs=4)
+    elapsed = time.perf_counter() - start
+
+    assert [result.status for result in results] == ["updated"] * 4
+    # Bumping the ports one at a time would take at least 2 seconds
+    assert elapsed < 1.5
+
+
+@beartype
+def test_summary() -> None:
+    assert summary(
+        [
+            BulkResult("gping", "updated", "1.0", "1.1", "gping.diff"),
+            BulkResult("py-rich", "failed", detail="port info failed"),
+        ]
+    ) == (
+        "PORT     STATUS   OLD  NEW  DETAIL\n"
+        "gping    updated  1.0  1.1  gping.diff\n"
+        "py-rich  failed             port info failed\n"
+        "1 updated, 0 skipped, 1 failed"
+    )
+
+
+@beartype
+def test_summary_livecheck() -> None:
+    """The hit rate of the livecheck cache is shown if it was used."""
+    result = BulkResult("gping", "skipped", "1.0", "1.0", "already up-to-date")
+
+    assert summary([result], {"hits": 1, "revalidated": 0, "misses": 1}).endswith(
+        "0 updated, 1 skipped, 0 failed\n"
+        "Livecheck cache: 1 hits, 0 revalidated, 1 misses (50% hit rate)"
+    )
+    assert summary([result], {"hits": 0, "revalidated": 0, "misses": 0}).endswith(
+        "0 failed"
+    )
+
+
+@beartype
+def test_clip_from_file(
+    fake_process: FakeProcess, server: DistfileServer, tmp_path: Path
+) -> None:
+    setup_ports(fake_process, server, tmp_path, count=2)
+    ports = tmp_path / "ports.txt"
+    ports.write_text("p0\np1 1.0\n")
+
+    result = CliRunner().invoke(
+        clip,
+        ["--from-file", str(ports), "--jobs", "2", "--output", str(tmp_path / "out")],
+    )
+
+    assert result.exit_code == 0
+    assert "1 updated, 1 skipped, 0 failed" in result.output
+    assert (tmp_path / "out" / "p0.diff").exists()
+
+
+@beartype
+def test_clip_from_file_with_name(tmp_path: Path) -> None:
+    ports = tmp_path / "ports.txt"
+    ports.write_text("p0\n")
+
+    result = CliRunner().invoke(clip, ["gping", "--from-file", str(ports)])
+
+    assert result.exit_code == 2
+    assert "can't be used with --from-file" in result.output
+
+
+@beartype
+def test_clip_missing_name() -> None:
+    result = CliRunner().invoke(clip, [])
+
+    assert result.exit_code == 2
+    assert "Missing argument 'NAME'" in result.output
@@ -28,73 +28,72 @@
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-# See https://alexmarandon.com/articles/python_mock_gotchas/
-
-
+import pytest
 from beartype import beartype
 from pytest_subprocess import FakeProcess
 
 from seaport._clipboard.checks import user_path
+from seaport._host import HostProfile, set_profile
 
 
 @beartype
 def test_user_path(fake_process: FakeProcess) -> None:
     # Port prefix
-    fake_process.register_subprocess(
-        ["/usr/bin/which", "port"], stdout=["/opt/local/bin/port\n"]
-    )
-
     assert user_path(True) == "/opt/local/bin"
+    # PATH is searched without running which
+    assert len(fake_process.calls) == 0
 
 
 @beartype
-def test_first_party_path(fake_process: FakeProcess) -> None:
-    fake_process.register_subprocess(
-        ["/usr/bin/which", "port"], stdout=["/opt/local/bin/port\n"]
-    )
-
+def test_first_party_path() -> None:
     # Default prefix (first party tools)
     assert user_path() == "/usr/bin"
 
 
 @beartype
-def test_macports_install_path(fake_process: FakeProcess) -> None:
-    fake_process.register_subprocess(
-        ["/usr/bin/which", "port"], stdout=["/opt/local/bin/port\n"]
-    )
-
-    fake_process.register_subprocess(
-        ["/usr/bin/which", "seaport"], stdout=["/opt/local/bin/seaport\n"]
+def test_macports_install_path() -> None:
+    set_profile(
+        HostProfile(
+            {"port": "/opt/local/bin/port", "seaport": "/opt/local/bin/seaport"}, {}
+        )
     )
 
     assert user_path(False, True) == "/opt/local/bin"
 
 
 @beartype
-def test_homebrew_install_path(fake_process: FakeProcess) -> None:
-    fake_process.register_subprocess(
-        ["/usr/bin/which", "port"], stdout=["/opt/local/bin/port\n"]
-    )
-
-    fake_process.register_subprocess(
-        ["/usr/bin/which", "seaport"], stdout=["/usr/local/bin/seaport\n"]
+def test_homebrew_install_path() -> None:
+    set_profile(
+        HostProfile(
+            {"port": "/opt/local/bin/port", "seaport": "/usr/local/bin/seaport"}, {}
+        )
     )
 
     assert user_path(False, True) == "/usr/local/bin"
 
 
 @beartype
-def test_poetry_install_path(fake_process: FakeProcess) -> None:
-    fake_process.register_subprocess(
-        ["/usr/bin/which", "port"], stdout=["/opt/local/bin/port\n"]
-    )
-
+def test_poetry_install_path() -> None:
     # Poetry example (should default to MacPorts)
-    fake_process.register_subprocess(
-        ["/usr/bin/which", "seaport"],
-        stdout=[
-            "~/Library/Caches/pypoetry/virtualenvs/seaport-kpP_O3aU-py3.8/bin/seaport\n"
-        ],
+    set_profile(
+        HostProfile(
+            {
+                "port": "/opt/local/bin/port",
+                "seaport": "~/Library/Caches/pypoetry/virtualenvs/seaport-kpP_O3aU-py3.8/bin/seaport",
+            },
+            {},
+        )
     )
 
     assert user_path(False, True) == "/opt/local/bin"
+
+
+@beartype
+def test_no_port() -> None:
+    set_profile(HostProfile({}, {}))
+
+    with pytest.raises(RuntimeError, match="MacPorts"):
+        user_path(True)
+    # seaport isn't on the PATH either
+    with pytest.raises(RuntimeError):
+        user_path(False, True)
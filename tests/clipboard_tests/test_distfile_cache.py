@@ -0,0 +1,130 @@
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import hashlib
+import os
+from pathlib import Path
+
+from beartype import beartype
+from click.testing import CliRunner
+
+from seaport._clipboard.distfile_cache import DistfileCache, cache
+from tests.helpers import DISTFILE, DistfileServer
+
+
+@beartype
+def test_fetch(server: DistfileServer, tmp_path: Path) -> None:
+    distfiles = DistfileCache(str(tmp_path))
+    url = f"{server.url}/example-1.0.tar.gz"
+
+    path, sums = distfiles.fetch(url, ["sha256", "size"])
+    assert sums == {
+        "sha256": hashlib.sha256(DISTFILE).hexdigest(),
+        "size": str(len(DISTFILE)),
+    }
+    assert Path(path).read_bytes() == DISTFILE
+    assert "If-None-Match" not in server.requests[-1]
+
+    # The second fetch revalidates, and hashes any new checksum types from the cache
+    assert distfiles.fetch(url, ["sha1", "sha256"]) == (
+        path,
+        {
+            "sha1": hashlib.sha1(DISTFILE).hexdigest(),
+            "sha256": hashlib.sha256(DISTFILE).hexdigest(),
+        },
+    )
+    assert server.requests[-1]["If-None-Match"] == '"v1"'
+    assert distfiles.stats()["hits"] == 1
+    assert distfiles.stats()["misses"] == 1
+
+
+@beartype
+def test_fetch_changed(server: DistfileServer, tmp_path: Path) -> None:
+    """The distfile is downloaded again if it's changed upstream."""
+    distfiles = DistfileCache(str(tmp_path))
+    url = f"{server.url}/example-1.0.tar.gz"
+    distfiles.fetch(url, ["sha256"])
+
+    server.contents = b"new contents"
+    server.etag = '"v2"'
+
+    assert distfiles.fetch(url, ["sha256"])[1] == {
+        "sha256": hashlib.sha256(b"new contents").hexdigest()
+    }
+    assert distfiles.stats()["misses"] == 2
+
+
+@beartype
+def test_fetch_no_etag(server: DistfileServer, tmp_path: Path) -> None:
+    """Without an ETag, the distfile is downloaded again but only stored once."""
+    server.etag = None
+    distfiles = DistfileCache(str(tmp_path))
+
+    distfiles.fetch(f"{server.url}/a.tar.gz", ["sha256"])
+    distfiles.fetch(f"{server.url}/b.tar.gz", ["sha256"])
+
+    assert distfiles.stats()["distfiles"] == 1
+    assert distfiles.stats()["misses"] == 2
+
+
+@beartype
+def test_eviction(server: DistfileServer, tmp_path: Path) -> None:
+    """The least recently used distfiles are removed once the cache is too big."""
+    distfiles = DistfileCache(str(tmp_path), max_size=25)
+
+    paths = []
+    for name in ("a", "b", "c"):
+        server.contents = name.encode("utf-8") * 10
+        paths.append(distfiles.fetch(f"{server.url}/{name}.tar.gz", ["size"])[0])
+    first, second, third = paths
+
+    assert not os.path.exists(first)
+    assert os.path.exists(second) and os.path.exists(third)
+    assert distfiles.stats() == {
+        "hits": 0,
+        "misses": 3,
+        "evictions": 1,
+        "distfiles": 2,
+        "bytes": 20,
+    }
+
+
+@beartype
+def test_stats_command(server: DistfileServer) -> None:
+    DistfileCache().fetch(f"{server.url}/example-1.0.tar.gz", ["sha256"])
+
+    runner = CliRunner()
+    result = runner.invoke(cache, ["stats"])
+    assert result.exit_code == 0
+    assert "misses: 1\n" in result.output
+    assert f"bytes: {len(DISTFILE)}\n" in result.output
+
+    result = runner.invoke(cache, ["clear"])
+    assert result.exit_code == 0
+    assert DistfileCache().stats()["distfiles"] == 0
@@ -0,0 +1,146 @@
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import hashlib
+import json
+import urllib.error
+from pathlib import Path
+
+import pytest
+from beartype import beartype
+
+from seaport._clipboard.download import download
+from tests.helpers import DISTFILE, DistfileServer
+
+
+@beartype
+def test_download(server: DistfileServer, tmp_path: Path) -> None:
+    part = tmp_path / "example.part"
+
+    sums, validators = download(f"{server.url}/example.tar.gz", str(part), ["sha256"])
+
+    assert sums == {"sha256": hashlib.sha256(DISTFILE).hexdigest()}
+    assert validators == {"etag": '"v1"', "last_modified": None}
+    assert part.read_bytes() == DISTFILE
+    assert not (tmp_path / "example.part.json").exists()
+
+
+@beartype
+def test_download_disconnects(server: DistfileServer, tmp_path: Path) -> None:
+    """Downloads resume from where they left off after being cut off."""
+    server.disconnects = 2
+    part = tmp_path / "example.part"
+
+    sums, _ = download(f"{server.url}/example.tar.gz", str(part), ["sha256", "size"])
+
+    assert sums == {
+        "sha256": hashlib.sha256(DISTFILE).hexdigest(),
+        "size": str(len(DISTFILE)),
+    }
+    assert part.read_bytes() == DISTFILE
+    assert len(server.requests) == 3
+    assert "Range" not in server.requests[0]
+    assert server.requests[1]["Range"] == f"bytes={len(DISTFILE) // 2}-"
+    assert server.requests[2]["If-Range"] == '"v1"'
+
+
+@beartype
+def test_download_gives_up(server: DistfileServer, tmp_path: Path) -> None:
+    server.disconnects = 10
+
+    with pytest.raises(Exception):
+        download(
+            f"{server.url}/example.tar.gz",
+            str(tmp_path / "example.part"),
+            ["sha256"],
+            retries=2,
+        )
+
+    assert len(server.requests) == 3
+    # The partial download is kept for next time
+    assert (tmp_path / "example.part").exists()
+
+
+@beartype
+def test_download_resumes_previous_run(server: DistfileServer, tmp_path: Path) -> None:
+    """A partial download left by a previous run is hashed once and then resumed."""
+    part = tmp_path / "example.part"
+    part.write_bytes(DISTFILE[:1000])
+    (tmp_path / "example.part.json").write_text(
+        json.dumps({"etag": '"v1"', "last_modified": None})
+    )
+
+    sums, _ = download(f"{server.url}/example.tar.gz", str(part), ["sha256"])
+
+    assert sums == {"sha256": hashlib.sha256(DISTFILE).hexdigest()}
+    assert server.requests[0]["Range"] == "bytes=1000-"
+    assert part.read_bytes() == DISTFILE
+
+
+@beartype
+def test_download_changed_upstream(server: DistfileServer, tmp_path: Path) -> None:
+    """A partial download is thrown away if the file has changed upstream."""
+    part = tmp_path / "example.part"
+    part.write_bytes(b"old contents")
+    (tmp_path / "example.part.json").write_text(
+        json.dumps({"etag": '"v0"', "last_modified": None})
+    )
+
+    sums, _ = download(f"{server.url}/example.tar.gz", str(part), ["sha256"])
+
+    assert sums == {"sha256": hashlib.sha256(DISTFILE).hexdigest()}
+    assert part.read_bytes() == DISTFILE
+
+
+@beartype
+def test_download_no_ranges(server: DistfileServer, tmp_path: Path) -> None:
+    """The download starts again if the server doesn't support Range requests."""
+    server.ranges = False
+    server.disconnects = 1
+    part = tmp_path / "example.part"
+
+    sums, _ = download(f"{server.url}/example.tar.gz", str(part), ["sha256"])
+
+    assert sums == {"sha256": hashlib.sha256(DISTFILE).hexdigest()}
+    assert part.read_bytes() == DISTFILE
+
+
+@beartype
+def test_download_not_modified(server: DistfileServer, tmp_path: Path) -> None:
+    """304 responses aren't retried."""
+    with pytest.raises(urllib.error.HTTPError) as excinfo:
+        download(
+            f"{server.url}/example.tar.gz",
+            str(tmp_path / "example.part"),
+            ["sha256"],
+            {"If-None-Match": '"v1"'},
+        )
+
+    assert excinfo.value.code == 304
+    assert len(server.requests) == 1
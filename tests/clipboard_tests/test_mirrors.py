@@ -0,0 +1,132 @@
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import hashlib
+import time
+import urllib.error
+
+import pytest
+from beartype import beartype
+from beartype.typing import List
+
+from seaport._clipboard.mirrors import candidates, race
+from seaport._clipboard.portfile.checksums import new_checksums
+from tests.helpers import DISTFILE, DistfileServer
+
+
+@beartype
+def test_candidates() -> None:
+    assert candidates("https://a", ["https://b", "https://a", "https://c"]) == [
+        "https://a",
+        "https://b",
+        "https://c",
+    ]
+
+
+@beartype
+def test_race(mirrors: List[DistfileServer]) -> None:
+    """The mirror that responds first wins, and the others are still timed."""
+    mirrors[0].delay = 0.5
+    mirrors[2].delay = 0.2
+    urls = [f"{mirror.url}/example.tar.gz" for mirror in mirrors]
+
+    winner, response, timings = race(urls)
+
+    assert winner == urls[1]
+    assert response.read() == DISTFILE
+    response.close()
+
+    time.sleep(0.7)
+    assert timings[urls[1]] < timings[urls[2]] < timings[urls[0]]  # type: ignore[operator]
+
+
+@beartype
+def test_race_failures(mirrors: List[DistfileServer]) -> None:
+    """Mirrors that fail don't win, even if they're quicker."""
+    mirrors[1].delay = 0.2
+    urls = ["http://127.0.0.1:1/example.tar.gz", f"{mirrors[1].url}/example.tar.gz"]
+
+    winner, response, timings = race(urls)
+    response.close()
+
+    assert winner == urls[1]
+    assert timings[urls[0]] is None
+
+
+@beartype
+def test_race_web_page(mirrors: List[DistfileServer]) -> None:
+    """A mirror that answers with a "not found" page doesn't win."""
+    mirrors[0].content_type = "text/html; charset=utf-8"
+    mirrors[0].contents = b"<html>Not found</html>"
+    mirrors[1].delay = 0.2
+    urls = [f"{mirror.url}/example.tar.gz" for mirror in mirrors[:2]]
+
+    winner, response, timings = race(urls)
+
+    assert winner == urls[1]
+    assert response.read() == DISTFILE
+    response.close()
+
+
+@beartype
+def test_race_all_fail() -> None:
+    with pytest.raises(urllib.error.URLError):
+        race(["http://127.0.0.1:1/a.tar.gz", "http://127.0.0.1:1/b.tar.gz"])
+
+
+@beartype
+def test_new_checksums_mirrors(
+    mirrors: List[DistfileServer], capsys: pytest.CaptureFixture[str]
+) -> None:
+    """The time to download tracks the fastest mirror, not the slowest."""
+    mirrors[0].delay = 3.0
+    mirrors[2].delay = 1.5
+    urls = [f"{mirror.url}/example.tar.gz" for mirror in mirrors]
+
+    start = time.perf_counter()
+    sums = new_checksums(urls[0], None, ["sha256"], urls[1:])
+    elapsed = time.perf_counter() - start
+
+    assert sums == {"sha256": hashlib.sha256(DISTFILE).hexdigest()}
+    assert elapsed < 1.5
+    assert f"Fastest mirror is {urls[1]}" in capsys.readouterr().out
+
+
+@beartype
+def test_new_checksums_mirrors_cached(mirrors: List[DistfileServer]) -> None:
+    """Once a distfile is cached, it's revalidated against the main url, without a race."""
+    urls = [f"{mirror.url}/example.tar.gz" for mirror in mirrors]
+    mirrors[0].delay = 0.5
+
+    first = new_checksums(urls[0], None, ["sha256"], urls[1:])
+    requests = [len(mirror.requests) for mirror in mirrors]
+
+    assert new_checksums(urls[0], None, ["sha256"], urls[1:]) == first
+    assert len(mirrors[0].requests) == requests[0] + 1
+    assert [len(mirror.requests) for mirror in mirrors[1:]] == requests[1:]
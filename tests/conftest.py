@@ -0,0 +1,157 @@
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Fixtures shared between the tests."""
+
+import contextlib
+import threading
+from pathlib import Path
+
+import pytest
+from beartype import beartype
+from beartype.typing import Iterator, List
+
+from seaport._host import HostProfile, set_profile
+from tests.helpers import DistfileServer, GitHubServer, git
+
+#: The host the tests run on, so nothing is looked up on the real one.
+HOST = HostProfile(
+    tools={
+        "port": "/opt/local/bin/port",
+        "seaport": "/usr/local/bin/seaport",
+        "sw_vers": "/usr/bin/sw_vers",
+        "xcodebuild": "/usr/bin/xcodebuild",
+        "xcode-select": "/usr/bin/xcode-select",
+    },
+    facts={
+        "macos_version": "10.15.6",
+        "macos_build": "19G73",
+        "xcode_version": "Xcode 12.3\nBuild version 12C33",
+        "clt_version": "xcode-select version 2373.",
+    },
+)
+
+
+@pytest.fixture
+def server() -> Iterator[DistfileServer]:
+    """Runs a DistfileServer in the background."""
+    with _serve() as httpd:
+        yield httpd
+
+
+@pytest.fixture
+def mirrors() -> Iterator[List[DistfileServer]]:
+    """Runs three DistfileServers in the background, to act as mirrors of each other."""
+    with _serve() as first, _serve() as second, _serve() as third:
+        yield [first, second, third]
+
+
+@contextlib.contextmanager
+def _serve() -> Iterator[DistfileServer]:
+    """Runs a DistfileServer in a background thread until the context exits."""
+    httpd = DistfileServer()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield httpd
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+@beartype
+def cache_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Keeps the tests from using the user's cache directory."""
+    directory = tmp_path / "seaport-cache"
+    monkeypatch.setenv("SEAPORT_CACHE_DIR", str(directory))
+    return directory
+
+
+@pytest.fixture(autouse=True)
+@beartype
+def no_backoff(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Retry failed downloads (and check for new forks) straight away."""
+    monkeypatch.setattr("seaport._clipboard.download.BACKOFF", 0.0)
+    monkeypatch.setattr("seaport._pull_request.github.FORK_BACKOFF", 0.0)
+
+
+@pytest.fixture(autouse=True)
+@beartype
+def no_port_session(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Runs each port command in its own process, so fake_process can stand in for it."""
+    monkeypatch.setenv("SEAPORT_PORT_SESSION", "0")
+
+
+@pytest.fixture(autouse=True)
+def host() -> Iterator[HostProfile]:
+    """Describes a host with MacPorts in /opt/local and seaport in /usr/local."""
+    set_profile(HOST)
+    yield HOST
+    set_profile(None)
+
+
+#: The directories of the stand-in ports tree.
+TREE = ["_resources/port1.0/group", "python/py-rich", "python/py-base91", "net/gping"]
+
+
+@pytest.fixture
+def upstream(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> str:
+    """A bare repo standing in for macports/macports-ports."""
+    # seaport's own commits don't depend on the user's config either
+    for variable in ("GIT_AUTHOR", "GIT_COMMITTER"):
+        monkeypatch.setenv(f"{variable}_NAME", "seaport")
+        monkeypatch.setenv(f"{variable}_EMAIL", "seaport@example.com")
+    work = tmp_path / "work"
+    for directory in TREE:
+        (work / directory).mkdir(parents=True)
+        (work / directory / "Portfile").write_text(f"# {directory}\n" * 1000)
+    (work / "README.md").write_text("ports\n")
+    git("init", "-q", "-b", "master", str(work))
+    git("-C", str(work), "add", ".")
+    git("-C", str(work), "commit", "-q", "-m", "Initial commit")
+
+    bare = tmp_path / "upstream.git"
+    git("clone", "-q", "--bare", str(work), str(bare))
+    # Allows blobless clones
+    git("-C", str(bare), "config", "uploadpack.allowFilter", "true")
+    return f"file://{bare}"
+
+
+@pytest.fixture
+def github_server() -> Iterator[GitHubServer]:
+    """Runs a GitHubServer in the background."""
+    httpd = GitHubServer()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield httpd
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
@@ -0,0 +1,258 @@
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+"""Stand-ins and helpers shared between the tests."""
+
+import http.server
+import json
+import subprocess
+import time
+from pathlib import Path
+
+from beartype import beartype
+from beartype.typing import Any, Dict, List, Optional, Set, Tuple
+
+#: The records of the example PortIndex written by write_index.
+RECORDS: Dict[str, str] = {
+    "gping": "categories net depends_build {port:rust port:cargo} description {Ping, but with a graph} "
+    "epoch 0 homepage https://github.com/orf/gping maintainers {{harens @harens} openmaintainer} "
+    "name gping portdir net/gping revision 0 version 1.16.1",
+    "py-base91": 'categories python description "Base91 \\"encoding\\"" epoch 0 '
+    "homepage https://github.com/aberaud/base91-python maintainers nomaintainer name py-base91 "
+    "portdir python/py-base91 revision 1 subports {py38-base91 py39-base91} version 1.0.1",
+    "MyPort": "categories {devel lang} epoch 2 name MyPort portdir devel/MyPort revision 0 version 3.0",
+}
+
+
+@beartype
+def write_index(directory: Path, quick: bool = True) -> str:
+    """Writes an example PortIndex (and PortIndex.quick) for testing."""
+    index = b""
+    quick_contents = b""
+    for name, record in RECORDS.items():
+        body = f"{record}\n".encode("utf-8")
+        quick_contents += f"{name.lower()} {len(index)}\n".encode("utf-8")
+        index += f"{name} {len(body)}\n".encode("utf-8") + body
+
+    (directory / "PortIndex").write_bytes(index)
+    if quick:
+        (directory / "PortIndex.quick").write_bytes(quick_contents)
+    return str(directory / "PortIndex")
+
+
+#: The default contents of the distfile served by DistfileServer.
+DISTFILE = b"example distfile contents\n" * 100_000
+
+
+class DistfileServer(http.server.ThreadingHTTPServer):
+    """A local stand-in for a distfile mirror.
+
+    Attributes:
+        url (str): The base url of the server
+        contents (bytes): What's served at every path
+        etag (Optional[str]): The ETag sent with the contents (if any)
+        content_type (str): The Content-Type sent with the contents
+        ranges (bool): Whether Range requests are supported
+        disconnects (int): How many responses to cut off part way through
+        delay (float): How many seconds to wait before responding
+        requests (List[Dict[str, str]]): The headers of every request received
+    """
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), DistfileHandler)
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+        self.contents = DISTFILE
+        self.etag: Optional[str] = '"v1"'
+        self.content_type = "application/x-gzip"
+        self.ranges = True
+        self.disconnects = 0
+        self.delay = 0.0
+        self.requests: List[Dict[str, str]] = []
+
+
+class DistfileHandler(http.server.BaseHTTPRequestHandler):
+    """Serves the server's contents, answering 304 if the ETag matches."""
+
+    server: DistfileServer
+
+    def do_GET(self) -> None:
+        self.server.requests.append(dict(self.headers))
+        time.sleep(self.server.delay)
+        etag = self.server.etag
+        if etag is not None and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        contents = self.server.contents
+        start = 0
+        if (
+            self.server.ranges
+            and self.headers.get("Range", "").startswith("bytes=")
+            and self.headers.get("If-Range", etag) == etag
+        ):
+            start = int(self.headers["Range"][6:].rstrip("-"))
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {start}-{len(contents) - 1}/{len(contents)}"
+            )
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(contents) - start))
+        self.send_header("Content-Type", self.server.content_type)
+        if etag is not None:
+            self.send_header("ETag", etag)
+        self.end_headers()
+
+        if self.server.disconnects:
+            # Only send half of what's left before dropping the connection
+            self.server.disconnects -= 1
+            self.wfile.write(contents[start : (start + len(contents)) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(contents[start:])
+
+    def log_message(self, *args: object) -> None:
+        """Don't clutter the test output."""
+
+
+@beartype
+def git(*args: str) -> str:
+    """Runs git, as a committer that doesn't depend on the user's config."""
+    return subprocess.run(
+        ["git", "-c", "user.name=seaport", "-c", "user.email=seaport@example.com"]
+        + list(args),
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+
+#: The fork that the stand-in creates for the user.
+FORK = "/repos/harens/macports-ports"
+
+#: The upstream repo.
+UPSTREAM = "/repos/macports/macports-ports"
+
+
+class GitHubServer(http.server.ThreadingHTTPServer):
+    """A local stand-in for the endpoints of the GitHub API that seaport uses.
+
+    Attributes:
+        url (str): The base url of the server
+        requests (List[Tuple[str, str, Any]]): The method, path and JSON of each request
+        clients (Set[int]): The port of every connection made to the server
+        branches (Set[str]): The branches on the fork
+        tokens (List[str]): The Authorization header of each request
+        creating (int): How many more times the fork is reported missing, as it is
+            while GitHub creates it
+    """
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), GitHubHandler)
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+        self.requests: List[Tuple[str, str, Any]] = []
+        self.clients: Set[int] = set()
+        self.branches: Set[str] = set()
+        self.tokens: List[str] = []
+        self.creating = 0
+
+    def count(self, endpoint: str) -> int:
+        """How many POST requests have been sent to an endpoint of the fork."""
+        return sum(
+            method == "POST" and path == f"{FORK}/git/{endpoint}"
+            for method, path, _ in self.requests
+        )
+
+
+class GitHubHandler(http.server.BaseHTTPRequestHandler):
+    """Answers like the GitHub API, remembering what was sent."""
+
+    server: GitHubServer
+    # Keeps connections open between requests
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        self.respond()
+
+    def do_POST(self) -> None:
+        self.respond()
+
+    def do_PATCH(self) -> None:
+        self.respond()
+
+    def respond(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length)) if length else None
+        self.server.requests.append((self.command, self.path, payload))
+        self.server.clients.add(self.client_address[1])
+        self.server.tokens.append(self.headers["Authorization"])
+
+        status, response = self.route(payload)
+        body = json.dumps(response).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def route(self, payload: Any) -> Tuple[int, Dict[str, Any]]:
+        """The status and JSON to respond with."""
+        request = (self.command, self.path)
+        if request == ("POST", f"{UPSTREAM}/forks"):
+            return 202, {"full_name": "harens/macports-ports"}
+        if request == ("GET", f"{FORK}/git/ref/heads/master"):
+            if self.server.creating:
+                self.server.creating -= 1
+                return 404, {"message": "Not Found"}
+            return 200, {"object": {"sha": "upstream-commit"}}
+        if request == ("GET", f"{UPSTREAM}/git/ref/heads/master"):
+            return 200, {"object": {"sha": "upstream-commit"}}
+        if request == ("GET", f"{UPSTREAM}/git/commits/upstream-commit"):
+            return 200, {"tree": {"sha": "upstream-tree"}}
+        # Numbered, so each commit of a PR can be told apart
+        if request == ("POST", f"{FORK}/git/trees"):
+            return 201, {"sha": f"tree-{self.server.count('trees')}"}
+        if request == ("POST", f"{FORK}/git/commits"):
+            return 201, {"sha": f"commit-{self.server.count('commits')}"}
+        if request == ("POST", f"{FORK}/git/refs"):
+            if payload["ref"] in self.server.branches:
+                return 422, {"message": "Reference already exists"}
+            self.server.branches.add(payload["ref"])
+            return 201, {"ref": payload["ref"]}
+        if self.command == "PATCH" and self.path.startswith(f"{FORK}/git/refs/"):
+            return 200, {"ref": self.path}
+        if request == ("POST", f"{UPSTREAM}/pulls"):
+            return 201, {
+                "html_url": "https://github.com/macports/macports-ports/pull/1"
+            }
+        return 404, {"message": "Not Found"}
+
+    def log_message(self, *args: object) -> None:
+        """Don't clutter the test output."""
@@ -0,0 +1,180 @@
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+from pathlib import Path
+
+import pytest
+from beartype import beartype
+from beartype.typing import List
+from click.testing import CliRunner
+from pytest_subprocess import FakeProcess
+
+from seaport._init import seaport
+from seaport._pull_request.batch import Update, bump_ports, pr_title
+from tests.clipboard_tests.test_bulk import PORTFILE, setup_ports
+from tests.helpers import FORK, UPSTREAM, DistfileServer, GitHubServer
+from tests.test_portfile import info_args
+
+
+@beartype
+def test_bump_ports(
+    fake_process: FakeProcess, server: DistfileServer, tmp_path: Path
+) -> None:
+    setup_ports(fake_process, server, tmp_path, count=2)
+
+    updates = bump_ports(["p0", "p1"])
+
+    assert [update[:3] for update in updates] == [
+        ("p0", "net", "1.1"),
+        ("p1", "net", "1.1"),
+    ]
+    assert "version 1.1\nrevision 0\n" in updates[0].contents
+    # The ports are only looked up once
+    assert fake_process.call_count(info_args("p0", "p1")) == 1
+    # The local portfiles are left alone
+    assert (tmp_path / "p0" / "Portfile").read_text() == PORTFILE.format(name="p0")
+
+
+@beartype
+def test_bump_ports_up_to_date(
+    fake_process: FakeProcess, server: DistfileServer, tmp_path: Path
+) -> None:
+    """The ports are sent together, so none are sent if one can't be bumped."""
+    setup_ports(fake_process, server, tmp_path, latest="1.0", count=2)
+
+    with pytest.raises(SystemExit):
+        bump_ports(["p0", "p1"])
+
+
+@beartype
+def test_bump_ports_lint(
+    fake_process: FakeProcess,
+    server: DistfileServer,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Each port is linted with every new portfile in place, then reverted."""
+    setup_ports(fake_process, server, tmp_path, count=2)
+    for name in ("p0", "p1"):
+        fake_process.register(
+            ["/opt/local/bin/port", "file", name],
+            stdout=[str(tmp_path / name / "Portfile")],
+        )
+    linted: List[List[str]] = []
+
+    @beartype
+    def perform_lint(name: str) -> bool:
+        linted.append(
+            [(tmp_path / other / "Portfile").read_text() for other in ("p0", "p1")]
+        )
+        return True
+
+    monkeypatch.setattr("seaport._pull_request.batch.perform_lint", perform_lint)
+
+    updates = bump_ports(["p0", "p1"], lint=True)
+
+    assert linted == [[update.contents for update in updates]] * 2
+    assert (tmp_path / "p0" / "Portfile").read_text() == PORTFILE.format(name="p0")
+
+
+@pytest.mark.parametrize("error", [KeyboardInterrupt, SystemExit, OSError])
+@beartype
+def test_bump_ports_interrupted(
+    fake_process: FakeProcess,
+    server: DistfileServer,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    error: type,
+) -> None:
+    """The local portfiles are restored however the checks end, even with --write."""
+    setup_ports(fake_process, server, tmp_path, count=2)
+    for name in ("p0", "p1"):
+        fake_process.register(
+            ["/opt/local/bin/port", "file", name],
+            stdout=[str(tmp_path / name / "Portfile")],
+        )
+
+    @beartype
+    def perform_lint(name: str) -> bool:
+        raise error()
+
+    monkeypatch.setattr("seaport._pull_request.batch.perform_lint", perform_lint)
+
+    with pytest.raises(error):
+        bump_ports(["p0", "p1"], lint=True, write=True)
+
+    for name in ("p0", "p1"):
+        assert (tmp_path / name / "Portfile").read_text() == PORTFILE.format(name=name)
+
+
+@beartype
+def test_pr_title() -> None:
+    assert pr_title(
+        [Update("p0", "net", "1.1", ""), Update("p1", "net", "1.1", "")]
+    ) == ("p0, p1: update to 1.1")
+
+
+@beartype
+def test_pr_several(
+    fake_process: FakeProcess,
+    server: DistfileServer,
+    github_server: GitHubServer,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Several ports are sent in one PR, with a commit for each."""
+    setup_ports(fake_process, server, tmp_path, count=2)
+    monkeypatch.setenv("SEAPORT_GITHUB_API", github_server.url)
+    monkeypatch.setenv("GITHUB_TOKEN", "secret")
+    monkeypatch.setenv("GITHUB_ACTIONS", "true")
+
+    result = CliRunner().invoke(
+        seaport, ["pr", "p0", "p1", str(tmp_path), "--remote-commit"]
+    )
+    assert result.exit_code == 0, result.output
+
+    commits = [
+        payload
+        for method, path, payload in github_server.requests
+        if (method, path) == ("POST", f"{FORK}/git/commits")
+    ]
+    assert [commit["message"] for commit in commits] == [
+        "p0: update to 1.1",
+        "p1: update to 1.1",
+    ]
+    # Each commit builds on the last
+    assert [commit["parents"] for commit in commits] == [
+        ["upstream-commit"],
+        ["commit-1"],
+    ]
+    method, path, pull = github_server.requests[-1]
+    assert (method, path) == ("POST", f"{UPSTREAM}/pulls")
+    assert pull["title"] == "p0, p1: update to 1.1"
+    assert pull["head"] == "harens:seaport-p0-p1-1.1"
+    assert "- [ ] checked your Portfile with `port lint`?" in pull["body"]
@@ -28,92 +28,222 @@
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+
+import json
+import os
 import subprocess
+from pathlib import Path
 
+import pytest
 from beartype import beartype
-from pytest_mock import MockFixture
+from beartype.typing import List
 from pytest_subprocess import FakeProcess
-from pytest_subprocess.fake_popen import FakePopen
 
-from seaport._pull_request.clone import pr_variables, sync_fork
+from seaport._host import HostProfile, set_profile
+from seaport._profile import calls
+from seaport._pull_request.clone import (
+    pr_variables,
+    sparse_clone,
+    sync_fork,
+    update_fork,
+)
+from seaport._pull_request.plumbing import commit_files
+from tests.helpers import git
 
 
 @beartype
-def test_new_contents(fake_process: FakeProcess, session_mocker: MockFixture) -> None:
-    # There's not really much to test here
-    # TODO: Properly test this
-
-    # default path
-    session_mocker.patch(
-        "seaport._pull_request.clone.user_path", return_value="/some/path"
+def checked_out(repo: Path) -> List[str]:
+    """Every file in the working tree (outside of .git)."""
+    return sorted(
+        str(Path(root, name).relative_to(repo))
+        for root, _, names in os.walk(repo)
+        if ".git" not in Path(root).relative_to(repo).parts
+        for name in names
     )
 
-    session_mocker.patch("os.chdir", return_value=None)
 
-    fake_process.register_subprocess(
-        ["/some/path/git", "fetch", "upstream"],
-        stdout=["Fetching upstream\n"],
-    )
+@beartype
+def test_sparse_clone(tmp_path: Path, upstream: str) -> None:
+    """Only _resources and top-level files are checked out."""
+    repo = tmp_path / "macports-ports"
 
-    fake_process.register_subprocess(
-        ["/some/path/git", "checkout", "-f", "master"],
-        stdout=["Checking out\n"],
-    )
+    assert sparse_clone(str(repo), upstream)
+    assert checked_out(repo) == ["README.md", "_resources/port1.0/group/Portfile"]
+    # The contents of the portfiles weren't downloaded
+    missing = git("-C", str(repo), "rev-list", "--objects", "--all", "--missing=print")
+    assert len([line for line in missing.splitlines() if line.startswith("?")]) == 3
 
-    fake_process.register_subprocess(
-        ["/some/path/git", "merge", "upstream/master"],
-        stdout=["Merging\n"],
-    )
 
-    fake_process.register_subprocess(
-        ["/some/path/git", "push"],
-        stdout=["Pushing\n"],
-    )
+@beartype
+def test_sparse_clone_existing(tmp_path: Path, upstream: str) -> None:
+    """An existing clone (even a full one) is left as it is."""
+    repo = tmp_path / "macports-ports"
+    git("clone", "-q", upstream, str(repo))
 
-    sync_fork("~/Desktop")
+    assert not sparse_clone(str(repo), upstream)
+    assert "python/py-base91/Portfile" in checked_out(repo)
 
 
 @beartype
-def callback_info(process: FakePopen) -> None:
-    """`xcodebuild` output if xcode isn't installed"""
-    process.returncode = 1
-    raise subprocess.CalledProcessError(1, cmd="xcodebuild -version")
+def push_upstream(upstream: str, tmp_path: Path) -> str:
+    """Adds a commit to upstream master, returning its hash."""
+    work = str(tmp_path / "work")
+    Path(work, "net/gping/Portfile").write_text("# gping 1.2\n")
+    git("-C", work, "commit", "-q", "-am", "gping: update to 1.2")
+    git("-C", work, "push", "-q", upstream, "master")
+    return git("-C", work, "rev-parse", "HEAD").strip()
+
+
+@pytest.fixture
+def fork(tmp_path: Path, upstream: str) -> Path:
+    """A sparse clone, after gh repo fork has renamed origin to upstream."""
+    repo = tmp_path / "macports-ports"
+    sparse_clone(str(repo), upstream)
+    git("-C", str(repo), "remote", "rename", "origin", "upstream")
+    return repo
 
 
 @beartype
-def test_pr_variables(fake_process: FakeProcess, session_mocker: MockFixture) -> None:
-    # default path
-    session_mocker.patch(
-        "seaport._pull_request.clone.user_path", return_value="/some/path"
-    )
+def fetches(before: int) -> int:
+    """How many times git fetch was run since before calls."""
+    return len([call for call in calls()[before:] if "fetch" in call.args])
+
+
+@beartype
+def test_sync_fork(tmp_path: Path, upstream: str, fork: Path) -> None:
+    """Upstream is only fetched once in the freshness window."""
+    before = len(calls())
+    first = sync_fork(str(tmp_path), 60.0)
+    assert first == git("-C", str(fork), "rev-parse", "HEAD").strip()
+
+    newer = push_upstream(upstream, tmp_path)
+    assert sync_fork(f"{tmp_path}/", 60.0) == first
+    assert fetches(before) == 1
+
+    # Outside the window
+    assert sync_fork(str(tmp_path), 0.0) == newer
+    assert fetches(before) == 2
+    # The new portfile wasn't downloaded
+    missing = git("-C", str(fork), "rev-list", "--objects", "--missing=print", newer)
+    assert "?" in missing
+    # Nothing was checked out, merged or pushed
+    assert git("-C", str(fork), "rev-parse", "master").strip() == first
+
+
+@beartype
+def test_sync_fork_corrupt(tmp_path: Path, fork: Path) -> None:
+    (fork / ".git" / "seaport-sync.json").write_text("{")
+    assert sync_fork(str(tmp_path), 60.0)
+    assert json.loads((fork / ".git" / "seaport-sync.json").read_text())["synced"]
+
+
+@beartype
+def test_sync_fork_ttl(
+    tmp_path: Path, upstream: str, fork: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    sync_fork(str(tmp_path))
+    newer = push_upstream(upstream, tmp_path)
+    monkeypatch.setenv("SEAPORT_SYNC_TTL", "0")
+    assert sync_fork(str(tmp_path)) == newer
 
-    # If everything works
 
-    fake_process.register_subprocess(
-        ["/some/path/sw_vers", "-productVersion"], stdout=["10.15.6\n"], occurrences=2
+@beartype
+def fake_gh(tmp_path: Path, upstream: str) -> Path:
+    """Adds the user's fork on GitHub as origin, which is behind upstream.
+
+    Returns:
+        Path: A stand-in for gh, which logs its arguments to gh.log and syncs the fork
+        (which GitHub does on its side)
+    """
+    remote = tmp_path / "fork.git"
+    git("clone", "-q", "--bare", upstream, str(remote))
+    git("-C", str(tmp_path / "macports-ports"), "remote", "add", "origin", f"file://{remote}")  # fmt: skip
+    gh = tmp_path / "bin" / "gh"
+    gh.parent.mkdir()
+    gh.write_text(
+        f"#!/bin/sh\necho \"$@\" >> {tmp_path / 'gh.log'}\n"
+        f"git --git-dir={remote} fetch -q {upstream} master:master\n"
     )
+    gh.chmod(0o755)
+    return gh
+
 
-    fake_process.register_subprocess(
-        ["/some/path/sw_vers", "-buildVersion"], stdout=["19G73\n"], occurrences=2
+@beartype
+def test_update_fork(tmp_path: Path, upstream: str, fork: Path) -> None:
+    """A branch can be pushed once the fork has caught up, without fetching blobs."""
+    gh = fake_gh(tmp_path, upstream)
+    push_upstream(upstream, tmp_path)
+    commit = commit_files(
+        str(fork),
+        sync_fork(str(tmp_path), 0.0),
+        {"python/py-rich/Portfile": "# py-rich 13.4\n"},
+        "py-rich: update to 13.4",
     )
 
-    fake_process.register_subprocess(
-        ["/some/path/xcodebuild", "-version"],
-        stdout=["Xcode 12.3\nBuild version 12C33\n"],
+    # The blobs upstream added can't be fetched
+    git("-C", str(fork), "remote", "set-url", "upstream", f"file://{tmp_path}/gone")
+    push = [
+        "-C",
+        str(fork),
+        "push",
+        "-q",
+        "--no-thin",
+        "origin",
+        f"{commit}:refs/heads/pr",
+    ]
+    with pytest.raises(subprocess.CalledProcessError):
+        git(*push)
+
+    update_fork(str(fork), "harens", str(gh))
+    git(*push)
+
+    assert (tmp_path / "gh.log").read_text() == (
+        "repo sync harens/macports-ports --branch master\n"
+    )
+    assert git("--git-dir", str(tmp_path / "fork.git"), "rev-parse", "pr").strip() == (
+        commit
     )
 
-    assert pr_variables() == ("10.15.6 19G73", "Xcode 12.3 12C33")
 
-    # If Xcode isn't installed
+@beartype
+def test_update_fork_once(tmp_path: Path, upstream: str, fork: Path) -> None:
+    """Back-to-back PRs only sync the fork once."""
+    gh = fake_gh(tmp_path, upstream)
+    push_upstream(upstream, tmp_path)
 
-    fake_process.register_subprocess(
-        ["/some/path/xcodebuild", "-version"],
-        callback=callback_info,
-    )
+    for _ in range(2):
+        sync_fork(str(tmp_path), 60.0)
+        update_fork(str(fork), "harens", str(gh), 60.0)
+    assert len((tmp_path / "gh.log").read_text().splitlines()) == 1
+    state = json.loads((fork / ".git" / "seaport-sync.json").read_text())
+    assert state["fork"] == state["upstream"]
 
-    fake_process.register_subprocess(
-        ["/some/path/xcode-select", "--version"],
-        stdout=["xcode-select version 2373.\n"],
-    )
 
+@beartype
+def test_update_fork_contained(tmp_path: Path, upstream: str, fork: Path) -> None:
+    """The fork isn't synced if it already has upstream master, however long ago."""
+    gh = fake_gh(tmp_path, upstream)
+    sync_fork(str(tmp_path), 0.0)
+    git("-C", str(fork), "fetch", "-q", "origin")
+
+    update_fork(str(fork), "harens", str(gh), 0.0)
+    assert not (tmp_path / "gh.log").exists()
+
+    # Until upstream moves on
+    push_upstream(upstream, tmp_path)
+    sync_fork(str(tmp_path), 0.0)
+    update_fork(str(fork), "harens", str(gh), 0.0)
+    assert (tmp_path / "gh.log").exists()
+
+
+@beartype
+def test_pr_variables(fake_process: FakeProcess, host: HostProfile) -> None:
+    # If everything works
+    assert pr_variables() == ("10.15.6 19G73", "Xcode 12.3 12C33")
+
+    # If Xcode isn't installed
+    set_profile(HostProfile(host.tools, {**host.facts, "xcode_version": ""}))
     assert pr_variables() == ("10.15.6 19G73", "xcode-select version 2373.")
+
+    # The facts come from the host profile
+    assert len(fake_process.calls) == 0
@@ -0,0 +1,178 @@
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import pytest
+from beartype import beartype
+from pytest_subprocess import FakeProcess
+
+from seaport._pull_request.github import (
+    GitHub,
+    GitHubError,
+    github_token,
+    remote_commit_pr,
+)
+from tests.helpers import FORK, UPSTREAM, GitHubServer
+
+
+@beartype
+def test_remote_commit_pr(github_server: GitHubServer) -> None:
+    github = GitHub("secret", github_server.url)
+    pull = remote_commit_pr(
+        github,
+        [("gping: update to 1.2", {"net/gping/Portfile": "# gping 1.2\n"})],
+        "seaport-gping-1.2",
+        "gping: update to 1.2",
+        "Created with seaport",
+    )
+    github.close()
+
+    assert pull == "https://github.com/macports/macports-ports/pull/1"
+    assert github_server.requests == [
+        ("POST", f"{UPSTREAM}/forks", None),
+        ("GET", f"{FORK}/git/ref/heads/master", None),
+        ("GET", f"{UPSTREAM}/git/ref/heads/master", None),
+        ("GET", f"{UPSTREAM}/git/commits/upstream-commit", None),
+        (
+            "POST",
+            f"{FORK}/git/trees",
+            {
+                "base_tree": "upstream-tree",
+                "tree": [
+                    {
+                        "path": "net/gping/Portfile",
+                        "mode": "100644",
+                        "type": "blob",
+                        "content": "# gping 1.2\n",
+                    }
+                ],
+            },
+        ),
+        (
+            "POST",
+            f"{FORK}/git/commits",
+            {
+                "message": "gping: update to 1.2",
+                "tree": "tree-1",
+                "parents": ["upstream-commit"],
+            },
+        ),
+        (
+            "POST",
+            f"{FORK}/git/refs",
+            {"ref": "refs/heads/seaport-gping-1.2", "sha": "commit-1"},
+        ),
+        (
+            "POST",
+            f"{UPSTREAM}/pulls",
+            {
+                "title": "gping: update to 1.2",
+                "head": "harens:seaport-gping-1.2",
+                "base": "master",
+                "body": "Created with seaport",
+            },
+        ),
+    ]
+    # Every request went over the same connection
+    assert len(github_server.clients) == 1
+    assert set(github_server.tokens) == {"Bearer secret"}
+
+
+@beartype
+def test_existing_branch(github_server: GitHubServer) -> None:
+    """A branch left over from an earlier PR is moved to the new commit."""
+    github_server.branches.add("refs/heads/seaport-gping-1.2")
+    remote_commit_pr(
+        GitHub("secret", github_server.url),
+        [("gping: update to 1.2", {"net/gping/Portfile": "# gping 1.2\n"})],
+        "seaport-gping-1.2",
+        "gping: update to 1.2",
+        "Created with seaport",
+    )
+
+    assert (
+        "PATCH",
+        f"{FORK}/git/refs/heads/seaport-gping-1.2",
+        {"sha": "commit-1", "force": True},
+    ) in github_server.requests
+
+
+@beartype
+def test_new_fork(github_server: GitHubServer) -> None:
+    """Nothing is created in a new fork until GitHub has finished creating it."""
+    github_server.creating = 3
+    remote_commit_pr(
+        GitHub("secret", github_server.url),
+        [("gping: update to 1.2", {"net/gping/Portfile": "# gping 1.2\n"})],
+        "seaport-gping-1.2",
+        "gping: update to 1.2",
+        "Created with seaport",
+    )
+
+    methods = [method for method, _, _ in github_server.requests]
+    assert methods[:6] == ["POST", "GET", "GET", "GET", "GET", "GET"]
+    assert github_server.requests[4][1] == f"{FORK}/git/ref/heads/master"
+    assert github_server.count("trees") == 1
+
+
+@beartype
+def test_fork_never_created(github_server: GitHubServer) -> None:
+    github_server.creating = 100
+    with pytest.raises(GitHubError) as error:
+        remote_commit_pr(
+            GitHub("secret", github_server.url),
+            [("gping: update to 1.2", {"net/gping/Portfile": "# gping 1.2\n"})],
+            "seaport-gping-1.2",
+            "gping: update to 1.2",
+            "Created with seaport",
+        )
+    assert error.value.status == 404
+    # The first check, and then FORK_RETRIES more
+    assert github_server.creating == 100 - 7
+    assert github_server.count("trees") == 0
+
+
+@beartype
+def test_github_error(github_server: GitHubServer) -> None:
+    with pytest.raises(GitHubError, match="Not Found") as error:
+        GitHub("secret", github_server.url).call("GET", "/missing")
+    assert error.value.status == 404
+
+
+@beartype
+def test_github_token(
+    monkeypatch: pytest.MonkeyPatch, fake_process: FakeProcess
+) -> None:
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    monkeypatch.setenv("GH_TOKEN", "from-env")
+    assert github_token() == "from-env"
+
+    # Otherwise gh's token is used
+    monkeypatch.delenv("GH_TOKEN")
+    fake_process.register(["/usr/local/bin/gh", "auth", "token"], stdout=["gho_123\n"])
+    assert github_token() == "gho_123"
@@ -0,0 +1,138 @@
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import concurrent.futures
+import os
+from pathlib import Path
+
+from beartype import beartype
+
+from seaport._profile import calls
+from seaport._pull_request.clone import sparse_clone, sync_fork
+from seaport._pull_request.plumbing import commit_files
+from tests.helpers import git
+
+
+@beartype
+def test_commit_files(tmp_path: Path, upstream: str) -> None:
+    """Files are changed and added without touching the working tree or index."""
+    repo = str(tmp_path / "macports-ports")
+    sparse_clone(repo, upstream)
+    head = git("-C", repo, "rev-parse", "HEAD").strip()
+
+    commit = commit_files(
+        repo,
+        "origin/master",
+        {"net/gping/Portfile": "# gping 1.2\n", "devel/new/Portfile": "# new\n"},
+        "gping: update to 1.2",
+    )
+
+    assert git("-C", repo, "show", "-s", "--format=%P %s", commit) == (
+        f"{head} gping: update to 1.2\n"
+    )
+    assert git("-C", repo, "diff-tree", "-r", "--name-status", head, commit) == (
+        "A\tdevel/new/Portfile\nM\tnet/gping/Portfile\n"
+    )
+    assert git("-C", repo, "show", f"{commit}:net/gping/Portfile") == "# gping 1.2\n"
+    # Nothing was checked out
+    assert git("-C", repo, "rev-parse", "HEAD").strip() == head
+    assert git("-C", repo, "status", "--porcelain") == ""
+    assert not os.path.exists(f"{repo}/net")
+
+    # The commit can be pushed without a branch
+    git("-C", repo, "push", "-q", "origin", f"{commit}:refs/heads/seaport-gping-1.2")
+    assert git("ls-remote", upstream, "seaport-gping-1.2").split()[0] == commit
+
+
+@beartype
+def test_commit_files_mode(tmp_path: Path, upstream: str) -> None:
+    """Executable files stay executable."""
+    repo = str(tmp_path / "macports-ports")
+    sparse_clone(repo, upstream)
+    git("-C", repo, "sparse-checkout", "add", "net/gping")
+    os.chmod(f"{repo}/net/gping/Portfile", 0o755)
+    git("-C", repo, "commit", "-q", "-am", "Executable")
+
+    commit = commit_files(repo, "HEAD", {"net/gping/Portfile": "# new\n"}, "Update")
+    assert git("-C", repo, "ls-tree", commit, "net/gping/Portfile").startswith(
+        "100755 blob"
+    )
+
+
+@beartype
+def test_commit_files_processes(tmp_path: Path, upstream: str) -> None:
+    """Only the trees on the way to the file are read and rewritten."""
+    repo = str(tmp_path / "macports-ports")
+    sparse_clone(repo, upstream)
+    before = len(calls())
+
+    commit_files(repo, "HEAD", {"net/gping/Portfile": "# new\n"}, "Update")
+    # ls-tree and mktree for each of the three trees, then hash-object and commit-tree
+    assert [call.args[3] for call in calls()[before:]] == [
+        "ls-tree",
+        "ls-tree",
+        "ls-tree",
+        "hash-object",
+        "mktree",
+        "mktree",
+        "mktree",
+        "commit-tree",
+    ]
+
+
+@beartype
+def test_commit_files_concurrent(tmp_path: Path, upstream: str) -> None:
+    """PRs made at the same time from one clone don't pick up each other's files."""
+    repo = str(tmp_path / "macports-ports")
+    sparse_clone(repo, upstream)
+    git("-C", repo, "remote", "rename", "origin", "upstream")
+    names = [f"py-port{number}" for number in range(8)]
+
+    def make_pr(name: str) -> str:
+        parent = sync_fork(str(tmp_path))
+        return commit_files(
+            repo,
+            parent,
+            {f"python/{name}/Portfile": f"# {name}\n"},
+            f"{name}: new port",
+        )
+
+    with concurrent.futures.ThreadPoolExecutor(len(names)) as executor:
+        commits = list(executor.map(make_pr, names))
+
+    parent = git("-C", repo, "rev-parse", "upstream/master").strip()
+    for name, commit in zip(names, commits):
+        assert git("-C", repo, "diff-tree", "-r", "--name-only", parent, commit) == (
+            f"python/{name}/Portfile\n"
+        )
+        assert git("-C", repo, "show", f"{commit}:python/{name}/Portfile") == (
+            f"# {name}\n"
+        )
+    # Nothing was checked out
+    assert git("-C", repo, "status", "--porcelain") == ""
@@ -30,14 +30,15 @@
 
 import pytest
 from beartype import beartype
-from pytest_mock import MockFixture
 from pytest_subprocess import FakeProcess
 
 from seaport._pull_request.portfile import new_contents
 
 
 @beartype
-def test_new_contents(fake_process: FakeProcess, session_mocker: MockFixture) -> None:
+def test_new_contents(
+    fake_process: FakeProcess, monkeypatch: pytest.MonkeyPatch
+) -> None:
     # Capital P since PortGroup is always there
     portfile_contents = "Example Portfile contents"
 
@@ -46,13 +47,15 @@ def test_new_contents(fake_process: FakeProcess, session_mocker: MockFixture) ->
         ["pbpaste"], stdout=[portfile_contents], occurrences=2
     )
 
-    session_mocker.patch("os.getenv", return_value=None)
+    monkeypatch.delenv("BUMP", raising=False)
+    monkeypatch.delenv("CATEGORY", raising=False)
 
     with pytest.raises(SystemExit):
         new_contents()
 
     # If everything works
-    session_mocker.patch("os.getenv", return_value="v1.2")
+    monkeypatch.setenv("BUMP", "v1.2")
+    monkeypatch.setenv("CATEGORY", "v1.2")
 
     assert new_contents() == (f"{portfile_contents}\n", "v1.2", "v1.2")
 
@@ -27,10 +27,14 @@
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 import os
+import subprocess
+import sys
 
 from beartype import beartype
+from beartype.typing import Dict
 from click.testing import CliRunner
 from pytest_mock import MockFixture
+from pytest_subprocess import FakeProcess
 
 from seaport import __version__
 from seaport._clipboard.format import format_subprocess
@@ -45,6 +49,58 @@ def test_version() -> None:
     assert result.output == f"seaport, version {__version__}\n"
 
 
+#: How long importing the seaport entry point can take, in microseconds.
+#: See `python -X importtime -c "import seaport._init"`
+STARTUP_BUDGET = 200_000
+
+#: Modules that are only needed once a subcommand runs.
+LAZY_MODULES = (
+    "hashlib",
+    "urllib.request",
+    "seaport._clipboard.clipboard",
+    "seaport._pull_request.pull_request",
+)
+
+
+@beartype
+def test_startup() -> None:
+    """Importing the entry point doesn't import the subcommands and stays within budget."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import seaport._init"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # Lines are of the form "import time: self | cumulative | module"
+    cumulative: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        _, total, module = line.split("|")
+        if total.strip().isdigit():
+            cumulative[module.strip()] = int(total)
+
+    for module in LAZY_MODULES:
+        assert module not in cumulative
+    assert cumulative["seaport._init"] < STARTUP_BUDGET
+
+
+@beartype
+def test_version_no_subprocess(fake_process: FakeProcess) -> None:
+    runner = CliRunner()
+    result = runner.invoke(seaport, ["--version"])
+    assert result.exit_code == 0
+    assert len(fake_process.calls) == 0
+
+
+@beartype
+def test_pr_help(fake_process: FakeProcess) -> None:
+    """The default path of gh is only determined when the help is shown."""
+    runner = CliRunner()
+    result = runner.invoke(seaport, ["pr", "--help"])
+    assert result.exit_code == 0
+    assert "Default: /usr/local/bin/gh" in result.output
+
+
 @beartype
 def test_help() -> None:
     runner = CliRunner()
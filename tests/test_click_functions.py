@@ -26,13 +26,19 @@
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+from pathlib import Path
 from typing import Optional
 
 import click
+import pytest
 from beartype import beartype
 from click.testing import CliRunner
+from pytest_mock import MockFixture
+from pytest_subprocess import FakeProcess
 
-from seaport._click_functions import main_cmd
+from seaport._click_functions import get_names, main_cmd
+from seaport._portindex import PortIndex
+from tests.helpers import write_index
 
 
 @click.command()
@@ -48,6 +54,7 @@ def example(
     url: Optional[str],
     location: Optional[str] = None,
     new: bool = False,
+    refresh: bool = False,
 ) -> None:
     """An example click command for testing."""
     click.echo(name)
@@ -69,3 +76,53 @@ def test_help() -> None:
     result = runner.invoke(example, ["--help"])
     assert result.exit_code == 0
     assert "Show this message and exit" in result.output
+
+
+@beartype
+def test_get_names(
+    tmp_path: Path, cache_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Names are completed from the PortIndex without running port search."""
+    monkeypatch.setenv("SEAPORT_PORTINDEX", write_index(tmp_path))
+
+    assert get_names(None, click.Argument(["name"]), "py-") == ["py-base91"]
+    assert get_names(None, click.Argument(["name"]), "m") == ["MyPort"]
+    # The names are only saved in the test's cache directory
+    assert (cache_dir / "portnames").is_file()
+
+
+@beartype
+def test_get_names_fallback(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, fake_process: FakeProcess
+) -> None:
+    """port search is used if there's no PortIndex."""
+    monkeypatch.setenv("SEAPORT_PORTINDEX", str(tmp_path / "PortIndex"))
+    fake_process.register_subprocess(
+        ["/opt/local/bin/port", "search", "--name", "--line", "--glob", "py-ric*"],
+        stdout=[
+            "py-rich\t13.3.5\tpython\tRender rich text\npy-rich-click\t1.6.1\tpython\tFormat click help output nicely with rich\n"
+        ],
+    )
+
+    assert get_names(None, click.Argument(["name"]), "py-ric") == [
+        "py-rich",
+        "py-rich-click",
+    ]
+
+
+@beartype
+def test_get_names_saved(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    fake_process: FakeProcess,
+    mocker: MockFixture,
+) -> None:
+    """Later completions only read the saved names, without port or the PortIndex."""
+    monkeypatch.setenv("SEAPORT_PORTINDEX", write_index(tmp_path))
+    names = mocker.spy(PortIndex, "names")
+
+    for _ in range(3):
+        assert get_names(None, click.Argument(["name"]), "g") == ["gping"]
+
+    assert names.call_count == 1
+    assert len(fake_process.calls) == 0
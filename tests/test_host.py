@@ -0,0 +1,196 @@
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import os
+import subprocess
+from pathlib import Path
+
+import pytest
+from beartype import beartype
+from pytest_subprocess import FakeProcess
+from pytest_subprocess.fake_popen import FakePopen
+
+from seaport._host import Host, boot_time, fact, set_profile, which
+
+
+@pytest.fixture
+def bin_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """A directory of (empty) tools, which is the only one on the PATH."""
+    directory = tmp_path / "bin"
+    directory.mkdir()
+    for tool in ("port", "sw_vers", "xcodebuild", "xcode-select"):
+        (directory / tool).touch(mode=0o755)
+    monkeypatch.setenv("PATH", str(directory))
+    set_profile(None)
+    return directory
+
+
+@beartype
+def register_facts(fake_process: FakeProcess, bin_dir: Path) -> None:
+    """Registers the commands that determine each fact."""
+    fake_process.register([str(bin_dir / "sw_vers"), "-productVersion"], stdout=["13.4\n"])  # fmt: skip
+    fake_process.register([str(bin_dir / "sw_vers"), "-buildVersion"], stdout=["22F66\n"])  # fmt: skip
+    fake_process.register(
+        [str(bin_dir / "xcodebuild"), "-version"],
+        stdout=["Xcode 14.3\nBuild version 14E222b\n"],
+    )
+
+
+@beartype
+def test_which(bin_dir: Path, fake_process: FakeProcess) -> None:
+    """Tools are found without running which."""
+    assert which("port") == str(bin_dir / "port")
+    assert which("brew") is None
+    assert len(fake_process.calls) == 0
+
+
+@beartype
+def test_which_path_changed(
+    bin_dir: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    host = Host()
+    assert host.which("port") == str(bin_dir / "port")
+
+    other = tmp_path / "other"
+    other.mkdir()
+    (other / "port").touch(mode=0o755)
+    monkeypatch.setenv("PATH", str(other))
+    assert host.which("port") == str(other / "port")
+
+
+@beartype
+def test_which_tool_removed(bin_dir: Path) -> None:
+    """A cached path isn't used once the tool is gone."""
+    assert Host().which("port") == str(bin_dir / "port")
+    (bin_dir / "port").unlink()
+    assert Host().which("port") is None
+
+
+@beartype
+def test_warm_run(bin_dir: Path, fake_process: FakeProcess) -> None:
+    """Facts are only determined once, even by a later run."""
+    register_facts(fake_process, bin_dir)
+
+    assert fact("macos_version") == "13.4"
+    assert fact("macos_build") == "22F66"
+    assert fact("xcode_version") == "Xcode 14.3\nBuild version 14E222b"
+    assert len(fake_process.calls) == 3
+
+    # A new run
+    set_profile(None)
+    assert fact("macos_version") == "13.4"
+    assert fact("macos_build") == "22F66"
+    assert fact("xcode_version") == "Xcode 14.3\nBuild version 14E222b"
+    assert which("port") == str(bin_dir / "port")
+    assert len(fake_process.calls) == 3
+
+
+@beartype
+def test_tool_changed(bin_dir: Path, fake_process: FakeProcess) -> None:
+    """A fact is determined again if the tool that determined it changes."""
+    register_facts(fake_process, bin_dir)
+    fake_process.register([str(bin_dir / "sw_vers"), "-productVersion"], stdout=["13.5\n"])  # fmt: skip
+
+    assert Host().fact("macos_version") == "13.4"
+    os.utime(bin_dir / "sw_vers", ns=(0, 0))
+    assert Host().fact("macos_version") == "13.5"
+
+
+@beartype
+def test_rebooted(
+    bin_dir: Path, fake_process: FakeProcess, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Facts are determined again after a reboot (e.g. a macOS update)."""
+    register_facts(fake_process, bin_dir)
+    fake_process.register([str(bin_dir / "sw_vers"), "-productVersion"], stdout=["14.0\n"])  # fmt: skip
+
+    monkeypatch.setattr("seaport._host.boot_time", lambda: 1)
+    assert Host().fact("macos_version") == "13.4"
+    assert Host().fact("macos_version") == "13.4"
+    monkeypatch.setattr("seaport._host.boot_time", lambda: 2)
+    assert Host().fact("macos_version") == "14.0"
+
+
+@beartype
+def test_unknown_boot(
+    bin_dir: Path, fake_process: FakeProcess, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Facts are only kept for the current run if the boot time is unknown."""
+    register_facts(fake_process, bin_dir)
+    fake_process.register([str(bin_dir / "sw_vers"), "-productVersion"], stdout=["13.4\n"])  # fmt: skip
+
+    monkeypatch.setattr("seaport._host.boot_time", lambda: None)
+    host = Host()
+    assert host.fact("macos_version") == "13.4"
+    assert host.fact("macos_version") == "13.4"
+    assert Host().fact("macos_version") == "13.4"
+    assert len(fake_process.calls) == 2
+
+
+@beartype
+def callback_failure(process: FakePopen) -> None:
+    """xcodebuild without Xcode installed."""
+    process.returncode = 1
+    raise subprocess.CalledProcessError(1, cmd="xcodebuild -version")
+
+
+@beartype
+def test_failed_fact(bin_dir: Path, fake_process: FakeProcess) -> None:
+    """A failed command is cached as an empty fact."""
+    fake_process.register(
+        [str(bin_dir / "xcodebuild"), "-version"], callback=callback_failure
+    )
+
+    assert Host().fact("xcode_version") == ""
+    assert Host().fact("xcode_version") == ""
+    assert len(fake_process.calls) == 1
+
+
+@beartype
+def test_corrupt_cache(bin_dir: Path, cache_dir: Path) -> None:
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    (cache_dir / "host.json").write_text("[not a cache")
+    assert Host().which("port") == str(bin_dir / "port")
+
+
+@beartype
+def test_unwritable_cache(bin_dir: Path, tmp_path: Path) -> None:
+    """Tools are still found if the cache can't be saved."""
+    host = Host(str(tmp_path / "missing" / "host.json"))
+    assert host.which("port") == str(bin_dir / "port")
+    host.save()
+    assert not (tmp_path / "missing").exists()
+
+
+@beartype
+def test_boot_time() -> None:
+    if not os.path.exists("/proc/stat"):
+        pytest.skip("Only Linux has /proc/stat")
+    boot = boot_time()
+    assert boot is not None and boot > 0
@@ -0,0 +1,197 @@
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import gzip
+import http.server
+import threading
+import time
+
+import pytest
+from beartype import beartype
+from beartype.typing import Dict, Iterator, Optional, Tuple
+
+from seaport._http import HTTPPool
+
+
+class KeepAliveServer(http.server.ThreadingHTTPServer):
+    """Keeps connections open between requests, counting how many are opened."""
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), KeepAliveHandler)
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+        self.connections = 0
+        self.posts = 0
+        self.credentials: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+
+
+class KeepAliveHandler(http.server.BaseHTTPRequestHandler):
+    """Redirects /old to /new, and answers everything else with its path (gzipped).
+
+    /to/{port}/{path} redirects to /{path} on another port. /last closes the
+    connection without saying so, and POSTs to /slow time out. The Authorization and
+    Cookie headers sent to each path are remembered.
+    """
+
+    protocol_version = "HTTP/1.1"
+    server: KeepAliveServer
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self) -> None:
+        self.server.credentials[self.path] = (
+            self.headers["Authorization"],
+            self.headers["Cookie"],
+        )
+        if self.path == "/old" or self.path.startswith("/to/"):
+            location = "/new"
+            if self.path.startswith("/to/"):
+                _, _, port, path = self.path.split("/", 3)
+                location = f"http://127.0.0.1:{port}/{path}"
+            self.send_response(301)
+            self.send_header("Location", location)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = gzip.compress(self.path.encode("utf-8"))
+        self.send_response(200)
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.close_connection = self.path == "/last"
+
+    def do_POST(self) -> None:
+        self.server.posts += 1
+        self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path == "/slow":
+            time.sleep(1)
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args: object) -> None:
+        """Don't clutter the test output."""
+
+
+@pytest.fixture
+def keep_alive() -> Iterator[KeepAliveServer]:
+    httpd = KeepAliveServer()
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@beartype
+def test_reuse(keep_alive: KeepAliveServer) -> None:
+    """Requests to the same host share a connection."""
+    with HTTPPool() as pool:
+        for number in range(5):
+            assert pool.get(f"{keep_alive.url}/{number}") == (
+                200,
+                f"/{number}".encode(),
+            )
+
+    assert keep_alive.connections == 1
+
+
+@beartype
+def test_redirect(keep_alive: KeepAliveServer) -> None:
+    with HTTPPool() as pool:
+        assert pool.get(f"{keep_alive.url}/old") == (200, b"/new")
+
+
+@beartype
+def test_redirect_credentials(keep_alive: KeepAliveServer) -> None:
+    """Credentials are only sent on to the same host."""
+    other = KeepAliveServer()
+    threading.Thread(target=other.serve_forever, daemon=True).start()
+    headers = {"Authorization": "Bearer secret", "Cookie": "session=1", "X-Seen": "1"}
+    try:
+        with HTTPPool() as pool:
+            assert pool.request(f"{keep_alive.url}/old", headers)[2] == b"/new"
+            port = other.server_address[1]
+            assert pool.request(f"{keep_alive.url}/to/{port}/away", headers)[2] == (
+                b"/away"
+            )
+    finally:
+        other.shutdown()
+        other.server_close()
+
+    secret = ("Bearer secret", "session=1")
+    assert keep_alive.credentials["/new"] == secret
+    assert keep_alive.credentials[f"/to/{port}/away"] == secret
+    assert other.credentials["/away"] == (None, None)
+    # The caller's headers aren't changed
+    assert headers["Authorization"] == "Bearer secret"
+
+
+@beartype
+def test_closed_connection(keep_alive: KeepAliveServer) -> None:
+    """A connection closed by the server is replaced rather than failing the request."""
+    with HTTPPool() as pool:
+        pool.get(f"{keep_alive.url}/first")
+        for connections in pool._idle.values():
+            for connection in connections:
+                assert connection.sock is not None
+                connection.sock.close()
+
+        assert pool.get(f"{keep_alive.url}/second") == (200, b"/second")
+
+
+@beartype
+def test_disconnected(keep_alive: KeepAliveServer) -> None:
+    """A request is sent again if the server closed the idle connection."""
+    with HTTPPool() as pool:
+        pool.get(f"{keep_alive.url}/last")
+        assert (
+            pool.request(f"{keep_alive.url}/new", method="POST", body=b"{}")[0] == 201
+        )
+
+    assert keep_alive.posts == 1
+    assert keep_alive.connections == 2
+
+
+@beartype
+def test_timeout_not_retried(keep_alive: KeepAliveServer) -> None:
+    """A request the server might have acted on isn't sent twice."""
+    with HTTPPool(timeout=0.2) as pool:
+        pool.get(f"{keep_alive.url}/first")
+        with pytest.raises(TimeoutError):
+            pool.request(f"{keep_alive.url}/slow", method="POST", body=b"{}")
+
+    assert keep_alive.posts == 1
+
+
+@beartype
+def test_bad_url() -> None:
+    with pytest.raises(ValueError):
+        HTTPPool().get("ftp://example.com/file")
@@ -0,0 +1,313 @@
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import http.server
+import json
+import threading
+import time
+
+import pytest
+from beartype import beartype
+
+from seaport._livecheck import (
+    LivecheckCache,
+    LivecheckSettings,
+    check,
+    format_stats,
+    latest_version,
+    latest_versions,
+    livecheck_settings,
+    session_stats,
+    vercmp,
+)
+from tests.helpers import DistfileServer
+
+#: Portfiles, the page their livecheck downloads, and what port livecheck outputs.
+#: {url} is replaced with the url of the test server.
+CORPUS = {
+    "github": (
+        "PortSystem 1.0\nPortGroup github 1.0\ngithub.setup orf gping 1.16.1 gping-v\n",
+        '<a href="/orf/gping/releases/tag/gping-v1.17.0">\n'
+        '<a href="/orf/gping/releases/tag/gping-v1.16.1">\n'
+        '<a href="/orf/gping/releases/tag/v2.0">\n',
+        "1.17.0",
+    ),
+    "github up-to-date": (
+        "PortGroup github 1.0\ngithub.setup orf gping 1.16.1 gping-v\n",
+        '<a href="/orf/gping/releases/tag/gping-v1.16.1">\n',
+        "1.16.1",
+    ),
+    "github livecheck.regex": (
+        "PortGroup github 1.0\ngithub.setup orf gping 1.16.1 gping-v\n"
+        "github.livecheck.regex {([0-9.]+)}\n",
+        '<a href="/orf/gping/releases/tag/gping-v1.18.0-rc1">\n'
+        '<a href="/orf/gping/releases/tag/gping-v1.17.0">\n',
+        "1.17.0",
+    ),
+    "gitlab": (
+        "PortGroup gitlab 1.0\ngitlab.setup inkscape inkscape 1.2 INKSCAPE_\n",
+        "<feed><entry><title>INKSCAPE_1.3</title></entry>\n"
+        "<entry><title>INKSCAPE_1.2</title></entry></feed>\n",
+        "1.3",
+    ),
+    "python": (
+        "PortGroup python 1.0\nname py-rich\nversion 13.0.0\n",
+        json.dumps({"info": {"version": "13.4.2"}}),
+        "13.4.2",
+    ),
+    "pypi rootname": (
+        "PortGroup python 1.0\nname py-pyyaml\npython.rootname PyYAML\nversion 6.0\n",
+        json.dumps({"info": {"version": "6.0.1"}}),
+        "6.0.1",
+    ),
+    "quoted regex with quotemeta": (
+        "name foo\nversion 1.9\nhomepage {url}\nlivecheck.type regex\n"
+        "livecheck.url ${homepage}/download\n"
+        'livecheck.regex "[quotemeta ${name}]-(\\\\d+(?:\\\\.\\\\d+)*)\\\\.tar\\\\.gz"\n',
+        "foo-1.2.tar.gz foo-1.10.tar.gz\nfoo-1.9.tar.gz bar-2.0.tar.gz\n",
+        "1.10",
+    ),
+    "regexm": (
+        "name foo\nversion 1.0\nlivecheck.type regexm\nlivecheck.url {url}/news\n"
+        "livecheck.regex {Latest release:\\s*<b>([0-9.]+)</b>}\n",
+        "<p>Latest release:\n<b>1.1</b></p>\n",
+        "1.1",
+    ),
+    "posix classes": (
+        "name foo\nversion 1.0\nlivecheck.url {url}\n"
+        "livecheck.type regex\nlivecheck.regex {foo-([[:digit:].]+)\\.tar}\n",
+        "foo-1.0.tar foo-1.0.1.tar\n",
+        "1.0.1",
+    ),
+    "none": ("name foo\nversion 1.0\nlivecheck.type none\n", "", "1.0"),
+}
+
+
+@pytest.fixture
+def hosts(server: DistfileServer, monkeypatch: pytest.MonkeyPatch) -> DistfileServer:
+    """Points the github, gitlab and pypi livechecks at the test server."""
+    for host in ("GITHUB_URL", "GITLAB_URL", "PYPI_URL"):
+        monkeypatch.setattr(f"seaport._livecheck.{host}", server.url)
+    return server
+
+
+@pytest.mark.parametrize("case", CORPUS)
+@beartype
+def test_corpus(hosts: DistfileServer, case: str) -> None:
+    """The results match port livecheck."""
+    portfile, page, expected = CORPUS[case]
+    hosts.contents = page.encode("utf-8")
+
+    assert latest_version(portfile.replace("{url}", hosts.url)) == expected
+
+
+@beartype
+def test_settings_github() -> None:
+    assert livecheck_settings(
+        "PortGroup github 1.0\ngithub.setup harens seaport 0.10.1 v\n"
+    ) == LivecheckSettings(
+        "regex",
+        "https://github.com/harens/seaport/tags",
+        '/releases/tag/v([^"]+)"',
+        "0.10.1",
+        "seaport",
+    )
+
+
+@beartype
+def test_settings_override() -> None:
+    """Settings in the Portfile take precedence over the portgroup's."""
+    settings = livecheck_settings(
+        "PortGroup github 1.0\ngithub.setup harens seaport 0.10.1 v\n"
+        "livecheck.url https://example.com\nlivecheck.regex {seaport-(\\d+)}\n"
+    )
+
+    assert settings.url == "https://example.com"
+    assert settings.regex == "seaport-(\\d+)"
+
+
+@pytest.mark.parametrize(
+    "portfile",
+    [
+        "name foo\nversion 1.0\nhomepage https://example.com\n",
+        "name foo\nlivecheck.type sourceforge\n",
+        "name foo\nlivecheck.type regex\nlivecheck.url https://example.com\n"
+        "livecheck.regex [format %s foo]\n",
+    ],
+)
+@beartype
+def test_unsupported(portfile: str) -> None:
+    """Livechecks that need port livecheck aren't guessed."""
+    with pytest.raises(ValueError):
+        livecheck_settings(portfile)
+    assert latest_version(portfile) is None
+
+
+@beartype
+def test_no_match(server: DistfileServer) -> None:
+    server.contents = b"nothing to see here"
+
+    with pytest.raises(ValueError):
+        check(LivecheckSettings("regex", server.url, "foo-(\\d+)", "1"))
+
+
+class RedirectLoop(http.server.BaseHTTPRequestHandler):
+    """Redirects every request back to itself."""
+
+    def do_GET(self) -> None:
+        self.send_response(302)
+        self.send_header("Location", self.path)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args: object) -> None:
+        """Don't clutter the test output."""
+
+
+@beartype
+def test_redirect_loop() -> None:
+    """A page that can't be downloaded leaves the port to port livecheck."""
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), RedirectLoop)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{httpd.server_address[1]}/tags"
+    try:
+        with pytest.raises(ValueError):
+            check(LivecheckSettings("regex", url, "foo-(\\d+)", "1"))
+        assert latest_versions(
+            [f"name foo\nversion 1\nlivecheck.url {url}\nlivecheck.regex foo-(\\d+)\n"]
+        ) == [None]
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+@beartype
+def test_many(hosts: DistfileServer) -> None:
+    """Hundreds of ports are checked concurrently."""
+    hosts.contents = b'<a href="/orf/gping/releases/tag/gping-v1.17.0">\n'
+    hosts.delay = 0.05
+    portfile = "PortGroup github 1.0\ngithub.setup orf gping 1.16.1 gping-v\n"
+
+    start = time.perf_counter()
+    results = latest_versions([portfile] * 200)
+    elapsed = time.perf_counter() - start
+
+    assert results == ["1.17.0"] * 200
+    # Checking one port at a time would take at least 10 seconds
+    assert elapsed < 5
+
+
+#: A livecheck of the test server (whose url is filled in by each test).
+SETTINGS = LivecheckSettings("regex", "", "foo-([0-9.]+)", "1.0", "foo")
+
+
+@beartype
+def test_cache_hit(server: DistfileServer) -> None:
+    """Results within the TTL are used without asking upstream."""
+    server.contents = b"foo-1.1"
+    settings = SETTINGS._replace(url=server.url)
+    cache = LivecheckCache(ttl=60.0)
+    before = session_stats()
+
+    assert check(settings, cache=cache) == "1.1"
+    server.contents = b"foo-1.2"
+    assert check(settings, cache=cache) == "1.1"
+
+    assert len(server.requests) == 1
+    assert cache.stats() == {"hits": 1, "revalidated": 0, "misses": 1, "results": 1}
+    assert session_stats()["hits"] == before["hits"] + 1
+
+
+@beartype
+def test_cache_revalidate(server: DistfileServer) -> None:
+    """Results older than the TTL cost a 304 if upstream hasn't changed."""
+    server.contents = b"foo-1.1"
+    settings = SETTINGS._replace(url=server.url)
+    cache = LivecheckCache(ttl=0.0)
+
+    assert check(settings, cache=cache) == "1.1"
+    assert check(settings, cache=cache) == "1.1"
+    assert server.requests[1]["If-None-Match"] == '"v1"'
+    assert cache.stats()["revalidated"] == 1
+
+    # Upstream changed, so the page is checked in full
+    server.contents = b"foo-1.2"
+    server.etag = '"v2"'
+    assert check(settings, cache=cache) == "1.2"
+    assert cache.stats()["misses"] == 2
+
+
+@beartype
+def test_cache_refresh(server: DistfileServer) -> None:
+    server.contents = b"foo-1.1"
+    settings = SETTINGS._replace(url=server.url)
+    cache = LivecheckCache(ttl=60.0)
+    check(settings, cache=cache)
+    server.contents = b"foo-1.2"
+    server.etag = '"v2"'
+
+    assert check(settings, cache=cache, refresh=True) == "1.2"
+    assert "If-None-Match" not in server.requests[1]
+
+
+@beartype
+def test_cache_saved(hosts: DistfileServer, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Results are kept between runs, for as long as SEAPORT_LIVECHECK_TTL."""
+    monkeypatch.setenv("SEAPORT_LIVECHECK_TTL", "60")
+    hosts.contents = b'<a href="/orf/gping/releases/tag/gping-v1.17.0">\n'
+    portfile = "PortGroup github 1.0\ngithub.setup orf gping 1.16.1 gping-v\n"
+
+    assert latest_versions([portfile]) == ["1.17.0"]
+    assert latest_versions([portfile]) == ["1.17.0"]
+    assert len(hosts.requests) == 1
+    assert LivecheckCache().stats()["hits"] == 1
+
+
+@beartype
+def test_format_stats() -> None:
+    assert format_stats({"hits": 0, "revalidated": 0, "misses": 0}) == (
+        "Livecheck cache: 0 hits, 0 revalidated, 0 misses (0% hit rate)"
+    )
+
+
+@pytest.mark.parametrize(
+    "first, second, expected",
+    [
+        ("1.10", "1.9", 1),
+        ("1.0", "1.0", 0),
+        ("1.0", "1.0.1", -1),
+        ("1.0rc1", "1.0", 1),
+        ("1.0a", "1.0b", -1),
+        ("2.0", "2.a", 1),
+    ],
+)
+@beartype
+def test_vercmp(first: str, second: str, expected: int) -> None:
+    assert vercmp(first, second) == expected
+    assert vercmp(second, first) == -expected
@@ -0,0 +1,187 @@
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from beartype import beartype
+from beartype.typing import Iterator
+
+from seaport._clipboard.additional import perform_lint
+from seaport._port_session import (
+    PortSession,
+    SessionError,
+    close_sessions,
+    latencies,
+    port_output,
+)
+
+#: How long the fake port takes to start, standing in for Tcl and the registry.
+STARTUP = 0.2
+
+#: A stand-in for port, which also reads commands from stdin with -p -F -.
+FAKE_PORT = """#!{python}
+import sys
+import time
+
+time.sleep({startup})
+with open({log!r}, "a") as log:
+    log.write("started\\n")
+
+
+def run(args, session):
+    if args[0] == "echo":
+        print(" ".join(args[1:]))
+    elif args[0] == "info" and args[-1] == "missing":
+        print("Error: Port missing not found", file=sys.stderr)
+        return 1
+    elif args[0] == "info":
+        print("Warning: port definitions are more than two weeks old", file=sys.stderr)
+        print("name: " + args[-1])
+    elif args[0] == "lint":
+        print("--->  Verifying Portfile for " + args[-1])
+        print("Error: Line 5 has trailing whitespace", file=sys.stderr)
+        print("--->  1 errors and 0 warnings found.")
+        return 1
+    elif args[0] == "crash":
+        if session:
+            sys.exit(1)
+        print("one-shot")
+    elif args[0] == "hang":
+        time.sleep(60)
+    return 0
+
+
+if sys.argv[1:] == ["-p", "-F", "-"]:
+    for line in sys.stdin:
+        run(line.split(), True)
+        sys.stdout.flush()
+else:
+    sys.exit(run(sys.argv[1:], False))
+"""
+
+
+@pytest.fixture
+def fake_port(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[str]:
+    """Creates a fake port binary, logging each time it starts to tmp_path/log."""
+    port = tmp_path / "port"
+    port.write_text(
+        FAKE_PORT.format(
+            python=sys.executable, startup=STARTUP, log=str(tmp_path / "log")
+        )
+    )
+    port.chmod(0o755)
+    monkeypatch.setenv("SEAPORT_PORT_SESSION", "1")
+    yield str(port)
+    close_sessions()
+
+
+@beartype
+def test_session(fake_port: str, tmp_path: Path) -> None:
+    """Every command runs in the same port process."""
+    with PortSession(fake_port) as session:
+        assert session.run(["info", "gping"]) == (
+            0,
+            "name: gping\n",
+            "Warning: port definitions are more than two weeks old\n",
+        )
+        assert session.run(["info", "missing"]) == (
+            1,
+            "",
+            "Error: Port missing not found\n",
+        )
+        assert session.run(["info", "py-base91"])[:2] == (0, "name: py-base91\n")
+
+    assert (tmp_path / "log").read_text() == "started\n"
+
+
+@beartype
+def test_session_errors(fake_port: str) -> None:
+    with PortSession(fake_port, timeout=1.0) as session:
+        with pytest.raises(SessionError):
+            session.run(["info", "two words"])
+        assert not session.broken
+
+        with pytest.raises(SessionError):
+            session.run(["hang"])
+        assert session.broken
+
+
+@beartype
+def test_port_output(fake_port: str, tmp_path: Path) -> None:
+    assert port_output([fake_port, "info", "gping"]) == "name: gping"
+    assert port_output([fake_port, "info", "missing"], check=False) == ""
+    with pytest.raises(subprocess.CalledProcessError):
+        port_output([fake_port, "info", "missing"])
+
+    # Falls back to its own process if the session stops working
+    assert port_output([fake_port, "crash"]) == "one-shot"
+    assert port_output([fake_port, "info", "gping"]) == "name: gping"
+    assert (tmp_path / "log").read_text() == "started\n" * 3
+
+
+@beartype
+def test_lint_errors(
+    fake_port: str,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """Lint errors in a session are shown, and the port fails lint without raising."""
+    monkeypatch.setattr(
+        "seaport._clipboard.additional.user_path", lambda *args: str(tmp_path)
+    )
+
+    assert not perform_lint("gping")
+    out, err = capsys.readouterr()
+    assert "--->  1 errors and 0 warnings found." in out
+    assert err == "Error: Line 5 has trailing whitespace\n"
+    assert (tmp_path / "log").read_text() == "started\n"
+
+
+@beartype
+def test_latency(fake_port: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Only the first command in a session waits for port to start."""
+    before = latencies()
+    for name in ("gping", "py-base91", "folderify"):
+        port_output([fake_port, "info", name])
+    monkeypatch.setenv("SEAPORT_PORT_SESSION", "0")
+    for name in ("gping", "py-base91", "folderify"):
+        port_output([fake_port, "info", name])
+    after = latencies()
+
+    # The mean of the three latencies just measured
+    session, one_shot = [
+        (after[mode][0] * after[mode][1] - before[mode][0] * before[mode][1]) / 3
+        for mode in ("session", "one-shot")
+    ]
+    assert after["session"][0] - before["session"][0] == 3
+    assert one_shot >= STARTUP
+    assert session < one_shot / 2
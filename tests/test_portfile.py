@@ -26,12 +26,26 @@
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+from pathlib import Path
+
 import pytest
 from beartype import beartype
+from beartype.typing import List
 from pytest_mock import MockFixture
 from pytest_subprocess import FakeProcess
 
-from seaport.portfile import Port
+from seaport.portfile import INFO_FIELDS, Port
+from tests.helpers import DistfileServer, write_index
+
+
+@beartype
+def info_args(*names: str) -> List[str]:
+    """The arguments of the port info call used to take a snapshot of the ports."""
+    return (
+        ["/opt/local/bin/port", "info", "--index"]
+        + [f"--{field}" for field in INFO_FIELDS]
+        + list(names)
+    )
 
 
 # TODO: Maybe put this somewhere better?
@@ -40,77 +54,129 @@ def setup_port(fake_process: FakeProcess, name: str = "gping") -> Port:
     """Generates an example gping v0.1 port for testing."""
 
     fake_process.register_subprocess(
-        ["/usr/bin/which", "port"], stdout=["/opt/local/bin/port"]
-    )
-
-    fake_process.register_subprocess(
-        ["/opt/local/bin/port", "info", name],
+        info_args(name),
         stdout=[
-            f"{name} @0.1 (quack)\nVariants:             universal\n\nDescription:          ping, but with a "
-            f"graph.\nHomepage:             https://github.com/orf/gping\n\nBuild Dependencies:   rust, "
-            f"cargo\nPlatforms:            darwin\nLicense:              MIT\nMaintainers:          Email: "
-            f"harens@macports.org, GitHub: harens\nPolicy: openmaintainer"
+            f"name: {name}\nversion: 0.1\nrevision: 0\nepoch: 0\ncategories: quack, net\n"
+            f"subports: \nmaintainers: Email: harens@macports.org, GitHub: harens, "
+            f"openmaintainer\n"
+            f"homepage: https://github.com/orf/gping"
         ],
-        occurrences=4,
     )
 
     return Port(name)
 
 
 @beartype
-def setup_backup_port(fake_process: FakeProcess, name: str = "gping") -> Port:
-    """Generates an example gping v0.1 port for testing.
+def setup_partial_port(fake_process: FakeProcess, name: str = "gping") -> Port:
+    """Generates an example gping v12 port for testing.
 
-    However, this port tests what happens if port info parsing fails.
+    However, port info leaves out some of the fields.
     """
 
     fake_process.register_subprocess(
-        ["/usr/bin/which", "port"], stdout=["/opt/local/bin/port"]
+        info_args(name),
+        stdout=["version: 12\nrevision: 3\ncategories: bananas, somethingElse"],
     )
 
-    fake_process.register_subprocess(
-        ["/opt/local/bin/port", "info", name],
-        stdout=[f"failed parsing port info output"],
-    )
+    return Port(name)
 
-    fake_process.register_subprocess(
-        ["/opt/local/bin/port", "info", "--version", name],
-        stdout=["version: 12"],
-    )
 
-    fake_process.register_subprocess(
-        ["/opt/local/bin/port", "info", "--revision", name],
-        stdout=["revision: 3"],
-    )
+@beartype
+def test_snapshot(fake_process: FakeProcess) -> None:
+    """Tests that every field is determined from the snapshot."""
+    port = setup_port(fake_process, "GPing")
+
+    assert port.version == "0.1"
+    assert port.revision == 0
+    assert port.epoch == 0
+    assert port.maintainers == ["harens @harens", "openmaintainer"]
+    assert port.homepage == "https://github.com/orf/gping"
+    assert port.subports() is None
+
 
+@beartype
+def test_several_maintainers(fake_process: FakeProcess) -> None:
+    """Each maintainer's labelled handles are kept together."""
     fake_process.register_subprocess(
-        ["/opt/local/bin/port", "info", "--category", name],
-        stdout=["category: bananas, somethingElse"],
+        info_args("py-rich"),
+        stdout=[
+            "name: py-rich\nversion: 13.3.1\ncategories: python\n"
+            "maintainers: Email: harens@macports.org, GitHub: harens, "
+            "Email: someone@gmail.com, GitHub: someone, GitHub: another, "
+            "Email: noreply@example.org, openmaintainer"
+        ],
     )
 
-    return Port(name)
+    assert Port("py-rich").maintainers == [
+        "harens @harens",
+        "gmail.com:someone @someone",
+        "@another",
+        "example.org:noreply",
+        "openmaintainer",
+    ]
+
+
+@beartype
+def test_snapshot_subprocess_count(fake_process: FakeProcess) -> None:
+    """Creating a port and reading its fields only requires one port info."""
+    port = setup_port(fake_process)
+
+    port.primary_category()
+    port.subports()
+
+    assert fake_process.call_count(info_args("gping")) == 1
+    assert len(fake_process.calls) == 1
+
+
+@beartype
+def test_partial_category(fake_process: FakeProcess) -> None:
+    """Tests determining the main category when port info leaves out some fields."""
+    partial_port = setup_partial_port(fake_process)
+
+    assert partial_port.primary_category() == "bananas"
+
+
+@beartype
+def test_partial_name(fake_process: FakeProcess) -> None:
+    """Falls back to the original name if port info doesn't output one."""
+    partial_port = setup_partial_port(fake_process)
+
+    assert partial_port.name == "gping"
+    assert partial_port.epoch == 0
 
 
 @beartype
-def test_backup_category(fake_process: FakeProcess) -> None:
-    """Tests determining the main category when the standard port info parse fails."""
-    backup_port = setup_backup_port(fake_process)
+def test_partial_version(fake_process: FakeProcess) -> None:
+    """Tests determining the version and revision when port info leaves out some fields."""
+    partial_port = setup_partial_port(fake_process)
 
-    assert backup_port.primary_category() == "bananas"
+    assert partial_port.version == "12"
+    assert partial_port.revision == 3
 
 
-def test_backup_version(fake_process: FakeProcess) -> None:
-    """Tests determining the version number when the standard port info parse fails."""
-    backup_port = setup_backup_port(fake_process)
+@beartype
+def test_nonexistent_port(fake_process: FakeProcess) -> None:
+    fake_process.register_subprocess(info_args("quack"), returncode=1)
 
-    assert backup_port.version == "12"
+    with pytest.raises(RuntimeError):
+        Port("quack")
 
 
-def test_backup_revision(fake_process: FakeProcess) -> None:
-    """Tests determining the revision number when the standard port info parse fails."""
-    backup_port = setup_backup_port(fake_process)
+@beartype
+def test_from_index(fake_process: FakeProcess, tmp_path: Path) -> None:
+    """Creating a port from the PortIndex doesn't run any commands."""
+    port = Port.from_index("PY-BASE91", write_index(tmp_path))
 
-    assert backup_port.revision == 3
+    assert port.name == "py-base91"
+    assert port.version == "1.0.1"
+    assert port.revision == 1
+    assert port.subports() == ["py38-base91", "py39-base91"]
+    assert port.primary_category() == "python"
+    assert port.maintainers == ["nomaintainer"]
+    assert len(fake_process.calls) == 0
+
+    with pytest.raises(RuntimeError):
+        Port.from_index("quack", write_index(tmp_path))
 
 
 def test_outdated_livecheck(fake_process: FakeProcess) -> None:
@@ -128,6 +194,74 @@ def test_outdated_livecheck(fake_process: FakeProcess) -> None:
     assert port.livecheck() == "0.2"
 
 
+@beartype
+def test_native_livecheck(
+    fake_process: FakeProcess,
+    server: DistfileServer,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Ports in the ports tree are checked without running port livecheck."""
+    monkeypatch.setenv("SEAPORT_PORTINDEX", write_index(tmp_path))
+    portfile = tmp_path / "net" / "gping" / "Portfile"
+    portfile.parent.mkdir(parents=True)
+    portfile.write_text(
+        f"name gping\nversion 0.1\nlivecheck.type regex\nlivecheck.url {server.url}\n"
+        "livecheck.regex {gping-v([0-9.]+)}\n"
+    )
+    server.contents = b"gping-v0.2 gping-v0.1"
+    port = setup_port(fake_process)
+
+    assert port.livecheck() == "0.2"
+    assert fake_process.call_count(["/opt/local/bin/port", "livecheck", "gping"]) == 0
+
+
+@beartype
+def test_native_livecheck_other_tree(
+    fake_process: FakeProcess,
+    server: DistfileServer,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Portfiles that don't match port info are left to port livecheck."""
+    monkeypatch.setenv("SEAPORT_PORTINDEX", write_index(tmp_path))
+    portfile = tmp_path / "net" / "gping" / "Portfile"
+    portfile.parent.mkdir(parents=True)
+    # The ports tree is behind the version port info found
+    portfile.write_text(
+        f"name gping\nversion 0.0.1\nlivecheck.type regex\nlivecheck.url {server.url}\n"
+        "livecheck.regex {gping-v([0-9.]+)}\n"
+    )
+    server.contents = b"gping-v0.0.1"
+    port = setup_port(fake_process)
+    fake_process.register_subprocess(
+        ["/opt/local/bin/port", "livecheck", "gping"], stdout=[""]
+    )
+
+    # Not bumped back to 0.0.1
+    assert port.livecheck() == "0.1"
+    assert fake_process.call_count(["/opt/local/bin/port", "livecheck", "gping"]) == 1
+    assert not server.requests
+
+
+@beartype
+def test_native_livecheck_unreadable(
+    fake_process: FakeProcess, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """port livecheck is used if the Portfile can't be read."""
+    monkeypatch.setenv("SEAPORT_PORTINDEX", write_index(tmp_path))
+    (tmp_path / "net" / "gping" / "Portfile").mkdir(parents=True)
+    port = setup_port(fake_process)
+    fake_process.register_subprocess(
+        ["/opt/local/bin/port", "livecheck", "gping"],
+        stdout=[
+            "gping seems to have been updated (port version: 0.1, new version: 0.2)"
+        ],
+    )
+
+    assert port.livecheck() == "0.2"
+
+
 @beartype
 def test_category(fake_process: FakeProcess) -> None:
     port = setup_port(fake_process)
@@ -135,6 +269,114 @@ def test_category(fake_process: FakeProcess) -> None:
     assert port.primary_category() == "quack"
 
 
+#: Example output of port distfiles gping, with two distfiles.
+DISTFILES = """--->  Distfiles for gping
+[gping-0.1.tar.gz] /opt/local/var/macports/distfiles/gping/gping-0.1.tar.gz
+  size: 100 rmd160: aaa sha256: bbb
+  https://github.com/orf/gping/archive/gping-0.1.tar.gz
+  https://distfiles.macports.org/gping/gping-0.1.tar.gz
+
+[crate-1.0.crate] /opt/local/var/macports/distfiles/gping/crate-1.0.crate
+  size: 10 rmd160: ccc sha256: ddd
+  https://crates.io/api/v1/crates/crate/1.0/download
+"""
+
+
+@beartype
+def test_distfile_urls(fake_process: FakeProcess) -> None:
+    """Every mirror of the first distfile is found, and port distfiles only runs once."""
+    port = setup_port(fake_process)
+    fake_process.register_subprocess(
+        ["/opt/local/bin/port", "distfiles", "gping"], stdout=[DISTFILES]
+    )
+
+    assert port.distfile_urls() == [
+        "https://github.com/orf/gping/archive/gping-0.1.tar.gz",
+        "https://distfiles.macports.org/gping/gping-0.1.tar.gz",
+    ]
+    assert port.checksums()[3] == port.distfile_urls()[0]
+    assert fake_process.call_count(["/opt/local/bin/port", "distfiles", "gping"]) == 1
+
+
+@beartype
+def test_bulk(fake_process: FakeProcess) -> None:
+    """Each port command is run once for every port, and split back up by port."""
+    fake_process.register(
+        info_args("GPing", "py-base91", "missing"),
+        stdout=[
+            "name: gping\nversion: 0.1\ncategories: net\n--\n"
+            "name: py-base91\nversion: 1.0.1\ncategories: python\n"
+            "subports: py310-base91, py311-base91"
+        ],
+        returncode=1,
+    )
+    fake_process.register(
+        ["/opt/local/bin/port", "distfiles", "gping", "py-base91"],
+        stdout=[DISTFILES + "--->  Distfiles for py-base91\n"],
+    )
+    fake_process.register(
+        ["/opt/local/bin/port", "distfiles", "py311-base91"],
+        stdout=[
+            "--->  Distfiles for py311-base91\n[base91-1.0.1.tar.gz] /distfiles/base91-1.0.1.tar.gz\n"
+            "  size: 10 rmd160: aaa sha256: bbb\n  https://example.com/base91-1.0.1.tar.gz"
+        ],
+    )
+    fake_process.register(
+        ["/opt/local/bin/port", "livecheck", "gping", "py-base91"],
+        stdout=[
+            "gping seems to have been updated (port version: 0.1, new version: 0.2)"
+        ],
+    )
+    fake_process.register(
+        ["/opt/local/bin/port", "livecheck", "py311-base91"],
+        stdout=[
+            "py311-base91 seems to have been updated (port version: 1.0.1, new version: 1.1)"
+        ],
+    )
+
+    ports = Port.bulk(["GPing", "py-base91", "missing"])
+
+    assert list(ports) == ["GPing", "py-base91"]
+    assert ports["GPing"].name == "gping"
+    assert ports["GPing"].livecheck() == "0.2"
+    assert ports["GPing"].distfile_urls()[0] == (
+        "https://github.com/orf/gping/archive/gping-0.1.tar.gz"
+    )
+    assert ports["py-base91"].livecheck() == "1.1"
+    assert ports["py-base91"].distfile_urls() == [
+        "https://example.com/base91-1.0.1.tar.gz"
+    ]
+    # Nothing else is run after the ports have been created
+    assert len(fake_process.calls) == 5
+
+
+@beartype
+def test_bulk_many(fake_process: FakeProcess) -> None:
+    """Hundreds of ports only need a handful of processes."""
+    names = [f"port{number}" for number in range(500)]
+    fake_process.register(
+        info_args(*names),
+        stdout=["\n--\n".join(f"name: {name}\nversion: 1.0" for name in names)],
+    )
+    fake_process.register(
+        ["/opt/local/bin/port", "distfiles", *names],
+        stdout=[
+            "\n".join(
+                f"--->  Distfiles for {name}\n  https://example.com/{name}-1.0.tar.gz"
+                for name in names
+            )
+        ],
+    )
+
+    ports = Port.bulk(names, livecheck=False)
+
+    assert len(ports) == 500
+    assert ports["port321"].distfile_urls() == [
+        "https://example.com/port321-1.0.tar.gz"
+    ]
+    assert len(fake_process.calls) == 2
+
+
 @beartype
 def test_failed_finding_checksums(
     fake_process: FakeProcess, session_mocker: MockFixture
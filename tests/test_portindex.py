@@ -0,0 +1,198 @@
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+from pathlib import Path
+
+import pytest
+from beartype import beartype
+from pytest_mock import MockFixture
+
+from seaport._portindex import (
+    PortIndex,
+    complete,
+    port_names,
+    portfile_paths,
+    split_list,
+)
+from tests.helpers import RECORDS, write_index
+
+
+@beartype
+def test_split_list() -> None:
+    assert split_list("") == []
+    assert split_list('  a  {b {c d}}  "e f" g\\ h ') == ["a", "b {c d}", "e f", "g h"]
+    assert split_list("{} x") == ["", "x"]
+
+
+@beartype
+def test_record(tmp_path: Path) -> None:
+    index = PortIndex(write_index(tmp_path))
+
+    record = index.record("py-base91")
+    assert record is not None
+    assert record["version"] == "1.0.1"
+    assert record["description"] == 'Base91 "encoding"'
+    assert record["subports"] == "py38-base91 py39-base91"
+
+
+@beartype
+def test_record_capitalisation(tmp_path: Path) -> None:
+    index = PortIndex(write_index(tmp_path))
+
+    record = index.record("myport")
+    assert record is not None
+    assert record["name"] == "MyPort"
+
+
+@beartype
+def test_missing_record(tmp_path: Path) -> None:
+    assert PortIndex(write_index(tmp_path)).record("quack") is None
+
+
+@beartype
+def test_no_quick_index(tmp_path: Path) -> None:
+    """The offsets are determined from the PortIndex if there's no quick index."""
+    index = PortIndex(write_index(tmp_path, quick=False))
+
+    assert index.offsets() == PortIndex(write_index(tmp_path)).offsets()
+    assert index.offset("myport") == index.offset("MyPort")
+    record = index.record("gping")
+    assert record is not None
+    assert record["maintainers"] == "{harens @harens} openmaintainer"
+
+
+@beartype
+def test_saved_offsets(tmp_path: Path) -> None:
+    """The offset table is saved next to the index and reused."""
+    path = write_index(tmp_path)
+    table = PortIndex(path).offsets()
+
+    assert (tmp_path / "PortIndex.offsets").exists()
+
+    # The quick index is no longer needed
+    (tmp_path / "PortIndex.quick").unlink()
+    assert PortIndex(path).offsets() == table
+
+
+@beartype
+def test_outdated_offsets(tmp_path: Path) -> None:
+    """The saved offset table is rebuilt if the index changes."""
+    path = write_index(tmp_path)
+    PortIndex(path).offsets()
+
+    RECORDS["newport"] = "name newport version 1.0"
+    try:
+        path = write_index(tmp_path)
+    finally:
+        del RECORDS["newport"]
+
+    with PortIndex(path) as index:
+        record = index.record("newport")
+    assert record is not None
+    assert record["version"] == "1.0"
+
+
+@beartype
+def test_unwritable_offsets(tmp_path: Path, mocker: MockFixture) -> None:
+    """The offset table is still used if it can't be saved."""
+    mocker.patch("seaport._portindex.os.replace", side_effect=PermissionError)
+
+    with PortIndex(write_index(tmp_path)) as index:
+        assert index.offset("gping") == 0
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "PortIndex",
+        "PortIndex.quick",
+    ]
+
+
+@beartype
+def test_empty_index(tmp_path: Path) -> None:
+    (tmp_path / "PortIndex").write_bytes(b"")
+
+    with PortIndex(str(tmp_path / "PortIndex")) as index:
+        assert index.record("gping") is None
+
+
+@beartype
+def test_names(tmp_path: Path) -> None:
+    with PortIndex(write_index(tmp_path)) as index:
+        assert index.names() == ["gping", "MyPort", "py-base91"]
+
+
+@beartype
+def test_port_names(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """The names are saved in the cache directory and rebuilt if the index changes."""
+    monkeypatch.setenv("SEAPORT_CACHE_DIR", str(tmp_path / "cache"))
+    path = write_index(tmp_path)
+
+    assert port_names(path) == ["gping", "MyPort", "py-base91"]
+    assert (tmp_path / "cache" / "portnames").exists()
+
+    RECORDS["aardvark"] = "name aardvark version 1.0"
+    try:
+        write_index(tmp_path)
+    finally:
+        del RECORDS["aardvark"]
+
+    assert port_names(path) == ["aardvark", "gping", "MyPort", "py-base91"]
+
+    # The saved names are used if the index disappears
+    (tmp_path / "PortIndex").unlink()
+    assert port_names(path) == ["aardvark", "gping", "MyPort", "py-base91"]
+
+
+@beartype
+def test_no_port_names(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("SEAPORT_CACHE_DIR", str(tmp_path))
+
+    assert port_names(str(tmp_path / "PortIndex")) is None
+
+
+@beartype
+def test_portfile_paths(tmp_path: Path) -> None:
+    """Portfiles are found from the portdir, relative to the PortIndex."""
+    index = write_index(tmp_path)
+    (tmp_path / "net" / "gping").mkdir(parents=True)
+    (tmp_path / "net" / "gping" / "Portfile").write_text("name gping\n")
+
+    assert portfile_paths(["GPing", "py-base91", "missing"], index) == {
+        "GPing": str(tmp_path / "net" / "gping" / "Portfile")
+    }
+    assert portfile_paths(["gping"], str(tmp_path / "missing")) == {}
+
+
+@beartype
+def test_complete() -> None:
+    names = ["gping", "MyPort", "py-base91", "py-rich", "py-rich-click", "py39-rich"]
+
+    assert complete(names, "py-ri") == ["py-rich", "py-rich-click"]
+    assert complete(names, "my") == ["MyPort"]
+    assert complete(names, "") == names
+    assert complete(names, "zzz") == []
@@ -0,0 +1,109 @@
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import os
+import subprocess
+import sys
+
+import pytest
+from beartype import beartype
+from click.testing import CliRunner
+
+from seaport._clipboard.format import format_subprocess, run_subprocess
+from seaport._init import seaport
+from seaport._profile import PROFILE_VARIABLE, Call, calls, command_type, summary
+
+
+@beartype
+def test_run_subprocess() -> None:
+    """Every command is recorded, whether or not it fails."""
+    before = len(calls())
+
+    assert format_subprocess(["echo", "hello"]) == "hello"
+    with pytest.raises(subprocess.CalledProcessError):
+        run_subprocess(["false"], check=True)
+
+    echo, false = calls()[before:]
+    assert echo.args == ("echo", "hello")
+    assert (echo.returncode, echo.output) == (0, 6)
+    assert (false.returncode, false.output) == (1, 0)
+
+
+@beartype
+def test_command_type() -> None:
+    assert command_type(["/usr/bin/which", "port"]) == "which port"
+    assert command_type(["/usr/bin/git", "checkout", "-b", "seaport-gping"]) == (
+        "git checkout"
+    )
+    assert command_type(["/usr/bin/pbcopy"]) == "pbcopy"
+
+
+@beartype
+def test_summary() -> None:
+    """Commands are sorted by total time, with repeated commands counted as duplicates."""
+    table = summary(
+        [Call(("/usr/bin/which", "port"), 0.1, 0, 19)] * 4
+        + [Call(("/opt/local/bin/port", "info", "gping"), 0.2, 0, 100)]
+        + [Call(("/opt/local/bin/port", "info", "py-base91"), 0.2, 0, 100)]
+    ).splitlines()
+
+    assert table[1].split() == ["which", "port", "4", "3", "0", "0.400", "0.100", "76"]
+    assert table[2].split() == ["port", "info", "2", "0", "0", "0.400", "0.200", "200"]
+    assert table[-1] == "6 commands in 0.800s, 3 duplicates"
+
+
+@beartype
+def test_profile_flag(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv(PROFILE_VARIABLE, "0")
+    CliRunner().invoke(seaport, ["--profile", "cache", "stats"])
+    assert os.environ[PROFILE_VARIABLE] == "1"
+
+
+@beartype
+def test_profile_at_exit() -> None:
+    """The table is printed to stderr when seaport exits."""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "from seaport._clipboard.format import format_subprocess\n"
+            "format_subprocess(['echo', 'hi'])\n"
+            "format_subprocess(['echo', 'hi'])",
+        ],
+        env={**os.environ, PROFILE_VARIABLE: "1"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout == ""
+    assert result.stderr.splitlines()[1].split()[:3] == ["echo", "hi", "2"]
+    assert (
+        result.stderr.endswith("2 commands in ", 0, -1)
+        or "1 duplicates" in result.stderr
+    )
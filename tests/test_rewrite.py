@@ -0,0 +1,154 @@
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import os
+from pathlib import Path
+
+import pytest
+from beartype import beartype
+from click.testing import CliRunner
+
+from seaport import _rewrite
+from seaport._rewrite import Rewrite, rewrite, rewrite_text, select_portfiles
+
+#: The portfiles of the example ports tree.
+PORTFILES = {
+    "net/gping": (
+        "PortSystem          1.0\n"
+        "PortGroup           github 1.0\n\n"
+        "github.setup        orf gping 1.16.1 gping-v\n"
+        "revision            1\n"
+        "maintainers         {gmail.com:harens @harens} openmaintainer\n"
+        "checksums           sha256  abc \\\n"
+        "                    size    10\n"
+    ),
+    "python/py-rich": (
+        "PortSystem          1.0\n"
+        "name                py-rich\n"
+        "version             13.0.0\n"
+        "maintainers         nomaintainer\n"
+    ),
+    "python/py-broken": "subport py-broken {\n",
+    "_resources/port1.0": "not a port\n",
+}
+
+
+@beartype
+def make_tree(tmp_path: Path) -> Path:
+    """Creates an example ports tree."""
+    for port, contents in PORTFILES.items():
+        os.makedirs(tmp_path / port)
+        (tmp_path / port / "Portfile").write_text(contents)
+    return tmp_path
+
+
+@beartype
+def test_select_portfiles(tmp_path: Path) -> None:
+    tree = make_tree(tmp_path)
+
+    assert [os.path.relpath(path, tree) for path in select_portfiles(str(tree))] == [
+        "net/gping/Portfile",
+        "python/py-broken/Portfile",
+        "python/py-rich/Portfile",
+    ]
+    assert list(select_portfiles(str(tree), ["PY-R*"], ["python"])) == [
+        str(tree / "python/py-rich/Portfile")
+    ]
+    assert not list(select_portfiles(str(tree), ["py-*"], ["net"]))
+
+
+@beartype
+def test_rewrite_text() -> None:
+    gping = PORTFILES["net/gping"]
+
+    assert rewrite_text(gping, Rewrite(revbump=True)) == gping.replace(
+        "revision            1", "revision            2"
+    )
+    assert rewrite_text(
+        gping, Rewrite(version="1.17.0", checksums={"sha256": "def"})
+    ) == gping.replace("1.16.1", "1.17.0").replace("revision            1", "revision            0").replace("abc", "def")  # fmt: skip
+    # A revision is added if there isn't one
+    assert rewrite_text(PORTFILES["python/py-rich"], Rewrite(revbump=True)) == (
+        PORTFILES["python/py-rich"].replace(
+            "13.0.0\n", "13.0.0\nrevision            1\n"
+        )
+    )
+    # Only ports with one of the maintainers are edited
+    assert rewrite_text(gping, Rewrite(revbump=True, maintainers=("someone",))) == gping
+
+    with pytest.raises(ValueError):
+        rewrite_text("version ${major}.0\n", Rewrite(version="2.0"))
+
+
+@beartype
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_rewrite(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, jobs: str) -> None:
+    tree = make_tree(tmp_path)
+    # Sends each portfile to a separate process
+    monkeypatch.setattr(_rewrite, "CHUNK_SIZE", 1)
+    before = os.stat(tree / "python/py-rich/Portfile").st_mtime_ns
+
+    result = CliRunner().invoke(
+        rewrite,
+        ["--tree", str(tree), "--revbump", "--maintainer", "harens", "--jobs", jobs],
+    )
+
+    assert result.exit_code == 1
+    assert "✏️  net/gping\n" in result.output
+    assert "❌ python/py-broken: Unmatched { at position 18" in result.output
+    assert "Changed 1 of 3 portfiles (1 failed)" in result.output
+    assert (tree / "net/gping/Portfile").read_text() == PORTFILES["net/gping"].replace(
+        "revision            1", "revision            2"
+    )
+    # Unchanged portfiles aren't written
+    assert os.stat(tree / "python/py-rich/Portfile").st_mtime_ns == before
+
+
+@beartype
+def test_rewrite_dry_run(tmp_path: Path) -> None:
+    tree = make_tree(tmp_path)
+
+    result = CliRunner().invoke(
+        rewrite, ["--tree", str(tree), "--category", "python", "--name", "py-rich",
+                  "--set-version", "14.0.0", "--dry-run"],  # fmt: skip
+    )
+
+    assert result.exit_code == 0
+    assert "✏️  python/py-rich\nWould change 1 of 1 portfiles" in result.output
+    assert (tree / "python/py-rich/Portfile").read_text() == PORTFILES["python/py-rich"]
+
+
+@beartype
+def test_rewrite_usage(tmp_path: Path) -> None:
+    assert CliRunner().invoke(rewrite, ["--tree", str(tmp_path)]).exit_code == 2
+    assert (
+        CliRunner()
+        .invoke(rewrite, ["--tree", str(tmp_path), "--checksum", "sha256"])
+        .exit_code
+        == 2
+    )
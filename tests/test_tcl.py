@@ -0,0 +1,110 @@
+# Copyright (c) 2023, harens
+#
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#     * Redistributions of source code must retain the above copyright notice,
+#       this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright notice,
+#       this list of conditions and the following disclaimer in the documentation
+#       and/or other materials provided with the distribution.
+#     * Neither the name of seaport nor the names of its contributors
+#       may be used to endorse or promote products derived from this software
+#       without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+
+import pytest
+from beartype import beartype
+
+from seaport._tcl import Edit, Word, apply_edits, blocks, commands
+
+
+@beartype
+def test_commands() -> None:
+    text = (
+        "# A comment \\\n  that continues\n"
+        "PortSystem 1.0\n"
+        'description "A \\"quoted\\" description"; version 1.0\n'
+        "checksums rmd160 abc \\\n    size 1\n"
+        "subport foo {\n    version {2.0}\n}\n"
+        "set x [string range ${version} 0 1]\n"
+    )
+
+    assert [[word.value for word in command] for command in commands(text)] == [
+        ["PortSystem", "1.0"],
+        ["description", 'A \\"quoted\\" description'],
+        ["version", "1.0"],
+        ["checksums", "rmd160", "abc", "size", "1"],
+        ["subport", "foo", "\n    version {2.0}\n"],
+        ["set", "x", "[string range ${version} 0 1]"],
+    ]
+
+
+@beartype
+def test_positions() -> None:
+    """The positions of each word include any braces or double quotes."""
+    text = 'name {foo bar}\nhomepage "https://example.com"\n'
+    words = [word for command in commands(text) for word in command]
+
+    assert words[1] == Word("foo bar", "braced", 5, 14)
+    assert words[3] == Word("https://example.com", "quoted", 24, 45)
+    assert text[words[3].start : words[3].end] == '"https://example.com"'
+
+
+@beartype
+def test_unmatched() -> None:
+    with pytest.raises(ValueError):
+        list(commands("subport foo {\n"))
+
+
+@beartype
+def test_blocks() -> None:
+    text = (
+        "version 1.0\n"
+        "subport foo {\n    version 2.0\n}\n"
+        "if {$a} {\n    revision 1\n} elseif {$b} {revision 2} else {revision 3}\n"
+        "platform darwin 10 {revision 4}\n"
+        "pre-configure {revision 5}\n"
+    )
+
+    assert [
+        (subport, [word.value for word in command])
+        for subport, command in blocks(text)
+        if command[0].value in ("version", "revision")
+    ] == [
+        (None, ["version", "1.0"]),
+        ("foo", ["version", "2.0"]),
+        (None, ["revision", "1"]),
+        (None, ["revision", "2"]),
+        (None, ["revision", "3"]),
+        (None, ["revision", "4"]),
+    ]
+
+
+@beartype
+def test_apply_edits() -> None:
+    """Everything apart from the edited words stays exactly the same."""
+    text = 'version {1.0} ;# comment\ndescription "foo bar"\n'
+    version, description = [command[1] for command in commands(text)]
+
+    assert apply_edits(text, []) == text
+    assert apply_edits(text, [description.replace("baz"), version.replace("1.1")]) == (
+        'version {1.1} ;# comment\ndescription "baz"\n'
+    )
+
+    with pytest.raises(ValueError):
+        apply_edits(text, [Edit(0, 5, "a"), Edit(4, 6, "b")])